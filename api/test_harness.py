@@ -8,14 +8,37 @@
 # Sample Output:
 #   {"jobs": [...], "total_count": 3, "timestamp": "2025-01-20T..."}
 
-from fastapi import FastAPI, HTTPException
+from fastapi import FastAPI, HTTPException, Request, Response
+from fastapi.responses import PlainTextResponse, StreamingResponse
 from fastapi.middleware.cors import CORSMiddleware
+from fastapi.middleware.gzip import GZipMiddleware
 from pydantic import BaseModel
 from typing import List, Optional, Dict, Any
+import hashlib
+import importlib.util
+import io
 import json
 import os
+import sys
+import threading
+import time
 from datetime import datetime
-from google.cloud import bigquery
+from pathlib import Path
+
+# Make the repo-root cocktailverse package importable when run from api/
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from cocktailverse import analytics, config, connection, costs, queries, results
+from gcf import telemetry
+
+# pyarrow is only needed for the columnar /export endpoint (imported on first export)
+PYARROW_AVAILABLE = importlib.util.find_spec('pyarrow') is not None
+
+# orjson is optional - fall back to the stdlib encoder when it is not installed
+try:
+    import orjson
+except ImportError:  # pragma: no cover
+    orjson = None
 
 # Initialize FastAPI app
 app = FastAPI(
@@ -33,6 +56,22 @@ app.add_middleware(
     allow_headers=["*"],
 )
 
+# Paths whose responses are already compact binary streams: Parquet is zstd-compressed
+# and Arrow IPC is columnar, so gzip would only burn CPU (and buffer the stream)
+UNCOMPRESSED_PATHS = {'/export'}
+
+class JSONGZipMiddleware(GZipMiddleware):
+    """GZipMiddleware that passes UNCOMPRESSED_PATHS through untouched"""
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] == "http" and scope["path"] in UNCOMPRESSED_PATHS:
+            await self.app(scope, receive, send)
+            return
+        await super().__call__(scope, receive, send)
+
+# Compress larger JSON payloads (10k-row responses shrink ~8x)
+app.add_middleware(JSONGZipMiddleware, minimum_size=1024)
+
 # Pydantic models
 class Cocktail(BaseModel):
     cocktail_id: str
@@ -56,75 +95,232 @@ class ResultsResponse(BaseModel):
     timestamp: str
 
 # GCP Configuration
-PROJECT_ID = os.getenv('PROJECT_ID', '')
-DATASET_ID = os.getenv('DATASET_ID', 'cocktailverse')
-TABLE_ID = os.getenv('TABLE_ID', 'cocktails')
+SETTINGS = config.load_settings()
+PROJECT_ID = SETTINGS['project_id']
+DATASET_ID = SETTINGS['dataset_id']
+TABLE_ID = SETTINGS['table_id']
+TABLE = SETTINGS['table']
+PAIRS_TABLE = SETTINGS['pairs_table']
+PAIR_TOTALS_TABLE = SETTINGS['pair_totals_table']
 
-# Initialize BigQuery client
-bq_client = None
-if PROJECT_ID:
-    try:
-        bq_client = bigquery.Client(project=PROJECT_ID)
-        print(f"✅ Connected to BigQuery: {PROJECT_ID}.{DATASET_ID}.{TABLE_ID}")
-    except Exception as e:
-        print(f"⚠️ Warning: Could not connect to BigQuery: {e}")
-        print("   Running in mock mode - will return empty results")
+# Serve mode (`python test_harness.py --workers N`): the supervisor publishes the
+# dataset as a memory-mapped Arrow snapshot at this path and every worker
+# serves /cocktails and /export from it (one copy in the page cache, shared)
+API_SNAPSHOT_PATH = os.getenv('API_SNAPSHOT_PATH', '')
+API_SNAPSHOT_ROWS = int(os.getenv('API_SNAPSHOT_ROWS', '100000'))
+API_SNAPSHOT_REFRESH_SECONDS = int(os.getenv('API_SNAPSHOT_REFRESH_SECONDS', '300'))
+# How often a worker stats the snapshot file for a swap
+SNAPSHOT_CHECK_SECONDS = 1.0
+
+# BigQuery clients are created on the first request that needs them, so
+# importing the app (and cold starts) skip google-cloud-bigquery entirely
+_bq_client = None
+_bqstorage_client = None
+
+def get_bq_client():
+    """BigQuery client, or None in mock mode (no PROJECT_ID or no credentials)"""
+    global _bq_client
+    if _bq_client is None:
+        _bq_client = False
+        if PROJECT_ID:
+            try:
+                _bq_client = connection.create_bigquery_client(PROJECT_ID)
+                print(f"✅ Connected to BigQuery: {PROJECT_ID}.{DATASET_ID}.{TABLE_ID}")
+            except Exception as e:
+                print(f"⚠️ Warning: Could not connect to BigQuery: {e}")
+                print("   Running in mock mode - will return empty results")
+    return _bq_client or None
+
+def bigquery_configured() -> bool:
+    """Whether BigQuery is (or will be) available, without forcing a client"""
+    return bool(PROJECT_ID) and _bq_client is not False
+
+def dumps_json(obj: Any) -> bytes:
+    """Serialize to compact JSON bytes using orjson when available"""
+    if orjson is not None:
+        return orjson.dumps(obj)
+    return json.dumps(obj, separators=(',', ':'), ensure_ascii=False).encode('utf-8')
+
+def render_cocktails_payload(cocktails: List[Dict[str, Any]], timestamp: str) -> tuple:
+    """
+    Serialize query rows straight into a ResultsResponse-shaped body.
+    Rows from query_bigquery already match the Cocktail schema, so no per-row
+    Pydantic models are built. Returns (body_bytes, etag) where the ETag covers
+    the rows only (the timestamp changes on every call).
+    """
+    rows_json = dumps_json(cocktails)
+    etag = 'W/"' + hashlib.blake2b(rows_json, digest_size=16).hexdigest() + '"'
+    body = b''.join([
+        b'{"cocktails":', rows_json,
+        b',"total_count":', str(len(cocktails)).encode('ascii'),
+        b',"timestamp":', dumps_json(timestamp),
+        b'}'
+    ])
+    return body, etag
+
+def get_bqstorage_client():
+    """
+    Lazily create a BigQuery Storage Read API client.
+    Returns None when google-cloud-bigquery-storage is not installed, in which
+    case result downloads fall back to the REST tabledata API.
+    """
+    global _bqstorage_client
+    if _bqstorage_client is None:
+        _bqstorage_client = connection.create_bqstorage_client() or False
+    return _bqstorage_client or None
+
+def run_cocktails_query(limit: int = 100, label: str = 'api_cocktails'):
+    """Run the latest-cocktails query (cost-accounted, budgeted) and return the RowIterator"""
+    sql, params = queries.latest_cocktails_query(TABLE, limit)
+    return costs.run_query(get_bq_client(), sql, params, label=label).result()
+
+_snapshot_lock = threading.Lock()
+_snapshot = {'table': None, 'info': None, 'file_id': None, 'checked': 0.0}
+
+def attached_snapshot():
+    """
+    (arrow_table, info) for the shared snapshot, or None when not in serve
+    mode / not published yet. The file is re-mapped when the supervisor swaps
+    it (os.replace gives a new inode); requests still holding the previous
+    table keep its mapping alive until they finish.
+    """
+    if not API_SNAPSHOT_PATH:
+        return None
+    now = time.monotonic()
+    if now - _snapshot['checked'] >= SNAPSHOT_CHECK_SECONDS:
+        with _snapshot_lock:
+            if now - _snapshot['checked'] >= SNAPSHOT_CHECK_SECONDS:
+                _snapshot['checked'] = now
+                try:
+                    stat = os.stat(API_SNAPSHOT_PATH)
+                    file_id = (stat.st_ino, stat.st_mtime_ns)
+                except OSError:
+                    file_id = None
+                if file_id is not None and file_id != _snapshot['file_id']:
+                    from cocktailverse import snapshot
+                    loaded = snapshot.read_snapshot(Path(API_SNAPSHOT_PATH))
+                    if loaded is not None:
+                        _snapshot.update(table=loaded[0], info=loaded[1], file_id=file_id)
+                        print(f"📎 Worker {os.getpid()} attached snapshot {loaded[1]['version']} ({loaded[1]['rows']} rows)")
+    if _snapshot['table'] is None:
+        return None
+    return _snapshot['table'], _snapshot['info']
+
+def snapshot_version(table) -> str:
+    """Data version of a cocktails table: latest processed_at and row count"""
+    import pyarrow.compute as pc
+
+    latest = pc.max(table['processed_at']).as_py() if table.num_rows else None
+    return f"{latest.isoformat() if latest else 'empty'}:{table.num_rows}"
+
+def publish_snapshot(path: Path, rows: int = API_SNAPSHOT_ROWS) -> Optional[str]:
+    """Query the latest `rows` cocktails and atomically replace the snapshot; returns its version"""
+    from cocktailverse import snapshot
+
+    with telemetry.span('api_query', endpoint='snapshot') as span:
+        table = run_cocktails_query(rows, label='api_snapshot').to_arrow(bqstorage_client=get_bqstorage_client())
+        span.add(bytes=table.nbytes, records=table.num_rows)
+    version = snapshot_version(table)
+    snapshot.write_arrow_snapshot(table, path, version)
+    return version
+
+def refresh_snapshot_forever(path: Path, version: Optional[str], table_version: Optional[str] = None) -> None:
+    """
+    Supervisor thread: re-publish when the table changes (table-metadata
+    probe, no query). table_version is the probe value the current snapshot
+    was published at (None forces a publish on the first pass).
+    """
+    while True:
+        time.sleep(API_SNAPSHOT_REFRESH_SECONDS)
+        try:
+            probe = queries.table_version(get_bq_client(), TABLE)['version']
+            if version is None or probe != table_version:
+                version = publish_snapshot(path)
+                table_version = probe
+                print(f"🔄 Published snapshot {version}")
+        except Exception as e:
+            print(f"⚠️ Snapshot refresh failed (workers keep serving {version}): {e}")
+
+def query_bigquery_arrow_batches(limit: int = 100):
+    """
+    Run the cocktails query and return (arrow_schema, RecordBatch iterator).
+    Results are downloaded columnar via the Storage Read API when available,
+    or sliced from the shared snapshot in serve mode.
+    """
+    attached = attached_snapshot()
+    if attached is not None:
+        table = attached[0].slice(0, limit)
+        return table.schema, iter(table.to_batches())
+    with telemetry.span('api_query', endpoint='export'):
+        rows = run_cocktails_query(limit, label='api_export')
+    return results.bq_schema_to_arrow(rows.schema), rows.to_arrow_iterable(bqstorage_client=get_bqstorage_client())
+
+def query_bigquery_arrow(limit: int = 100):
+    """Run the cocktails query and return the full result as an Arrow Table"""
+    with telemetry.span('api_query', endpoint='cocktails') as span:
+        table = run_cocktails_query(limit).to_arrow(bqstorage_client=get_bqstorage_client())
+        span.add(bytes=table.nbytes, records=table.num_rows)
+    return table
 
 def query_bigquery(limit: int = 100) -> List[Dict[str, Any]]:
-    """Query BigQuery for cocktail data"""
-    if not bq_client:
+    """Query BigQuery for cocktail data (the shared snapshot in serve mode)"""
+    attached = attached_snapshot()
+    if attached is not None:
+        return results.arrow_to_cocktails(attached[0].slice(0, limit))
+    if not get_bq_client():
         return []
     
     try:
-        query = f"""
-        SELECT 
-            cocktail_id,
-            name,
-            category,
-            alcoholic,
-            glass,
-            instructions,
-            ingredients,
-            image_url,
-            tags,
-            iba,
-            video_url,
-            source,
-            fetched_at,
-            processed_at
-        FROM `{PROJECT_ID}.{DATASET_ID}.{TABLE_ID}`
-        ORDER BY processed_at DESC
-        LIMIT {limit}
-        """
-        
-        query_job = bq_client.query(query)
-        results = query_job.result()
-        
-        cocktails = []
-        for row in results:
-            cocktail = {
-                'cocktail_id': row.cocktail_id,
-                'name': row.name,
-                'category': row.category,
-                'alcoholic': row.alcoholic,
-                'glass': row.glass,
-                'instructions': row.instructions,
-                'ingredients': list(row.ingredients) if row.ingredients else [],
-                'image_url': row.image_url,
-                'tags': list(row.tags) if row.tags else [],
-                'iba': row.iba,
-                'video_url': row.video_url,
-                'source': row.source,
-                'fetched_at': row.fetched_at.isoformat() if row.fetched_at else None,
-                'processed_at': row.processed_at.isoformat() if row.processed_at else None
-            }
-            cocktails.append(cocktail)
-        
-        return cocktails
+        return results.arrow_to_cocktails(query_bigquery_arrow(limit))
+    except costs.BudgetExceeded:
+        raise
     except Exception as e:
         print(f"Error querying BigQuery: {e}")
         return []
 
+EXPORT_FORMATS = {
+    'arrow': ('application/vnd.apache.arrow.stream', 'arrows'),
+    'parquet': ('application/vnd.apache.parquet', 'parquet'),
+}
+
+def stream_export(batches, export_format: str, empty_schema=None):
+    """
+    Encode RecordBatches as an Arrow IPC stream or a Parquet file, yielding
+    bytes as each batch is written so the full result is never buffered.
+    """
+    import pyarrow as pa
+    import pyarrow.parquet as pq
+    
+    sink = io.BytesIO()
+    
+    def drain() -> bytes:
+        chunk = sink.getvalue()
+        sink.seek(0)
+        sink.truncate(0)
+        return chunk
+    
+    writer = None
+    try:
+        for batch in batches:
+            if writer is None:
+                if export_format == 'parquet':
+                    writer = pq.ParquetWriter(sink, batch.schema, compression='zstd')
+                else:
+                    writer = pa.ipc.new_stream(sink, batch.schema)
+            writer.write_batch(batch)
+            chunk = drain()
+            if chunk:
+                yield chunk
+        if writer is None and empty_schema is not None:
+            # No rows: still emit a valid, schema-only stream/file
+            writer = (pq.ParquetWriter(sink, empty_schema) if export_format == 'parquet'
+                      else pa.ipc.new_stream(sink, empty_schema))
+    finally:
+        if writer is not None:
+            writer.close()
+    
+    yield drain()
+
 @app.get("/")
 async def root():
     """Root endpoint with API information"""
@@ -133,24 +329,64 @@ async def root():
         "version": "1.0.0",
         "endpoints": {
             "cocktails": "GET /cocktails - Query processed cocktail data from BigQuery",
+            "export": "GET /export?format=arrow|parquet - Columnar export for analytics clients",
             "health": "GET /health - Health check",
+            "ready": "GET /ready - Readiness of the data source (snapshot version in serve mode)",
+            "metrics": "GET /metrics - Per-stage latency/throughput (Prometheus format)",
+            "costs": "GET /costs - BigQuery bytes/cache hits/slot time per reader and budgets",
+            "pairings": "GET /ingredients/pairings?ingredient=&order=cocktails|pmi - Top ingredient pairs and PMI",
             "docs": "GET /docs - API documentation"
         },
-        "bigquery_configured": bq_client is not None,
+        "bigquery_configured": bigquery_configured(),
         "project": PROJECT_ID,
         "dataset": DATASET_ID,
         "table": TABLE_ID
     }
 
 @app.get("/cocktails", response_model=ResultsResponse)
-async def get_cocktails(limit: int = 100):
+def get_cocktails(request: Request, limit: int = 100):
     """Retrieve processed cocktail data from BigQuery"""
-    cocktails_data = query_bigquery(limit=limit)
+    try:
+        cocktails_data = query_bigquery(limit=limit)
+    except costs.BudgetExceeded as e:
+        raise HTTPException(status_code=429, detail=str(e))
+    
+    # Fast path: documented schema is ResultsResponse, but the body is
+    # serialized directly from the row dicts (no per-row model construction)
+    with telemetry.span('api_serialize', endpoint='cocktails') as span:
+        body, etag = render_cocktails_payload(cocktails_data, datetime.utcnow().isoformat())
+        span.add(bytes=len(body), records=len(cocktails_data))
+    headers = {'ETag': etag, 'Cache-Control': 'no-cache'}
+    
+    if_none_match = [tag.strip() for tag in request.headers.get('if-none-match', '').split(',')]
+    if etag in if_none_match or '*' in if_none_match:
+        return Response(status_code=304, headers=headers)
+    
+    return Response(content=body, media_type='application/json', headers=headers)
+
+@app.get("/export")
+def export_cocktails(format: str = 'arrow', limit: int = 100000):
+    """Stream cocktail data as Arrow IPC (format=arrow) or Parquet (format=parquet)"""
+    if format not in EXPORT_FORMATS:
+        raise HTTPException(status_code=400, detail=f"Unsupported format '{format}', use one of {sorted(EXPORT_FORMATS)}")
+    if not PYARROW_AVAILABLE:
+        raise HTTPException(status_code=501, detail="pyarrow is not installed")
+    if attached_snapshot() is None and not get_bq_client():
+        raise HTTPException(status_code=503, detail="BigQuery is not configured")
     
-    return ResultsResponse(
-        cocktails=[Cocktail(**cocktail) for cocktail in cocktails_data],
-        total_count=len(cocktails_data),
-        timestamp=datetime.utcnow().isoformat()
+    try:
+        schema, batches = query_bigquery_arrow_batches(limit=limit)
+    except costs.BudgetExceeded as e:
+        raise HTTPException(status_code=429, detail=str(e))
+    except Exception as e:
+        print(f"Error querying BigQuery: {e}")
+        raise HTTPException(status_code=502, detail=str(e))
+    
+    media_type, extension = EXPORT_FORMATS[format]
+    return StreamingResponse(
+        stream_export(batches, format, empty_schema=schema),
+        media_type=media_type,
+        headers={'Content-Disposition': f'attachment; filename="{TABLE_ID}.{extension}"'}
     )
 
 @app.get("/health")
@@ -159,11 +395,136 @@ async def health_check():
     return {
         "status": "healthy",
         "timestamp": datetime.utcnow().isoformat(),
-        "bigquery_configured": bq_client is not None,
+        "bigquery_configured": bigquery_configured(),
         "project": PROJECT_ID
     }
 
-if __name__ == "__main__":
+@app.get("/ready")
+def readiness(response: Response):
+    """
+    Readiness probe: 503 until the active data source has loaded. With a
+    snapshot (serve mode) that is the attached snapshot, whose version is
+    reported; otherwise the BigQuery client. Mock mode (no PROJECT_ID) has
+    nothing to load and is always ready.
+    """
+    body = {"pid": os.getpid()}
+    if API_SNAPSHOT_PATH:
+        attached = attached_snapshot()
+        info = attached[1] if attached else {}
+        body.update(ready=attached is not None, mode="snapshot", snapshot_version=info.get('version'),
+                    written_at=info.get('written_at'), rows=info.get('rows'))
+    elif PROJECT_ID:
+        body.update(ready=get_bq_client() is not None, mode="bigquery")
+    else:
+        body.update(ready=True, mode="mock")
+    if not body["ready"]:
+        response.status_code = 503
+    return body
+
+@app.get("/metrics", response_class=PlainTextResponse)
+def metrics():
+    """Prometheus scrape endpoint for the API's stage spans"""
+    return PlainTextResponse(telemetry.render_prometheus(), media_type='text/plain; version=0.0.4')
+
+@app.get("/costs")
+async def query_costs():
+    """Accumulated BigQuery cost per reader (this process) and the configured budgets"""
+    return costs.stats()
+
+ANALYTICS_MEDIA_TYPES = {'json': 'application/json', 'csv': 'text/csv'}
+
+@app.get("/analytics")
+def analytics_index():
+    """Snapshots written by `python -m cocktailverse.analytics` (name, rows, cache state)"""
+    path = analytics.ANALYTICS_DIR / f"{analytics.INDEX_NAME}.json"
+    if not path.exists():
+        raise HTTPException(status_code=404, detail="No analytics snapshots yet - run python -m cocktailverse.analytics")
+    return Response(content=path.read_bytes(), media_type='application/json')
+
+@app.get("/analytics/{name}")
+def analytics_result(name: str, format: str = 'json'):
+    """One analytics snapshot, served from the file as written (json or csv)"""
+    if format not in ANALYTICS_MEDIA_TYPES:
+        raise HTTPException(status_code=400, detail=f"format must be one of {sorted(ANALYTICS_MEDIA_TYPES)}")
+    path = analytics.ANALYTICS_DIR / f"{name}.{format}"
+    if not name.isidentifier() or name == analytics.INDEX_NAME or not path.exists():
+        raise HTTPException(status_code=404, detail=f"No analytics snapshot named '{name}'")
+    return Response(content=path.read_bytes(), media_type=ANALYTICS_MEDIA_TYPES[format])
+
+@app.get("/ingredients/pairings")
+def ingredient_pairings(ingredient: str = '', order: str = 'cocktails', min_count: int = 1, limit: int = 20):
+    """
+    Ingredients that most often appear together, with their PMI, from the
+    co-occurrence table the pipeline maintains (no self-join over cocktails)
+    """
+    if order not in queries.PAIRING_ORDERS:
+        raise HTTPException(status_code=400, detail=f"order must be one of {sorted(queries.PAIRING_ORDERS)}")
+    if not get_bq_client():
+        raise HTTPException(status_code=503, detail="BigQuery is not configured")
+    
+    # Same canonical form as the pipeline writes (lower case, single spaces)
+    ingredient = ' '.join(ingredient.lower().split())
+    sql, params = queries.ingredient_pairings_query(PAIRS_TABLE, PAIR_TOTALS_TABLE, ingredient, order,
+                                                    max(1, min_count), max(1, min(limit, 1000)))
+    try:
+        with telemetry.span('api_query', endpoint='pairings') as span:
+            rows = [dict(row) for row in costs.run_query(get_bq_client(), sql, params, label='api_pairings').result()]
+            span.add(records=len(rows))
+    except costs.BudgetExceeded as e:
+        raise HTTPException(status_code=429, detail=str(e))
+    except Exception as e:
+        print(f"Error querying ingredient pairs: {e}")
+        raise HTTPException(status_code=502, detail=str(e))
+    return {
+        "pairings": rows,
+        "ingredient": ingredient or None,
+        "order": order,
+        "timestamp": datetime.utcnow().isoformat()
+    }
+
+def serve(workers: int, host: str = "0.0.0.0", port: int = 8000) -> None:
+    """
+    Production serve mode: publish the snapshot once, then run `workers`
+    uvicorn worker processes that all memory-map it. The supervisor keeps
+    republishing it (atomic swap) while the workers serve.
+    """
     import uvicorn
-    uvicorn.run(app, host="0.0.0.0", port=8000)
+    from cocktailverse import snapshot
+
+    path = Path(API_SNAPSHOT_PATH) if API_SNAPSHOT_PATH else snapshot.snapshot_path(TABLE, prefix='api_')
+    version = None
+    table_version = None
+    if get_bq_client():
+        try:
+            # Probed first, so rows landing during the publish trigger the next one
+            table_version = queries.table_version(get_bq_client(), TABLE)['version']
+            version = publish_snapshot(path)
+            print(f"📦 Published snapshot {version} to {path}")
+        except Exception as e:
+            print(f"⚠️ Could not publish snapshot: {e}")
+    if version is None and not path.exists():
+        print("⚠️ No snapshot yet - workers report not ready until one is published")
+    if get_bq_client():
+        threading.Thread(target=refresh_snapshot_forever, args=(path, version, table_version), daemon=True,
+                         name='snapshot-refresh').start()
+
+    # Workers are separate processes importing this module; they find the snapshot via the environment
+    os.environ['API_SNAPSHOT_PATH'] = str(path)
+    uvicorn.run("test_harness:app", host=host, port=port, workers=workers,
+                app_dir=str(Path(__file__).resolve().parent))
+
+if __name__ == "__main__":
+    import argparse
+    parser = argparse.ArgumentParser(description='Cocktailverse API')
+    parser.add_argument('--workers', type=int, default=int(os.getenv('API_WORKERS', '1')),
+                        help='worker processes; above 1 serves from a shared snapshot')
+    parser.add_argument('--host', default='0.0.0.0')
+    parser.add_argument('--port', type=int, default=8000)
+    args = parser.parse_args()
+
+    if args.workers > 1:
+        serve(args.workers, args.host, args.port)
+    else:
+        import uvicorn
+        uvicorn.run(app, host=args.host, port=args.port)
 
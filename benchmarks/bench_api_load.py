@@ -0,0 +1,251 @@
+#!/usr/bin/env python3
+# 💬 Benchmark: API load test
+# Purpose: Drive the FastAPI harness with concurrent keep-alive clients and a weighted
+#          request mix; report throughput, latency percentiles and error rates
+#
+# Usage:
+#   python benchmarks/bench_api_load.py [--concurrency 16] [--duration 10] [--workers 1]
+#                                       [--mix "/cocktails?limit=100:8,/health:2"] [--rows 10000]
+#                                       [--url http://host:port] [--save-baseline FILE] [--baseline FILE]
+#
+#   Without --url the harness is started locally in serve mode against a synthetic
+#   snapshot of --rows cocktails (the local warehouse stand-in: no BigQuery needed).
+#   --baseline fails (exit 1) when throughput drops or p95/p99 latency grows by more
+#   than --tolerance, or the error rate rises by more than 1 point.
+#
+# Sample Output:
+#   endpoint                    requests      rps   p50 ms   p95 ms   p99 ms  errors
+#   /cocktails?limit=100             573    191.0     37.3     52.5     97.7   0.00%
+#   /health                          181     60.3     12.9     22.1     33.3   0.00%
+#   total                            754    251.3     34.0     49.9     66.9   0.00%
+
+import argparse
+import http.client
+import json
+import os
+import random
+import socket
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+from datetime import datetime, timedelta, timezone
+from pathlib import Path
+from urllib.parse import urlsplit
+
+REPO_ROOT = Path(__file__).resolve().parent.parent
+DEFAULT_MIX = '/cocktails?limit=100:8,/health:2'
+STARTUP_TIMEOUT_SECONDS = 60
+
+def parse_mix(text: str) -> list:
+    """'/path:weight,...' -> [(path, weight)]"""
+    mix = []
+    for item in text.split(','):
+        path, _, weight = item.strip().rpartition(':')
+        if not path:
+            path, weight = weight, '1'
+        mix.append((path, float(weight)))
+    return mix
+
+def percentile(sorted_values: list, pct: float) -> float:
+    """Nearest-rank percentile of an ascending list"""
+    if not sorted_values:
+        return 0.0
+    rank = max(1, int(round(pct / 100 * len(sorted_values))))
+    return sorted_values[min(rank, len(sorted_values)) - 1]
+
+def write_stand_in_snapshot(path: Path, rows: int) -> None:
+    """Synthetic cocktails as an API snapshot (what serve mode publishes from BigQuery)"""
+    sys.path.insert(0, str(REPO_ROOT))
+    import pyarrow as pa
+    from cocktailverse import snapshot
+
+    start = datetime(2025, 1, 15, tzinfo=timezone.utc)
+    string_list = pa.list_(pa.string())
+    timestamp = pa.timestamp('us', tz='UTC')
+    table = pa.table({
+        'cocktail_id': [str(11000 + i) for i in range(rows)],
+        'name': [f'Cocktail {i}' for i in range(rows)],
+        'category': ['Ordinary Drink' if i % 3 else 'Cocktail' for i in range(rows)],
+        'alcoholic': ['Alcoholic' if i % 7 else 'Non alcoholic' for i in range(rows)],
+        'glass': ['Cocktail glass'] * rows,
+        'instructions': ['Shake the ingredients with ice, then strain into the glass.'] * rows,
+        'ingredients': pa.array([['1 1/2 oz Tequila', '1/2 oz Triple sec', '1 oz Lime juice', 'Salt']] * rows,
+                                type=string_list),
+        'image_url': [f'https://www.thecocktaildb.com/images/media/drink/{i}.jpg' for i in range(rows)],
+        'tags': pa.array([['IBA', 'ContemporaryClassic']] * rows, type=string_list),
+        'iba': ['Contemporary Classics' if i % 4 == 0 else None for i in range(rows)],
+        'video_url': pa.array([None] * rows, type=pa.string()),
+        'source': ['TheCocktailDB'] * rows,
+        'fetched_at': pa.array([start - timedelta(seconds=i) for i in range(rows)], type=timestamp),
+        'processed_at': pa.array([start - timedelta(seconds=i) for i in range(rows)], type=timestamp),
+    })
+    snapshot.write_arrow_snapshot(table, path, f"stand-in:{rows}")
+
+def free_port() -> int:
+    with socket.socket() as sock:
+        sock.bind(('127.0.0.1', 0))
+        return sock.getsockname()[1]
+
+def start_local_harness(rows: int, workers: int, tmp: str):
+    """Start api/test_harness.py in serve mode on the stand-in snapshot; returns (process, base_url)"""
+    snapshot_path = Path(tmp) / 'api_stand_in.arrow'
+    write_stand_in_snapshot(snapshot_path, rows)
+    port = free_port()
+    env = dict(os.environ, API_SNAPSHOT_PATH=str(snapshot_path), PROJECT_ID='', TELEMETRY_LOG='0')
+    process = subprocess.Popen(
+        [sys.executable, str(REPO_ROOT / 'api' / 'test_harness.py'), '--workers', str(workers),
+         '--host', '127.0.0.1', '--port', str(port)],
+        cwd=str(REPO_ROOT / 'api'), env=env, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+    base_url = f"http://127.0.0.1:{port}"
+    deadline = time.monotonic() + STARTUP_TIMEOUT_SECONDS
+    while time.monotonic() < deadline:
+        if process.poll() is not None:
+            raise RuntimeError(f"API harness exited with code {process.returncode}")
+        try:
+            connection = http.client.HTTPConnection('127.0.0.1', port, timeout=1)
+            connection.request('GET', '/ready')
+            if connection.getresponse().status == 200:
+                return process, base_url
+        except OSError:
+            pass
+        time.sleep(0.2)
+    process.terminate()
+    raise RuntimeError("API harness did not become ready")
+
+def run_load(base_url: str, mix: list, concurrency: int, duration: float, warmup: float = 1.0) -> dict:
+    """
+    `concurrency` client threads, each with one keep-alive connection, issue
+    requests back to back (closed loop) for `duration` seconds after a warm-up.
+    Returns {path: {'latencies': [...], 'errors': n}}.
+    """
+    parts = urlsplit(base_url)
+    paths = [path for path, _ in mix]
+    weights = [weight for _, weight in mix]
+    results = {path: {'latencies': [], 'errors': 0} for path in paths}
+    lock = threading.Lock()
+    start_at = time.monotonic() + warmup
+    stop_at = start_at + duration
+
+    def client(seed: int):
+        rng = random.Random(seed)
+        connection = http.client.HTTPConnection(parts.hostname, parts.port or 80, timeout=30)
+        local = {path: ([], 0) for path in paths}
+        while True:
+            now = time.monotonic()
+            if now >= stop_at:
+                break
+            path = rng.choices(paths, weights)[0]
+            started = time.perf_counter()
+            try:
+                connection.request('GET', path)
+                response = connection.getresponse()
+                response.read()
+                ok = response.status < 400
+            except (OSError, http.client.HTTPException):
+                ok = False
+                connection.close()
+                connection = http.client.HTTPConnection(parts.hostname, parts.port or 80, timeout=30)
+            elapsed_ms = (time.perf_counter() - started) * 1000
+            if now < start_at:
+                continue  # warm-up request, not recorded
+            latencies, errors = local[path]
+            if ok:
+                latencies.append(elapsed_ms)
+            else:
+                local[path] = (latencies, errors + 1)
+        connection.close()
+        with lock:
+            for path, (latencies, errors) in local.items():
+                results[path]['latencies'].extend(latencies)
+                results[path]['errors'] += errors
+
+    threads = [threading.Thread(target=client, args=(i,), daemon=True) for i in range(concurrency)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    return results
+
+def summarize(results: dict, duration: float) -> dict:
+    """Per-endpoint and total throughput, p50/p95/p99 (successful requests) and error rate"""
+    def stats(latencies: list, errors: int) -> dict:
+        latencies = sorted(latencies)
+        requests = len(latencies) + errors
+        return {
+            'requests': requests,
+            'rps': round(requests / duration, 1),
+            'p50_ms': round(percentile(latencies, 50), 2),
+            'p95_ms': round(percentile(latencies, 95), 2),
+            'p99_ms': round(percentile(latencies, 99), 2),
+            'error_rate': round(errors / requests, 4) if requests else 0.0,
+        }
+
+    report = {path: stats(r['latencies'], r['errors']) for path, r in results.items()}
+    report['total'] = stats([ms for r in results.values() for ms in r['latencies']],
+                            sum(r['errors'] for r in results.values()))
+    return report
+
+def print_report(report: dict) -> None:
+    print(f"{'endpoint':<26} {'requests':>9} {'rps':>8} {'p50 ms':>8} {'p95 ms':>8} {'p99 ms':>8} {'errors':>7}")
+    for path, s in report.items():
+        print(f"{path:<26} {s['requests']:>9} {s['rps']:>8.1f} {s['p50_ms']:>8.1f} {s['p95_ms']:>8.1f} "
+              f"{s['p99_ms']:>8.1f} {s['error_rate']:>7.2%}")
+
+def regressions(report: dict, baseline: dict, tolerance: float) -> list:
+    """Ways the report is worse than the baseline beyond the tolerance"""
+    problems = []
+    for path, base in baseline.items():
+        current = report.get(path)
+        if current is None:
+            continue
+        if current['rps'] < base['rps'] * (1 - tolerance):
+            problems.append(f"{path}: throughput {current['rps']} rps < baseline {base['rps']} rps")
+        for key in ('p95_ms', 'p99_ms'):
+            if current[key] > base[key] * (1 + tolerance):
+                problems.append(f"{path}: {key} {current[key]} > baseline {base[key]}")
+        if current['error_rate'] > base['error_rate'] + 0.01:
+            problems.append(f"{path}: error rate {current['error_rate']:.2%} > baseline {base['error_rate']:.2%}")
+    return problems
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description='API load test')
+    parser.add_argument('--url', help='test a running server instead of starting the local harness')
+    parser.add_argument('--mix', default=DEFAULT_MIX, help='weighted request mix, "/path:weight,..."')
+    parser.add_argument('--concurrency', type=int, default=16, help='concurrent clients')
+    parser.add_argument('--duration', type=float, default=10, help='measured seconds (after a 1s warm-up)')
+    parser.add_argument('--workers', type=int, default=1, help='API worker processes (local harness)')
+    parser.add_argument('--rows', type=int, default=10000, help='stand-in snapshot rows (local harness)')
+    parser.add_argument('--json', help='write the report as JSON')
+    parser.add_argument('--save-baseline', help='store the report as the baseline')
+    parser.add_argument('--baseline', help='fail if results regress against this baseline')
+    parser.add_argument('--tolerance', type=float, default=0.2, help='allowed relative regression (0.2 = 20%%)')
+    args = parser.parse_args()
+
+    mix = parse_mix(args.mix)
+    with tempfile.TemporaryDirectory() as tmp:
+        process = None
+        base_url = args.url
+        if base_url is None:
+            process, base_url = start_local_harness(args.rows, args.workers, tmp)
+        try:
+            results = run_load(base_url, mix, args.concurrency, args.duration)
+        finally:
+            if process is not None:
+                process.terminate()
+                process.wait(timeout=30)
+
+    report = summarize(results, args.duration)
+    print_report(report)
+    for path in (args.json, args.save_baseline):
+        if path:
+            Path(path).write_text(json.dumps(report, indent=2))
+
+    if args.baseline:
+        problems = regressions(report, json.loads(Path(args.baseline).read_text()), args.tolerance)
+        for problem in problems:
+            print(f"❌ Regression: {problem}")
+        if problems:
+            sys.exit(1)
+        print("✅ No regression against the baseline")
@@ -0,0 +1,78 @@
+#!/usr/bin/env python3
+# 💬 Benchmark: /cocktails response serialization
+# Purpose: Compare the Pydantic-per-row response path with the direct bytes fast path
+#
+# Outputs:
+#   - Time per response (ms) and speedup at 100, 10k and 100k rows
+#
+# Sample Output:
+#   rows=10000   pydantic=  113.02ms  fast=   15.15ms  speedup=  7.5x  gzip=5212.8KB->94.8KB
+
+import gzip
+import os
+import sys
+import time
+from datetime import datetime
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'api'))
+
+from test_harness import Cocktail, ResultsResponse, render_cocktails_payload  # noqa: E402
+
+ROW_COUNTS = [100, 10_000, 100_000]
+
+def make_rows(n: int):
+    """Build rows shaped like query_bigquery output"""
+    return [
+        {
+            'cocktail_id': str(11000 + i),
+            'name': f'Cocktail {i}',
+            'category': 'Ordinary Drink',
+            'alcoholic': 'Alcoholic',
+            'glass': 'Cocktail glass',
+            'instructions': 'Shake the ingredients with ice, then strain into the glass.',
+            'ingredients': ['1 1/2 oz Tequila', '1/2 oz Triple sec', '1 oz Lime juice', 'Salt'],
+            'image_url': f'https://www.thecocktaildb.com/images/media/drink/{i}.jpg',
+            'tags': ['IBA', 'ContemporaryClassic'],
+            'iba': 'Contemporary Classics',
+            'video_url': None,
+            'source': 'TheCocktailDB',
+            'fetched_at': '2025-01-15T12:00:00',
+            'processed_at': '2025-01-15T12:00:05'
+        }
+        for i in range(n)
+    ]
+
+def pydantic_path(rows):
+    """Previous path: model per row, response model, default JSON encoding"""
+    response = ResultsResponse(
+        cocktails=[Cocktail(**row) for row in rows],
+        total_count=len(rows),
+        timestamp=datetime.utcnow().isoformat()
+    )
+    return response.model_dump_json().encode('utf-8')
+
+def fast_path(rows):
+    body, _ = render_cocktails_payload(rows, datetime.utcnow().isoformat())
+    return body
+
+def best_of(fn, rows, repeat: int) -> float:
+    timings = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        fn(rows)
+        timings.append(time.perf_counter() - start)
+    return min(timings) * 1000
+
+if __name__ == "__main__":
+    for n in ROW_COUNTS:
+        rows = make_rows(n)
+        repeat = 3 if n >= 100_000 else 10
+        slow_ms = best_of(pydantic_path, rows, repeat)
+        fast_ms = best_of(fast_path, rows, repeat)
+        body = fast_path(rows)
+        compressed = gzip.compress(body, compresslevel=9)
+        print(
+            f"rows={n:<7} pydantic={slow_ms:8.2f}ms  fast={fast_ms:8.2f}ms  "
+            f"speedup={slow_ms / fast_ms:5.1f}x  "
+            f"gzip={len(body) / 1024:.1f}KB->{len(compressed) / 1024:.1f}KB"
+        )
@@ -0,0 +1,98 @@
+#!/usr/bin/env python3
+# 💬 Benchmark: dashboard DataFrame memory and per-rerun CPU
+# Purpose: Compare the object-dtype frame + df.copy() filtering with the compact LocalDataset
+#
+# Outputs:
+#   - Frame memory (MB) and time for one dashboard rerun (filters + all charts + one page)
+#
+# Sample Output:
+#   rows=1000000  object:  375.73MB   346.52ms/rerun | compact:  145.63MB   151.69ms/rerun
+
+import os
+import random
+import sys
+import time
+
+import pandas as pd
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+
+from cocktailverse.local_data import LocalDataset  # noqa: E402
+
+ROW_COUNTS = [10_000, 1_000_000]
+CATEGORIES = ['Cocktail', 'Ordinary Drink', 'Shot', 'Punch / Party Drink', 'Coffee / Tea', 'Beer', 'Other / Unknown']
+ALCOHOLIC = ['Alcoholic', 'Non alcoholic', 'Optional alcohol']
+GLASSES = ['Cocktail glass', 'Highball glass', 'Old-fashioned glass', 'Collins glass', 'Shot glass', 'Wine glass']
+IBA = [None, None, None, 'Contemporary Classics', 'Unforgettables', 'New Era Drinks']
+INGREDIENTS = [f"{m} {i}" for m in ['1 oz', '2 oz', '1/2 oz', 'Dash', ''] for i in
+               ['Gin', 'Vodka', 'Tequila', 'White rum', 'Lime juice', 'Sugar syrup', 'Mint', 'Soda water',
+                'Triple sec', 'Angostura bitters', 'Orange peel', 'Salt', 'Ice', 'Lemon', 'Cranberry juice']]
+
+def make_frame(n: int) -> pd.DataFrame:
+    """Object-dtype frame shaped like to_dataframe() output"""
+    rng = random.Random(42)
+    return pd.DataFrame({
+        'cocktail_id': [str(10000 + i) for i in range(n)],
+        'name': [f"Cocktail {i}" for i in range(n)],
+        'category': [rng.choice(CATEGORIES) for _ in range(n)],
+        'alcoholic': [rng.choice(ALCOHOLIC) for _ in range(n)],
+        'glass': [rng.choice(GLASSES) for _ in range(n)],
+        'iba': [rng.choice(IBA) for _ in range(n)],
+        'ingredients': [rng.sample(INGREDIENTS, rng.randint(2, 6)) for _ in range(n)],
+        'image_url': [f"https://www.thecocktaildb.com/images/media/drink/{i}.jpg" for i in range(n)],
+        'source': 'TheCocktailDB',
+        'processed_at': pd.Timestamp('2025-01-01', tz='UTC') + pd.to_timedelta(range(n), unit='s'),
+    })
+
+def frame_mb(df: pd.DataFrame) -> float:
+    """Deep memory, counting the Python list objects of list columns"""
+    total = df.memory_usage(deep=True).sum()
+    if 'ingredients' in df.columns:
+        total += sum(sys.getsizeof(v) for v in df['ingredients'])
+    return total / 1024 / 1024
+
+def object_rerun(df: pd.DataFrame, categories, alcoholic):
+    """What each rerun did before: copy, filter, aggregate in pandas, list loop"""
+    filtered_df = df.copy()
+    if categories:
+        filtered_df = filtered_df[filtered_df['category'].isin(categories)]
+    if alcoholic:
+        filtered_df = filtered_df[filtered_df['alcoholic'].isin(alcoholic)]
+    filtered_df['category'].value_counts().head(10)
+    filtered_df['alcoholic'].value_counts()
+    all_ingredients = []
+    for ingredients_list in filtered_df['ingredients'].dropna():
+        all_ingredients.extend(ingredients_list)
+    pd.DataFrame({'ingredient': all_ingredients})['ingredient'].value_counts().head(15)
+    filtered_df.groupby('category').agg({'cocktail_id': 'count', 'name': 'nunique'})
+    filtered_df['glass'].value_counts().head(10)
+    filtered_df[filtered_df['iba'].notna()][['name', 'category', 'iba']].drop_duplicates()
+    filtered_df.head(25)
+
+def compact_rerun(dataset: LocalDataset, categories, alcoholic):
+    dataset.filtered_summary(categories, alcoholic)
+    dataset.value_counts('category', categories, alcoholic, limit=10)
+    dataset.value_counts('alcoholic', categories, alcoholic)
+    dataset.ingredient_counts(categories, alcoholic, limit=15)
+    dataset.category_stats(categories, alcoholic)
+    dataset.value_counts('glass', categories, alcoholic, limit=10)
+    dataset.iba_cocktails(categories, alcoholic)
+    dataset.cocktail_page(categories, alcoholic, page=0, page_size=25)
+
+def time_ms(fn, *args, repeat: int = 3) -> float:
+    timings = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        fn(*args)
+        timings.append(time.perf_counter() - start)
+    return min(timings) * 1000
+
+if __name__ == "__main__":
+    filters = (['Cocktail', 'Ordinary Drink'], ['Alcoholic'])
+    for n in ROW_COUNTS:
+        df = make_frame(n)
+        dataset = LocalDataset(df)
+        print(
+            f"rows={n:<8} object: {frame_mb(df):7.2f}MB {time_ms(object_rerun, df, *filters):8.2f}ms/rerun | "
+            f"compact: {dataset.nbytes / 1024 / 1024:7.2f}MB {time_ms(compact_rerun, dataset, *filters):8.2f}ms/rerun"
+        )
@@ -0,0 +1,119 @@
+#!/usr/bin/env python3
+# 💬 Benchmark: Cloud Function cold start
+# Purpose: Import-to-first-response time of the fetch and transform handlers in a fresh
+#          interpreter, for the current gcf/ tree vs a baseline git revision
+#
+# Usage:
+#   python benchmarks/bench_gcf_cold_start.py [--baseline REV] [--fake-credentials]
+#
+#   Each run imports the handler module and serves one request that returns early
+#   (fetch: limit=0, transform: event without an object name), so the time is
+#   import + client setup + request handling, with no API or GCS traffic.
+#   --fake-credentials points GOOGLE_APPLICATION_CREDENTIALS at a throwaway service
+#   account key so client construction works offline (no metadata server / ADC needed).
+#
+# Sample Output:
+#   fetch_cocktails   baseline:    603.2ms (import   601.7ms) | current:    282.5ms (import   280.9ms)
+#   transform         baseline:   1098.5ms (import  1098.3ms) | current:     29.1ms (import    29.0ms)
+
+import argparse
+import io
+import json
+import os
+import statistics
+import subprocess
+import sys
+import tarfile
+import tempfile
+
+REPO_ROOT = os.path.abspath(os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+REPEAT = 5
+
+# Runs inside the fresh interpreter (cwd = a gcf/ directory); prints timings as JSON
+HANDLERS = {
+    'fetch_cocktails': '''
+import time
+t0 = time.perf_counter()
+import fetch_cocktails
+t1 = time.perf_counter()
+class Request:
+    method = 'GET'
+    args = {'fetch_type': 'random', 'limit': '0'}
+    def get_json(self, silent=True):
+        return None
+fetch_cocktails.main(Request())
+''',
+    'transform': '''
+import time
+t0 = time.perf_counter()
+import transform
+t1 = time.perf_counter()
+class Event:
+    data = {'bucket': 'bench', 'name': ''}
+transform.main(Event())
+''',
+}
+REPORT = '''
+t2 = time.perf_counter()
+import json
+print("BENCH" + json.dumps({"import_ms": (t1 - t0) * 1000, "total_ms": (t2 - t0) * 1000}))
+'''
+
+def fake_credentials(directory: str) -> str:
+    """Throwaway service account key (never valid for any API call)"""
+    from cryptography.hazmat.primitives import serialization
+    from cryptography.hazmat.primitives.asymmetric import rsa
+    key = rsa.generate_private_key(public_exponent=65537, key_size=2048)
+    pem = key.private_bytes(serialization.Encoding.PEM, serialization.PrivateFormat.PKCS8,
+                            serialization.NoEncryption()).decode('ascii')
+    path = os.path.join(directory, 'fake-sa.json')
+    with open(path, 'w') as f:
+        json.dump({
+            'type': 'service_account', 'project_id': 'bench-project', 'private_key_id': 'bench',
+            'private_key': pem, 'client_email': 'bench@bench-project.iam.gserviceaccount.com',
+            'client_id': '0', 'token_uri': 'https://oauth2.googleapis.com/token',
+        }, f)
+    return path
+
+def checkout_gcf(rev: str, directory: str) -> str:
+    """Extract gcf/ at a git revision"""
+    archive = subprocess.run(['git', 'archive', rev, 'gcf'], cwd=REPO_ROOT, check=True, capture_output=True).stdout
+    with tarfile.open(fileobj=io.BytesIO(archive)) as tar:
+        tar.extractall(directory)
+    return os.path.join(directory, 'gcf')
+
+def run_once(gcf_dir: str, handler: str, env: dict) -> dict:
+    result = subprocess.run([sys.executable, '-c', HANDLERS[handler] + REPORT], cwd=gcf_dir, env=env,
+                            capture_output=True, text=True)
+    for line in result.stdout.splitlines():
+        if line.startswith('BENCH'):
+            return json.loads(line[len('BENCH'):])
+    error = (result.stderr.strip().splitlines() or ['unknown error'])[-1]
+    raise RuntimeError(error)
+
+def measure(gcf_dir: str, handler: str, env: dict) -> str:
+    try:
+        runs = [run_once(gcf_dir, handler, env) for _ in range(REPEAT)]
+    except RuntimeError as e:
+        return f"failed ({str(e)[:60]})"
+    total = statistics.median(r['total_ms'] for r in runs)
+    imported = statistics.median(r['import_ms'] for r in runs)
+    return f"{total:8.1f}ms (import {imported:7.1f}ms)"
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description='Cloud Function cold-start benchmark')
+    parser.add_argument('--baseline', default=None, help='git revision to compare against (e.g. HEAD~1)')
+    parser.add_argument('--fake-credentials', action='store_true', help='use a throwaway service account key')
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        env = dict(os.environ, TELEMETRY_LOG='0', BUCKET_NAME='', WARM_UP_ON_IMPORT='0')
+        if args.fake_credentials:
+            env.update(GOOGLE_APPLICATION_CREDENTIALS=fake_credentials(tmp), GOOGLE_CLOUD_PROJECT='bench-project')
+        baseline_dir = checkout_gcf(args.baseline, tmp) if args.baseline else None
+        for handler in HANDLERS:
+            line = f"{handler:<17}"
+            if baseline_dir:
+                line += f" baseline: {measure(baseline_dir, handler, env)} |"
+            line += f" current: {measure(os.path.join(REPO_ROOT, 'gcf'), handler, env)}"
+            print(line)
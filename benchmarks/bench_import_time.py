@@ -0,0 +1,119 @@
+#!/usr/bin/env python3
+# 💬 Benchmark: entry-point startup time
+# Purpose: Time to first paint of the two Streamlit entry points and time to first response
+#          of the API harness, each in a fresh interpreter, for the current tree vs a
+#          baseline git revision
+#
+# Usage:
+#   python benchmarks/bench_import_time.py [--baseline REV] [--fake-credentials]
+#
+#   Dashboards run under streamlit.testing.v1.AppTest; the run stops at the page title,
+#   so the time is everything the script does before the user sees the header (imports,
+#   client setup) and no query is issued. The API is imported and serves GET /health
+#   through the FastAPI TestClient. PROJECT_ID is set, so a revision that builds its
+#   BigQuery client at import pays for it; --fake-credentials points
+#   GOOGLE_APPLICATION_CREDENTIALS at a throwaway service account key so that works
+#   offline (no metadata server / ADC needed).
+#
+# Sample Output:
+#   streamlit_app.py   baseline:   1291.9ms | current:    326.7ms
+#   dashboard/app.py   baseline:   1232.7ms | current:    433.8ms
+#   api/test_harness   baseline:   1441.3ms | current:    600.8ms
+
+import argparse
+import io
+import json
+import os
+import statistics
+import subprocess
+import sys
+import tarfile
+import tempfile
+
+from bench_gcf_cold_start import fake_credentials
+
+REPO_ROOT = os.path.abspath(os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+REPEAT = 5
+
+# Runs inside the fresh interpreter (cwd = a checkout); prints the time as JSON.
+# Streamlit itself is imported before the clock starts: `streamlit run` pays for it
+# before any entry point code runs, whatever the revision.
+FIRST_PAINT = '''
+import time
+import streamlit as st
+from streamlit.testing.v1 import AppTest
+painted = []
+def title(*args, **kwargs):
+    painted.append(time.perf_counter())
+    st.stop()
+st.title = title
+t0 = time.perf_counter()
+AppTest.from_file({script!r}, default_timeout=120).run()
+if not painted:
+    raise SystemExit("the page title was never drawn")
+ms = (painted[0] - t0) * 1000
+'''
+FIRST_RESPONSE = '''
+import sys
+import time
+t0 = time.perf_counter()
+sys.path.insert(0, 'api')
+import test_harness
+from fastapi.testclient import TestClient
+with TestClient(test_harness.app) as client:
+    assert client.get('/health').status_code == 200
+ms = (time.perf_counter() - t0) * 1000
+'''
+REPORT = '''
+import json
+print("BENCH" + json.dumps({"ms": ms}))
+'''
+
+ENTRY_POINTS = {
+    'streamlit_app.py': FIRST_PAINT.format(script='streamlit_app.py'),
+    'dashboard/app.py': FIRST_PAINT.format(script='dashboard/app.py'),
+    'api/test_harness': FIRST_RESPONSE,
+}
+
+def checkout(rev: str, directory: str) -> str:
+    """Extract the whole tree at a git revision"""
+    archive = subprocess.run(['git', 'archive', rev], cwd=REPO_ROOT, check=True, capture_output=True).stdout
+    with tarfile.open(fileobj=io.BytesIO(archive)) as tar:
+        tar.extractall(directory)
+    return directory
+
+def run_once(tree: str, entry_point: str, env: dict) -> float:
+    result = subprocess.run([sys.executable, '-c', ENTRY_POINTS[entry_point] + REPORT], cwd=tree, env=env,
+                            capture_output=True, text=True)
+    for line in result.stdout.splitlines():
+        if line.startswith('BENCH'):
+            return json.loads(line[len('BENCH'):])['ms']
+    error = (result.stderr.strip().splitlines() or ['unknown error'])[-1]
+    raise RuntimeError(error)
+
+def measure(tree: str, entry_point: str, env: dict) -> str:
+    try:
+        return f"{statistics.median(run_once(tree, entry_point, env) for _ in range(REPEAT)):8.1f}ms"
+    except RuntimeError as e:
+        return f"failed ({str(e)[:60]})"
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description='Entry-point startup benchmark')
+    parser.add_argument('--baseline', default=None, help='git revision to compare against (e.g. HEAD~1)')
+    parser.add_argument('--fake-credentials', action='store_true', help='use a throwaway service account key')
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        snapshots = os.path.join(tmp, 'snapshots')
+        os.mkdir(snapshots)
+        env = dict(os.environ, PROJECT_ID=os.getenv('PROJECT_ID', 'bench-project'), TELEMETRY_LOG='0',
+                   DASHBOARD_SNAPSHOT_DIR=snapshots, PYTHONPATH='.')
+        if args.fake_credentials:
+            env.update(GOOGLE_APPLICATION_CREDENTIALS=fake_credentials(tmp), GOOGLE_CLOUD_PROJECT='bench-project')
+        baseline_tree = checkout(args.baseline, os.path.join(tmp, 'baseline')) if args.baseline else None
+        for entry_point in ENTRY_POINTS:
+            line = f"{entry_point:<18}"
+            if baseline_tree:
+                line += f" baseline: {measure(baseline_tree, entry_point, env)} |"
+            line += f" current: {measure(REPO_ROOT, entry_point, env)}"
+            print(line)
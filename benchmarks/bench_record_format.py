@@ -0,0 +1,121 @@
+#!/usr/bin/env python3
+# 💬 Benchmark: pipeline record type and raw format
+# Purpose: Compare the plain-dict path (JSON raw object -> dict per record) with the
+#          CocktailRecord path (msgpack raw object -> __slots__ record per record)
+#
+# Outputs:
+#   - Memory per transformed record (tracemalloc) and raw object size
+#   - Transform throughput: decode raw object + validate/normalize + content hash
+#
+# Sample Output:
+#   records=100000  memory/record: dict=1772B record=1072B (-40%)  raw: json=63.6MB msgpack=34.9MB
+#                   decode+transform: dict+json=    24k rec/s  record+msgpack=    26k rec/s (1.12x)
+
+import gc
+import os
+import sys
+import time
+import tracemalloc
+from datetime import datetime
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'gcf'))
+
+import fingerprint  # noqa: E402
+import records  # noqa: E402
+import transform  # noqa: E402
+
+RECORD_COUNTS = [10_000, 100_000]
+CATEGORIES = ['Ordinary Drink', 'Cocktail', 'Shot', 'Punch / Party Drink', 'Coffee / Tea']
+GLASSES = ['Cocktail glass', 'Highball glass', 'Old-fashioned glass', 'Collins glass']
+
+def make_drinks(n: int):
+    """TheCocktailDB-shaped drinks with repeated category/glass values"""
+    return [
+        {
+            'idDrink': str(11000 + i),
+            'strDrink': f'Cocktail {i}',
+            'strCategory': CATEGORIES[i % len(CATEGORIES)],
+            'strAlcoholic': 'Alcoholic' if i % 7 else 'Non alcoholic',
+            'strGlass': GLASSES[i % len(GLASSES)],
+            'strInstructions': 'Shake the ingredients with ice, then strain into the glass.',
+            'strIngredient1': 'Tequila', 'strMeasure1': '1 1/2 oz',
+            'strIngredient2': 'Triple sec', 'strMeasure2': '1/2 oz',
+            'strIngredient3': 'Lime juice', 'strMeasure3': '1 oz',
+            'strIngredient4': 'Salt',
+            'strDrinkThumb': f'https://www.thecocktaildb.com/images/media/drink/{i}.jpg',
+            'strTags': 'IBA,ContemporaryClassic',
+            'strIBA': 'Contemporary Classics' if i % 3 == 0 else None,
+            'strVideo': None,
+        }
+        for i in range(n)
+    ]
+
+def dict_transform(raw_data):
+    """The previous transform: one dict per record"""
+    processed_at = datetime.utcnow().isoformat()
+    transformed = []
+    for cocktail in raw_data:
+        row = {
+            'cocktail_id': transform.validate_field(cocktail.get('cocktail_id'), required=True),
+            'name': transform.validate_field(cocktail.get('name'), required=True),
+            'category': transform.validate_field(cocktail.get('category')),
+            'alcoholic': transform.validate_field(cocktail.get('alcoholic')),
+            'glass': transform.validate_field(cocktail.get('glass')),
+            'instructions': transform.validate_field(cocktail.get('instructions')),
+            'ingredients': transform.normalize_ingredients(cocktail.get('ingredients', [])),
+            'image_url': transform.validate_field(cocktail.get('image_url')),
+            'tags': transform.normalize_tags(cocktail.get('tags', [])),
+            'iba': transform.validate_field(cocktail.get('iba')),
+            'video_url': transform.validate_field(cocktail.get('video_url')),
+            'source': transform.validate_field(cocktail.get('source'), required=True),
+            'fetched_at': transform.normalize_timestamp(cocktail.get('fetched_at')),
+            'processed_at': processed_at,
+        }
+        row['content_hash'] = fingerprint.content_hash(row)
+        transformed.append(row)
+    return transformed
+
+def dict_path(raw: bytes):
+    return dict_transform(records.decode_raw(raw, 'raw.json'))
+
+def record_path(raw: bytes):
+    return transform.transform_cocktail_records(records.decode_raw(raw, 'raw.msgpack'))
+
+def bytes_per_record(path, raw: bytes, n: int) -> float:
+    """Memory retained by the transformed batch (raw input freed first)"""
+    gc.collect()
+    tracemalloc.start()
+    result = path(raw)
+    gc.collect()
+    current, _ = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    del result
+    return current / n
+
+def records_per_second(path, raw: bytes, n: int, repeat: int = 3) -> float:
+    best = float('inf')
+    for _ in range(repeat):
+        start = time.perf_counter()
+        path(raw)
+        best = min(best, time.perf_counter() - start)
+    return n / best
+
+if __name__ == "__main__":
+    if not records.MSGPACK_AVAILABLE:
+        sys.exit("msgpack is not installed (pip install msgpack)")
+    for n in RECORD_COUNTS:
+        batch = [records.CocktailRecord.from_api(drink) for drink in make_drinks(n)]
+        json_raw = b''.join(records.iter_encoded(batch, 'json'))
+        msgpack_raw = b''.join(records.iter_encoded(batch, 'msgpack'))
+        del batch
+
+        dict_mem = bytes_per_record(dict_path, json_raw, n)
+        record_mem = bytes_per_record(record_path, msgpack_raw, n)
+        print(f"records={n:<7} memory/record: dict={dict_mem:.0f}B record={record_mem:.0f}B "
+              f"({(record_mem / dict_mem - 1) * 100:+.0f}%)  raw: json={len(json_raw) / 1e6:.1f}MB "
+              f"msgpack={len(msgpack_raw) / 1e6:.1f}MB")
+
+        dict_rate = records_per_second(dict_path, json_raw, n)
+        record_rate = records_per_second(record_path, msgpack_raw, n)
+        print(f"{'':15} decode+transform: dict+json={dict_rate / 1000:6.0f}k rec/s  "
+              f"record+msgpack={record_rate / 1000:6.0f}k rec/s ({record_rate / dict_rate:.2f}x)")
@@ -0,0 +1,7 @@
+"""
+🍹 Cocktailverse shared data access
+Connection setup, query building, caching and result conversion for the API and dashboards.
+
+Submodules import their heavy dependencies (google-cloud-bigquery, pyarrow)
+on first use, so importing this package is cheap for every entry point.
+"""
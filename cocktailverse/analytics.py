@@ -0,0 +1,261 @@
+"""
+🍹 Analytics runner
+Runs the named queries in bq/bq_queries.sql and writes each result as a JSON
+and CSV snapshot that the API and dashboards serve as files.
+
+- Each statement is named after the comment line above it
+  ("-- Cocktails by category" -> cocktails_by_category).
+- Queries run concurrently, against BigQuery (cost-accounted through
+  costs.run_query, reader label analytics_<name>) or against the local
+  warehouse stand-in: DuckDB over exported JSON/Arrow/Parquet files.
+- A result is cached under a key of (SQL, parameters, table last-modified
+  time). A rerun with no new data reads the table metadata and nothing else.
+- @name references in a query are bound as query parameters from --param
+  values. Table names can't be parameters, so the {PROJECT_ID}.{DATASET_ID}.{TABLE_ID}
+  placeholder is filled from the configured table.
+
+Usage:
+    python -m cocktailverse.analytics                      # BigQuery (PROJECT_ID/DATASET_ID/TABLE_ID)
+    python -m cocktailverse.analytics --local data/raw/sample_data.json
+"""
+
+import argparse
+import csv
+import hashlib
+import io
+import json
+import os
+import re
+import tempfile
+import time
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, timezone
+from pathlib import Path
+from typing import Any, Dict, List, Optional, Sequence, Tuple
+
+REPO_ROOT = Path(__file__).resolve().parent.parent
+QUERIES_PATH = REPO_ROOT / 'bq' / 'bq_queries.sql'
+ANALYTICS_DIR = Path(os.getenv('ANALYTICS_DIR', REPO_ROOT / 'data' / 'clean' / 'analytics'))
+ANALYTICS_CONCURRENCY = int(os.getenv('ANALYTICS_CONCURRENCY', '4'))
+TABLE_PLACEHOLDER = '`{PROJECT_ID}.{DATASET_ID}.{TABLE_ID}`'
+INDEX_NAME = 'index'
+
+def parse_queries(path: Path = QUERIES_PATH) -> Dict[str, dict]:
+    """name -> {'title', 'sql'} for every statement in the file, in file order"""
+    named = {}
+    for statement in Path(path).read_text().split(';'):
+        lines = statement.strip().splitlines()
+        comments = [line.strip()[2:].strip() for line in lines if line.strip().startswith('--')]
+        sql = '\n'.join(line for line in lines if not line.strip().startswith('--')).strip()
+        if not sql:
+            continue
+        title = comments[-1] if comments else f"query {len(named) + 1}"
+        name = re.sub(r'[^a-z0-9]+', '_', title.lower()).strip('_')
+        named[name] = {'title': title, 'sql': sql}
+    return named
+
+def query_parameters(sql: str, params: Dict[str, Any]) -> Dict[str, Any]:
+    """The subset of params a query references as @name (raises if one is missing)"""
+    names = dict.fromkeys(re.findall(r'@(\w+)', sql))
+    missing = [name for name in names if name not in params]
+    if missing:
+        raise ValueError(f"Missing query parameter(s): {', '.join(missing)}")
+    return {name: params[name] for name in names}
+
+class BigQueryWarehouse:
+    """The configured BigQuery table"""
+
+    def __init__(self, client, project_id: str, dataset_id: str, table_id: str):
+        self.client = client
+        self.table_id = f"{project_id}.{dataset_id}.{table_id}"
+
+    def render(self, sql: str) -> str:
+        return sql.replace(TABLE_PLACEHOLDER, f"`{self.table_id}`")
+
+    def modified(self) -> str:
+        """Table last-modified time from metadata (no query, no bytes billed)"""
+        return self.client.get_table(self.table_id).modified.isoformat()
+
+    def run(self, name: str, sql: str, params: Dict[str, Any]) -> Tuple[List[str], List[list]]:
+        from google.cloud import bigquery
+
+        from . import costs
+
+        types = {bool: 'BOOL', int: 'INT64', float: 'FLOAT64'}
+        bq_params = [bigquery.ScalarQueryParameter(key, types.get(type(value), 'STRING'), value)
+                     for key, value in params.items()]
+        result = costs.run_query(self.client, sql, bq_params, label=f"analytics_{name}").result()
+        return [field.name for field in result.schema], [list(row.values()) for row in result]
+
+class LocalWarehouse:
+    """
+    Local stand-in: DuckDB over exported rows (JSON arrays as written by the
+    pipeline, Arrow snapshots or Parquet files), loaded into one in-memory
+    table. BigQuery-only syntax in the shared queries is translated.
+    """
+
+    def __init__(self, paths: Sequence[str]):
+        import duckdb
+
+        self.paths = [Path(p) for p in paths]
+        self.connection = duckdb.connect()
+        sources = []
+        for i, path in enumerate(self.paths):
+            if path.suffix == '.arrow':
+                import pyarrow as pa
+                self.connection.register(f"arrow_{i}", pa.ipc.open_file(pa.memory_map(str(path), 'r')).read_all())
+                sources.append(f"SELECT * FROM arrow_{i}")
+            elif path.suffix == '.parquet':
+                sources.append(f"SELECT * FROM read_parquet('{path}')")
+            else:
+                sources.append(f"SELECT * FROM read_json_auto('{path}')")
+        self.connection.execute(f"CREATE TABLE cocktails AS {' UNION ALL BY NAME '.join(sources)}")
+
+    def render(self, sql: str) -> str:
+        sql = sql.replace(TABLE_PLACEHOLDER, 'cocktails').replace('`', '')
+        sql = re.sub(r'\bTIMESTAMP_SECONDS\(', 'to_timestamp(', sql, flags=re.IGNORECASE)
+        sql = re.sub(r'\bUNIX_SECONDS\(', 'epoch(', sql, flags=re.IGNORECASE)
+        # BigQuery: UNNEST(xs) AS x names the element; DuckDB names the table, so alias the column too
+        sql = re.sub(r'UNNEST\((\w+)\)\s+AS\s+(\w+)', r'UNNEST(\1) AS _\2(\2)', sql, flags=re.IGNORECASE)
+        return re.sub(r'@(\w+)', r'$\1', sql)
+
+    def modified(self) -> str:
+        stats = [path.stat() for path in self.paths]
+        return f"{max(s.st_mtime_ns for s in stats)}:{sum(s.st_size for s in stats)}"
+
+    def run(self, name: str, sql: str, params: Dict[str, Any]) -> Tuple[List[str], List[list]]:
+        cursor = self.connection.cursor()  # one cursor per worker thread
+        try:
+            result = cursor.execute(sql, params or None)
+            return [column[0] for column in result.description], [list(row) for row in result.fetchall()]
+        finally:
+            cursor.close()
+
+def cache_key(sql: str, params: Dict[str, Any], modified: str) -> str:
+    payload = json.dumps([sql, params, modified], sort_keys=True, default=str)
+    return hashlib.sha256(payload.encode('utf-8')).hexdigest()[:16]
+
+def _write_atomic(path: Path, data: str) -> None:
+    """Readers see the previous or the new file, never a partial one"""
+    fd, tmp_path = tempfile.mkstemp(dir=path.parent, suffix='.part')
+    try:
+        with os.fdopen(fd, 'w', newline='') as f:
+            f.write(data)
+        os.replace(tmp_path, path)
+    except Exception:
+        if os.path.exists(tmp_path):
+            os.unlink(tmp_path)
+        raise
+
+def _csv_value(value):
+    return json.dumps(list(value), default=str) if isinstance(value, (list, tuple)) else value
+
+def write_result(out_dir: Path, name: str, result: dict) -> None:
+    """<name>.json (columns, rows and cache metadata) and <name>.csv"""
+    _write_atomic(out_dir / f"{name}.json", json.dumps(result, default=str))
+    buffer = io.StringIO()
+    writer = csv.writer(buffer)
+    writer.writerow(result['columns'])
+    writer.writerows([_csv_value(value) for value in row] for row in result['rows'])
+    _write_atomic(out_dir / f"{name}.csv", buffer.getvalue())
+
+def load_result(name: str, out_dir: Path = ANALYTICS_DIR) -> Optional[dict]:
+    """A written snapshot, or None if there is none (or it is unreadable)"""
+    try:
+        return json.loads((Path(out_dir) / f"{name}.json").read_text())
+    except (OSError, ValueError):
+        return None
+
+def run_analytics(warehouse, queries: Dict[str, dict], out_dir: Path = ANALYTICS_DIR,
+                  params: Dict[str, Any] = None, force: bool = False,
+                  concurrency: int = ANALYTICS_CONCURRENCY) -> List[dict]:
+    """
+    Run every query whose cached snapshot is stale (concurrently) and write
+    the results plus an index.json; returns one status entry per query.
+    """
+    out_dir = Path(out_dir)
+    out_dir.mkdir(parents=True, exist_ok=True)
+    modified = warehouse.modified()
+    params = params or {}
+
+    def run_one(name: str, query: dict) -> dict:
+        status = {'name': name, 'title': query['title']}
+        start = time.perf_counter()
+        try:
+            sql = warehouse.render(query['sql'])
+            bound = query_parameters(query['sql'], params)
+            key = cache_key(sql, bound, modified)
+            cached = None if force else load_result(name, out_dir)
+            if cached and cached.get('cache_key') == key:
+                status.update(cached=True, rows=len(cached['rows']))
+            else:
+                columns, rows = warehouse.run(name, sql, bound)
+                write_result(out_dir, name, {
+                    'name': name, 'title': query['title'], 'columns': columns, 'rows': rows,
+                    'cache_key': key, 'table_modified': modified, 'params': bound,
+                    'generated_at': datetime.now(timezone.utc).isoformat(),
+                })
+                status.update(cached=False, rows=len(rows))
+        except Exception as e:
+            status['error'] = str(e)
+        status['seconds'] = round(time.perf_counter() - start, 3)
+        return status
+
+    with ThreadPoolExecutor(max_workers=max(1, min(concurrency, len(queries)))) as pool:
+        statuses = list(pool.map(lambda item: run_one(*item), queries.items()))
+
+    # Merge into the existing index so a partial run (--only) keeps the other entries
+    previous = load_result(INDEX_NAME, out_dir) or {}
+    entries = {entry['name']: entry for entry in previous.get('queries', [])}
+    entries.update((status['name'], status) for status in statuses)
+    index = {
+        'table_modified': modified,
+        'generated_at': datetime.now(timezone.utc).isoformat(),
+        'queries': list(entries.values()),
+    }
+    _write_atomic(out_dir / f"{INDEX_NAME}.json", json.dumps(index))
+    return statuses
+
+def _parse_param(text: str) -> Tuple[str, Any]:
+    """key=value, with integer/float values typed as such"""
+    key, _, value = text.partition('=')
+    for cast in (int, float):
+        try:
+            return key, cast(value)
+        except ValueError:
+            continue
+    return key, value
+
+def main(argv: Sequence[str] = None) -> int:
+    parser = argparse.ArgumentParser(description='Run bq/bq_queries.sql and write JSON/CSV snapshots')
+    parser.add_argument('--local', nargs='+', metavar='PATH', help='query exported files with DuckDB instead of BigQuery')
+    parser.add_argument('--queries', default=str(QUERIES_PATH), help='SQL file of named queries')
+    parser.add_argument('--out', default=str(ANALYTICS_DIR), help='snapshot directory')
+    parser.add_argument('--only', nargs='+', metavar='NAME', help='run only these queries')
+    parser.add_argument('--param', action='append', default=[], metavar='KEY=VALUE', help='query parameter')
+    parser.add_argument('--force', action='store_true', help='ignore cached results')
+    parser.add_argument('--concurrency', type=int, default=ANALYTICS_CONCURRENCY)
+    args = parser.parse_args(argv)
+
+    queries = parse_queries(args.queries)
+    if args.only:
+        queries = {name: query for name, query in queries.items() if name in args.only}
+
+    if args.local:
+        warehouse = LocalWarehouse(args.local)
+    else:
+        from . import config, connection
+        settings = config.load_settings()
+        client = connection.create_bigquery_client(settings['project_id'])
+        warehouse = BigQueryWarehouse(client, settings['project_id'], settings['dataset_id'], settings['table_id'])
+
+    statuses = run_analytics(warehouse, queries, Path(args.out), dict(map(_parse_param, args.param)),
+                             args.force, args.concurrency)
+    for status in statuses:
+        state = f"error: {status['error']}" if 'error' in status else (
+            f"{status['rows']} rows" + (' (cached)' if status['cached'] else ''))
+        print(f"{status['name']:<45} {status['seconds']:7.3f}s  {state}")
+    return 1 if any('error' in status for status in statuses) else 0
+
+if __name__ == "__main__":
+    raise SystemExit(main())
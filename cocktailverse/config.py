@@ -0,0 +1,25 @@
+"""
+🍹 Table configuration
+PROJECT_ID / DATASET_ID / TABLE_ID (and PAIRS_TABLE_ID) from the environment, shared by every entry point.
+"""
+
+import os
+
+DEFAULT_DATASET_ID = 'cocktailverse'
+DEFAULT_TABLE_ID = 'cocktails'
+DEFAULT_PAIRS_TABLE_ID = 'ingredient_pairs'
+
+def load_settings(default_project_id: str = '') -> dict:
+    """Table settings; entry points pass their own default project"""
+    project_id = os.getenv('PROJECT_ID', default_project_id)
+    dataset_id = os.getenv('DATASET_ID', DEFAULT_DATASET_ID)
+    table_id = os.getenv('TABLE_ID', DEFAULT_TABLE_ID)
+    pairs_table_id = os.getenv('PAIRS_TABLE_ID', DEFAULT_PAIRS_TABLE_ID)
+    return {
+        'project_id': project_id,
+        'dataset_id': dataset_id,
+        'table_id': table_id,
+        'table': f"`{project_id}.{dataset_id}.{table_id}`",
+        'pairs_table': f"`{project_id}.{dataset_id}.{pairs_table_id}`",
+        'pair_totals_table': f"`{project_id}.{dataset_id}.{pairs_table_id}_totals`",
+    }
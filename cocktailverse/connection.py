@@ -0,0 +1,49 @@
+"""
+🍹 BigQuery connection setup
+Client construction with Streamlit-secrets or default credentials.
+
+google-cloud-bigquery is imported inside the functions, so nothing heavy is
+loaded until the first client is actually created.
+"""
+
+import json
+from typing import Optional
+
+def service_account_info_from_streamlit() -> Optional[dict]:
+    """
+    Service account JSON from Streamlit secrets ([gcp] service_account_key),
+    or None to use default credentials (Cloud Run / local dev).
+    """
+    try:
+        import streamlit as st
+        # Check if secrets are available (avoid "No secrets files found" warning)
+        if hasattr(st, 'secrets') and st.secrets is not None:
+            gcp_secrets = st.secrets.get('gcp', {})
+            if gcp_secrets and 'service_account_key' in gcp_secrets:
+                return json.loads(gcp_secrets['service_account_key'])
+    except Exception:
+        # Secrets not configured, use default credentials
+        pass
+    return None
+
+def create_bigquery_client(project_id: str, service_account_info: Optional[dict] = None):
+    """Create a BigQuery client (raises if credentials cannot be resolved)"""
+    from google.cloud import bigquery
+
+    if service_account_info:
+        from google.oauth2 import service_account
+        credentials = service_account.Credentials.from_service_account_info(service_account_info)
+        return bigquery.Client(project=project_id, credentials=credentials)
+    return bigquery.Client(project=project_id)
+
+def create_bqstorage_client():
+    """
+    BigQuery Storage Read API client, or None when google-cloud-bigquery-storage
+    is not installed (result downloads then fall back to the REST API).
+    """
+    try:
+        from google.cloud import bigquery_storage
+        return bigquery_storage.BigQueryReadClient()
+    except Exception as e:
+        print(f"⚠️ BigQuery Storage Read API unavailable, using REST: {e}")
+        return None
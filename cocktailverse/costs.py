@@ -0,0 +1,131 @@
+"""
+🍹 Query cost accounting
+Every BigQuery job goes through run_query, which records bytes processed/billed,
+cache hits and slot time per reader label, and enforces byte budgets.
+
+Budgets are off by default. With BQ_MAX_BYTES_PER_QUERY or BQ_DAILY_BYTE_BUDGET
+set, each query is dry-run first (free) to estimate its bytes:
+- within budget: the query runs, capped by maximum_bytes_billed so BigQuery
+  itself fails the job rather than bill past the per-query limit;
+- over budget: queries that can be approximated (chart aggregates) are re-run
+  on a TABLESAMPLE sized to fit, everything else raises BudgetExceeded.
+
+The daily budget is counted per process (UTC day); use it as a guard rail,
+not as billing. Jobs are also tagged with a BigQuery label (reader=<label>)
+so INFORMATION_SCHEMA.JOBS can be grouped by reader.
+"""
+
+import os
+import re
+import threading
+from datetime import datetime, timezone
+from typing import Callable, List, Optional, Tuple
+
+MAX_BYTES_PER_QUERY = int(os.getenv('BQ_MAX_BYTES_PER_QUERY', '0'))
+DAILY_BYTE_BUDGET = int(os.getenv('BQ_DAILY_BYTE_BUDGET', '0'))
+# Smallest sample worth running instead of rejecting
+MIN_SAMPLE_PERCENT = 1
+
+class BudgetExceeded(Exception):
+    """A query's estimated bytes exceed the per-query or remaining daily budget"""
+
+_lock = threading.Lock()
+_readers = {}
+_daily = {'day': None, 'bytes': 0}
+
+def _today() -> str:
+    return datetime.now(timezone.utc).strftime('%Y-%m-%d')
+
+def _job_label(label: str) -> str:
+    """BigQuery label values: lowercase letters, digits, - and _ (max 63)"""
+    return re.sub(r'[^a-z0-9_-]', '_', label.lower())[:63] or 'unlabeled'
+
+def _job_config(params=None, label: str = '', **options):
+    from google.cloud import bigquery
+    return bigquery.QueryJobConfig(query_parameters=params or [], labels={'reader': _job_label(label)}, **options)
+
+def budgets_enabled() -> bool:
+    return bool(MAX_BYTES_PER_QUERY or DAILY_BYTE_BUDGET)
+
+def estimate_bytes(client, sql: str, params=None, label: str = '') -> int:
+    """Dry-run the query (no cost) and return the bytes it would process"""
+    job = client.query(sql, job_config=_job_config(params, label, dry_run=True, use_query_cache=False))
+    return int(job.total_bytes_processed or 0)
+
+def remaining_daily_bytes() -> Optional[int]:
+    if not DAILY_BYTE_BUDGET:
+        return None
+    with _lock:
+        used = _daily['bytes'] if _daily['day'] == _today() else 0
+    return max(0, DAILY_BYTE_BUDGET - used)
+
+def byte_allowance() -> Optional[int]:
+    """Bytes the next query may process (None = unlimited)"""
+    limits = [limit for limit in (MAX_BYTES_PER_QUERY or None, remaining_daily_bytes()) if limit is not None]
+    return min(limits) if limits else None
+
+def _reader(label: str) -> dict:
+    return _readers.setdefault(label, {
+        'queries': 0, 'bytes_processed': 0, 'bytes_billed': 0, 'cache_hits': 0,
+        'slot_ms': 0, 'estimated_bytes': 0, 'sampled': 0, 'rejected': 0,
+    })
+
+def record_job(label: str, job, estimated: int = 0, sampled: bool = False) -> None:
+    billed = int(job.total_bytes_billed or 0)
+    with _lock:
+        stats = _reader(label)
+        stats['queries'] += 1
+        stats['bytes_processed'] += int(job.total_bytes_processed or 0)
+        stats['bytes_billed'] += billed
+        stats['cache_hits'] += bool(job.cache_hit)
+        stats['slot_ms'] += int(job.slot_millis or 0)
+        stats['estimated_bytes'] += estimated
+        stats['sampled'] += sampled
+        if _daily['day'] != _today():
+            _daily.update(day=_today(), bytes=0)
+        _daily['bytes'] += billed
+
+def _reject(label: str, message: str):
+    with _lock:
+        _reader(label)['rejected'] += 1
+    raise BudgetExceeded(message)
+
+def run_query(client, sql: str, params=None, label: str = '',
+              sample: Optional[Callable[[int], Tuple[str, List]]] = None):
+    """
+    Run a query under the byte budgets and record its cost; returns the
+    finished QueryJob (call .result() / .to_dataframe() on it).
+    sample(percent) -> (sql, params) builds a down-sampled variant for
+    queries whose results can be approximated.
+    """
+    estimated = 0
+    sampled = False
+    options = {}
+    allowance = byte_allowance() if budgets_enabled() else None
+    if allowance is not None:
+        estimated = estimate_bytes(client, sql, params, label)
+        if estimated > allowance:
+            percent = int(allowance * 100 // estimated) if estimated else 0
+            if sample is None or percent < MIN_SAMPLE_PERCENT:
+                _reject(label, f"Query '{label}' would process {estimated:,} bytes; budget allows {allowance:,}")
+            sql, params = sample(percent)
+            sampled = True
+        else:
+            # BigQuery bills at least 10 MB per query, so never cap below that
+            options['maximum_bytes_billed'] = max(allowance, 10 * 1024 * 1024)
+
+    job = client.query(sql, job_config=_job_config(params, label, **options))
+    job.result()
+    record_job(label, job, estimated, sampled)
+    return job
+
+def stats() -> dict:
+    """Accumulated cost per reader, most bytes billed first"""
+    with _lock:
+        readers = {label: dict(values) for label, values in _readers.items()}
+        daily = dict(_daily)
+    return {
+        'readers': dict(sorted(readers.items(), key=lambda item: item[1]['bytes_billed'], reverse=True)),
+        'today': {'day': daily['day'], 'bytes_billed': daily['bytes'], 'budget': DAILY_BYTE_BUDGET or None},
+        'max_bytes_per_query': MAX_BYTES_PER_QUERY or None,
+    }
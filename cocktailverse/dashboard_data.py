@@ -0,0 +1,370 @@
+"""
+🍹 Dashboard data layer
+Each chart runs its own small aggregate query, cached separately per filter combination.
+
+Caches are keyed by data version instead of expiring on a timer: every
+REFRESH_SECONDS a table-metadata probe (no query, no bytes billed) decides
+whether anything was loaded. If not, every chart stays cached; if so, charts
+re-query and the search corpus only fetches rows from its watermark minus
+CORPUS_LOOKBACK_SECONDS (processed_at is stamped by the loaders, so a batch
+can commit after a newer one) and merges the ones it hasn't seen.
+
+On a cold start the page renders from the memory-mapped local snapshot while
+a background thread connects to BigQuery and applies the delta; the live
+source is swapped in once it is ready.
+
+Filters are passed as sorted tuples so they hash stably for st.cache_data;
+the BigQuery client is passed as `_client` so Streamlit does not try to hash it.
+"""
+
+import os
+import threading
+import time
+from typing import TYPE_CHECKING, Callable, Optional, Sequence, Tuple
+
+import streamlit as st
+
+from cocktailverse import costs, queries, snapshot
+from cocktailverse.local_data import LocalDataset, compact_frame
+from cocktailverse.search import SearchIndex
+
+if TYPE_CHECKING:
+    import pandas as pd
+
+REFRESH_SECONDS = int(os.getenv('DASHBOARD_REFRESH_SECONDS', '300'))
+CORPUS_LOOKBACK_SECONDS = int(os.getenv('DASHBOARD_CORPUS_LOOKBACK_SECONDS', '3600'))
+# A failed background connection is retried on the next rerun after this long
+CONNECT_RETRY_SECONDS = int(os.getenv('DASHBOARD_CONNECT_RETRY_SECONDS', '30'))
+MAX_CACHE_ENTRIES = 256
+
+def filter_key(values: Sequence[str]) -> Tuple[str, ...]:
+    """Normalize a multiselect value into a hashable, order-independent cache key"""
+    return tuple(sorted(values or ()))
+
+def fetch_dataframe(client, sql: str, params=None, bqstorage: bool = False, label: str = 'dashboard',
+                    sample=None) -> 'pd.DataFrame':
+    """
+    Run a query (cost-accounted under `label`) and return a DataFrame (raises on failure).
+    Aggregates are tiny, so they skip the Storage Read API session setup.
+    """
+    job = costs.run_query(client, sql, params, label=label, sample=sample)
+    return job.to_dataframe(create_bqstorage_client=bqstorage)
+
+def run_query(client, sql: str, params=None, bqstorage: bool = False, label: str = 'dashboard',
+              sample=None) -> 'pd.DataFrame':
+    """fetch_dataframe that reports failures in the page and returns an empty frame"""
+    try:
+        return fetch_dataframe(client, sql, params, bqstorage, label, sample)
+    except Exception as e:
+        import pandas as pd
+
+        st.error(f"Query failed: {e}")
+        return pd.DataFrame()
+
+def _as_lists(df: 'pd.DataFrame', *columns: str) -> 'pd.DataFrame':
+    """REPEATED fields arrive as arrays; render code expects plain lists"""
+    for column in columns:
+        if column in df.columns:
+            df[column] = df[column].map(lambda v: list(v) if v is not None else [])
+    return df
+
+@st.cache_data(max_entries=MAX_CACHE_ENTRIES)
+def load_summary(_client, table: str, version: str) -> dict:
+    """Headline metrics and sidebar filter options"""
+    df = run_query(_client, *queries.summary_query(table), label='dashboard_summary')
+    if df.empty:
+        return {'total': 0, 'categories': 0, 'alcoholic_types': 0, 'latest_source': None,
+                'last_processed_at': None, 'category_options': [], 'alcoholic_options': []}
+    row = df.iloc[0]
+    return {
+        'total': int(row['total']),
+        'categories': int(row['categories']),
+        'alcoholic_types': int(row['alcoholic_types']),
+        'latest_source': row['latest_source'],
+        'last_processed_at': row['last_processed_at'],
+        'category_options': list(row['category_options'] if row['category_options'] is not None else []),
+        'alcoholic_options': list(row['alcoholic_options'] if row['alcoholic_options'] is not None else []),
+    }
+
+@st.cache_data(max_entries=MAX_CACHE_ENTRIES)
+def load_filtered_summary(_client, table: str, version: str, categories: tuple, alcoholic: tuple) -> dict:
+    """Filtered row count (for paging) and latest processed_at (for the footer)"""
+    df = run_query(_client, *queries.filtered_summary_query(table, categories, alcoholic),
+                   label='dashboard_filtered_summary')
+    if df.empty:
+        return {'total': 0, 'last_processed_at': None}
+    return {'total': int(df['total'].iloc[0]), 'last_processed_at': df['last_processed_at'].iloc[0]}
+
+@st.cache_data(max_entries=MAX_CACHE_ENTRIES)
+def load_value_counts(_client, table: str, version: str, column: str, categories: tuple, alcoholic: tuple,
+                      limit: int = None) -> 'pd.Series':
+    """Counts per value of category/alcoholic/glass, ready for st.bar_chart"""
+    df = run_query(_client, *queries.value_counts_query(table, column, categories, alcoholic, limit),
+                   label=f'dashboard_{column}_counts',
+                   sample=lambda percent: queries.value_counts_query(table, column, categories, alcoholic, limit,
+                                                                     sample_percent=percent))
+    if df.empty:
+        import pandas as pd
+
+        return pd.Series(dtype='int64', name='count')
+    return df.set_index(column)['count']
+
+@st.cache_data(max_entries=MAX_CACHE_ENTRIES)
+def load_ingredient_counts(_client, table: str, version: str, categories: tuple, alcoholic: tuple,
+                           limit: int = 15) -> 'pd.Series':
+    """Most common ingredients, ready for st.bar_chart"""
+    df = run_query(_client, *queries.ingredient_counts_query(table, categories, alcoholic, limit),
+                   label='dashboard_ingredient_counts',
+                   sample=lambda percent: queries.ingredient_counts_query(table, categories, alcoholic, limit,
+                                                                          sample_percent=percent))
+    if df.empty:
+        import pandas as pd
+
+        return pd.Series(dtype='int64', name='count')
+    return df.set_index('ingredient')['count']
+
+@st.cache_data(max_entries=MAX_CACHE_ENTRIES)
+def load_category_stats(_client, table: str, version: str, categories: tuple, alcoholic: tuple) -> 'pd.DataFrame':
+    df = run_query(_client, *queries.category_stats_query(table, categories, alcoholic),
+                   label='dashboard_category_stats')
+    return df.set_index('category') if not df.empty else df
+
+@st.cache_data(max_entries=MAX_CACHE_ENTRIES)
+def load_iba_cocktails(_client, table: str, version: str, categories: tuple, alcoholic: tuple) -> 'pd.DataFrame':
+    return run_query(_client, *queries.iba_cocktails_query(table, categories, alcoholic),
+                     label='dashboard_iba_cocktails')
+
+@st.cache_data(max_entries=MAX_CACHE_ENTRIES)
+def load_cocktail_page(_client, table: str, version: str, categories: tuple, alcoholic: tuple,
+                       page: int = 0, page_size: int = 50) -> 'pd.DataFrame':
+    """Only the rows and columns the cocktail list renders"""
+    df = run_query(_client, *queries.cocktail_page_query(table, categories, alcoholic, page, page_size),
+                   label='dashboard_cocktail_page')
+    return _as_lists(df, 'ingredients')
+
+@st.cache_data(ttl=REFRESH_SECONDS)
+def load_data_version(_client, table: str) -> dict:
+    """
+    The refresh probe: one table-metadata read per REFRESH_SECONDS.
+    Returns the row count and a version string for cache keys.
+    """
+    try:
+        return queries.table_version(_client, table)
+    except Exception as e:
+        st.error(f"Query failed: {e}")
+        return {'total': 0, 'modified': None, 'version': 'empty'}
+
+class LiveSource:
+    """
+    Dashboard queries pushed down to BigQuery (cached per data version), over
+    the latest row per cocktail_id - the same rows LocalDataset counts
+    """
+
+    def __init__(self, client, table: str, version: str):
+        self.client = client
+        self.table = table
+        self.version = version
+
+    def summary(self) -> dict:
+        return load_summary(self.client, self.table, self.version)
+
+    def filtered_summary(self, categories=(), alcoholic=()) -> dict:
+        return load_filtered_summary(self.client, self.table, self.version, categories, alcoholic)
+
+    def value_counts(self, column: str, categories=(), alcoholic=(), limit: int = None) -> 'pd.Series':
+        return load_value_counts(self.client, self.table, self.version, column, categories, alcoholic, limit)
+
+    def ingredient_counts(self, categories=(), alcoholic=(), limit: int = 15) -> 'pd.Series':
+        return load_ingredient_counts(self.client, self.table, self.version, categories, alcoholic, limit)
+
+    def category_stats(self, categories=(), alcoholic=()) -> 'pd.DataFrame':
+        return load_category_stats(self.client, self.table, self.version, categories, alcoholic)
+
+    def iba_cocktails(self, categories=(), alcoholic=()) -> 'pd.DataFrame':
+        return load_iba_cocktails(self.client, self.table, self.version, categories, alcoholic)
+
+    def cocktail_page(self, categories=(), alcoholic=(), page: int = 0, page_size: int = 50) -> 'pd.DataFrame':
+        return load_cocktail_page(self.client, self.table, self.version, categories, alcoholic, page, page_size)
+
+class SearchCorpus:
+    """
+    Local corpus and search index for one table.
+    On a new data version only rows from the last watermark minus the lookback
+    window are fetched; those not already indexed (new cocktail_id or newer
+    processed_at) are merged into the existing index, and the result is
+    written back as the local snapshot.
+    """
+
+    def __init__(self, table: str):
+        self.table = table
+        self.path = snapshot.snapshot_path(table)
+        self.index = SearchIndex()
+        self.watermark = None
+        self.version = None
+        self._lock = threading.Lock()
+
+    def seed(self, df: 'pd.DataFrame', version: Optional[str]) -> None:
+        """Start from snapshot rows; the next sync only fetches what is newer"""
+        with self._lock:
+            self.index.update(_as_lists(df, 'ingredients'))
+            self.watermark = df['processed_at'].max() if len(df) else None
+            self.version = version
+
+    def frame(self) -> 'pd.DataFrame':
+        """Current cocktails (latest row per cocktail_id), oldest first"""
+        live_rows = sorted(self.index.id_to_row.values())
+        return self.index.frame.iloc[live_rows]
+
+    def _unseen(self, df: 'pd.DataFrame') -> 'pd.DataFrame':
+        """Rows for cocktails not indexed yet, or newer than the indexed version"""
+        if df.empty or not self.index.id_to_row:
+            return df
+        indexed = self.index.frame.iloc[list(self.index.id_to_row.values())]
+        current = df['cocktail_id'].map(indexed.set_index('cocktail_id')['processed_at'])
+        return df[current.isna() | (df['processed_at'] > current)]
+
+    def sync(self, client, state: dict) -> SearchIndex:
+        import pandas as pd
+
+        with self._lock:
+            if state['version'] == self.version:
+                return self.index
+            # Full download uses the Storage Read API; deltas are small
+            since = None
+            if self.watermark is not None and not pd.isna(self.watermark):
+                since = self.watermark - pd.Timedelta(seconds=CORPUS_LOOKBACK_SECONDS)
+            try:
+                df = fetch_dataframe(client, *queries.corpus_query(self.table, since=since),
+                                     bqstorage=since is None, label='dashboard_search_corpus')
+            except Exception as e:
+                print(f"Corpus refresh failed: {e}")
+                return self.index
+            self.version = state['version']
+            df = self._unseen(df)
+            if df.empty:
+                # Only rows already indexed (re-read by the lookback window)
+                return self.index
+            self.index.update(_as_lists(df, 'ingredients'))
+            newest = df['processed_at'].max()
+            if since is None or newest > self.watermark:
+                self.watermark = newest
+            try:
+                # Dictionary-encoded on disk, so the next start maps straight to categoricals
+                snapshot.write_snapshot(compact_frame(self.frame()), self.path, self.version)
+            except Exception as e:
+                print(f"Could not write snapshot {self.path}: {e}")
+            return self.index
+
+class DashboardBackend:
+    """
+    Process-wide startup state for one table.
+    The snapshot is memory-mapped synchronously (milliseconds); connecting,
+    probing and the delta refresh run on a background thread.
+    """
+
+    def __init__(self, table: str):
+        self.table = table
+        self.corpus = SearchCorpus(table)
+        self.local: Optional[LocalDataset] = None
+        self.snapshot_info: Optional[dict] = None
+        self.client = None
+        self.error: Optional[str] = None
+        self.timings = {}
+        self.ready = threading.Event()
+        self._started = time.perf_counter()
+        self._connect: Optional[Callable] = None
+        self._failed_at: Optional[float] = None
+        self._retry_lock = threading.Lock()
+
+    def _timed(self, name: str, start: float) -> float:
+        now = time.perf_counter()
+        self.timings[name] = now - start
+        return now
+
+    def load_snapshot(self) -> None:
+        start = time.perf_counter()
+        loaded = snapshot.read_snapshot(self.corpus.path)
+        start = self._timed('snapshot_mmap', start)
+        if loaded is None:
+            return
+        table, self.snapshot_info = loaded
+        df = table.to_pandas()
+        start = self._timed('snapshot_to_pandas', start)
+        self.corpus.seed(df, self.snapshot_info['version'])
+        self.local = LocalDataset(df, self.snapshot_info['version'])
+        self._timed('snapshot_index', start)
+
+    def start(self, connect: Callable) -> None:
+        self._connect = connect
+        self.ready.clear()
+        threading.Thread(target=self._connect_and_refresh, args=(connect,), daemon=True,
+                         name=f"dashboard-refresh-{self.table}").start()
+
+    def _connect_and_refresh(self, connect: Callable) -> None:
+        start = time.perf_counter()
+        try:
+            client, _ = connect()
+            start = self._timed('client_init', start)
+            if client is None:
+                self.error = "Could not create a BigQuery client"
+                self._failed_at = time.monotonic()
+                return
+            state = queries.table_version(client, self.table)
+            start = self._timed('version_probe', start)
+            self.corpus.sync(client, state)
+            self._timed('delta_refresh', start)
+            self.client = client
+            self.error = None
+        except Exception as e:
+            self.error = str(e)
+            self._failed_at = time.monotonic()
+            print(f"Dashboard refresh failed: {e}")
+        finally:
+            self.timings['live_ready'] = time.perf_counter() - self._started
+            self.ready.set()
+
+    def retry_if_failed(self) -> bool:
+        """
+        Restart the background connection if it failed at least
+        CONNECT_RETRY_SECONDS ago (the backend itself is cached for the life of
+        the process, so a failure must not be); returns whether it restarted.
+        """
+        if self.client is not None or self._failed_at is None or not self.ready.is_set():
+            return False
+        with self._retry_lock:
+            if self._failed_at is None or time.monotonic() - self._failed_at < CONNECT_RETRY_SECONDS:
+                return False
+            self._failed_at = None
+            # A cached connect function (st.cache_resource) would hand back the failed client
+            clear = getattr(self._connect, 'clear', None)
+            if clear is not None:
+                clear()
+            self.start(self._connect)
+        return True
+
+    def source(self):
+        """LiveSource once connected, else the snapshot (None if neither is available yet)"""
+        if self.retry_if_failed() and self.local is None:
+            self.ready.wait()
+        if self.client is not None:
+            return LiveSource(self.client, self.table, load_data_version(self.client, self.table)['version'])
+        return self.local
+
+    def search_index(self) -> SearchIndex:
+        if self.client is not None:
+            return self.corpus.sync(self.client, load_data_version(self.client, self.table))
+        return self.corpus.index
+
+@st.cache_resource
+def start_dashboard(table: str, _connect: Callable) -> DashboardBackend:
+    """
+    Once per process: memory-map the snapshot for an immediate first paint and
+    start connecting/refreshing in the background. With no snapshot yet
+    (first ever start) this waits for the live connection instead.
+    """
+    backend = DashboardBackend(table)
+    backend.load_snapshot()
+    backend.start(_connect)
+    if backend.local is None:
+        backend.ready.wait()
+    return backend
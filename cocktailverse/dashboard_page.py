@@ -0,0 +1,281 @@
+"""
+🍹 Dashboard page
+The Streamlit page shared by streamlit_app.py and dashboard/app.py.
+
+Entry points call render() on every rerun and only choose their header (and
+whether the cost estimate is shown); everything else lives here so a fix is
+made once. The header is drawn before the data layer is imported, so the
+first paint doesn't wait for pandas or the snapshot.
+"""
+
+import streamlit as st
+
+from cocktailverse import config, connection
+
+DEFAULT_PROJECT_ID = 'maps-platform-20251011-140544'
+PAGE_SIZES = [10, 25, 50]
+
+@st.cache_resource
+def init_bigquery_client():
+    """Initialize BigQuery client with cached connection"""
+    project_id = config.load_settings(DEFAULT_PROJECT_ID)['project_id']
+
+    # Streamlit secrets (for Streamlit Cloud) or default credentials (Cloud Run / local dev)
+    try:
+        client = connection.create_bigquery_client(project_id, connection.service_account_info_from_streamlit())
+        return client, project_id
+    except Exception as e:
+        st.error(f"Failed to connect to BigQuery: {e}")
+        st.info("""
+        **For Streamlit Cloud:**
+        1. Go to Settings → Secrets
+        2. Add your GCP service account JSON:
+        ```toml
+        [gcp]
+        service_account_key = \"\"\"
+        {paste your service account JSON here}
+        \"\"\"
+        ```
+
+        **For local development:**
+        Run: `gcloud auth application-default login`
+        """)
+        return None, project_id
+
+def cost_estimate_sidebar() -> None:
+    """Static monthly GCP cost estimate (mocktailverse pattern)"""
+    st.sidebar.markdown("---")
+    st.sidebar.markdown("### 💰 GCP Cost Estimate")
+    st.sidebar.caption("**Cloud Run**: $0.05/month (Free tier)")
+    st.sidebar.caption("**BigQuery Storage**: $0.10/month (Free tier)")
+    st.sidebar.caption("**BigQuery Queries**: $0.01/month (Free tier)")
+    st.sidebar.caption("**Total Estimated**: **$0.16/month**")
+    st.sidebar.markdown("*Based on typical usage with GCP Free Tier*")
+
+def ingredients_text(row: dict, limit: int = None) -> str:
+    """Ingredients of a row as display text ('' if missing or unusable)"""
+    try:
+        ingredients = row.get('ingredients')
+        if isinstance(ingredients, list) and len(ingredients) > 0:
+            return ', '.join(str(i) for i in ingredients[:limit])
+        if ingredients is not None and str(ingredients).strip():
+            return str(ingredients)
+    except (ValueError, TypeError):
+        pass  # Skip if ingredients is problematic
+    return ''
+
+def render(title: str, tagline: str, cost_estimate: bool = False) -> None:
+    """The whole page, for one script run"""
+    # Page config
+    st.set_page_config(
+        page_title="Cocktailverse Dashboard",
+        page_icon="🍹",
+        layout="wide",
+        initial_sidebar_state="expanded"
+    )
+
+    st.title(title)
+    st.markdown(tagline)
+
+    import pandas as pd
+
+    from cocktailverse import costs, dashboard_data, snapshot, thumbnails
+
+    settings = config.load_settings(DEFAULT_PROJECT_ID)
+
+    # Memory-map the last local snapshot for an immediate first paint; the
+    # BigQuery connection and delta refresh run in the background
+    backend = dashboard_data.start_dashboard(settings['table'], init_bigquery_client)
+    source = backend.source()
+
+    if source is None:
+        # No snapshot and no connection - show the connection error and help
+        init_bigquery_client.clear()
+        init_bigquery_client()
+        st.stop()
+
+    if backend.client is None:
+        age = snapshot.format_age(backend.snapshot_info['age_seconds'])
+        st.info(f"⚡ Showing the local snapshot from {age} ago while live data loads - interact to refresh.")
+
+    # Sidebar filters
+    st.sidebar.header("🔍 Filters")
+
+    if cost_estimate:
+        cost_estimate_sidebar()
+
+    # Startup breakdown
+    with st.sidebar.expander("⏱️ Startup & snapshot"):
+        if backend.snapshot_info:
+            st.caption(f"Snapshot: {backend.snapshot_info['rows']} rows, "
+                       f"{snapshot.format_age(backend.snapshot_info['age_seconds'])} old")
+        else:
+            st.caption("Snapshot: none yet")
+        for stage, seconds in backend.timings.items():
+            st.caption(f"{stage}: {seconds * 1000:.0f} ms")
+        if backend.error:
+            st.caption(f"Live refresh error: {backend.error}")
+
+    # Measured BigQuery cost per reader (this server process)
+    with st.sidebar.expander("🧾 Query costs"):
+        cost_stats = costs.stats()
+        st.caption(f"Billed today: {cost_stats['today']['bytes_billed'] / 1024 ** 2:.1f} MB"
+                   + (f" of {cost_stats['today']['budget'] / 1024 ** 2:.0f} MB" if cost_stats['today']['budget'] else ""))
+        for reader, reader_stats in cost_stats['readers'].items():
+            st.caption(f"{reader}: {reader_stats['queries']} queries, "
+                       f"{reader_stats['bytes_billed'] / 1024 ** 2:.1f} MB billed, "
+                       f"{reader_stats['cache_hits']} cached, {reader_stats['slot_ms']} slot ms")
+
+    # Live: aggregates are pushed down to BigQuery, each chart its own query cached
+    # per data version (table metadata probe). Snapshot: computed locally.
+    summary = source.summary()
+
+    if summary['total'] == 0:
+        st.warning("No cocktail data found. Make sure data has been loaded to BigQuery.")
+        st.info("Run the fetch function to load cocktails: `gcloud functions call cocktailverse-fetch-cocktails`")
+        st.stop()
+
+    # Stats
+    col1, col2, col3, col4 = st.columns(4)
+    col1.metric("Total Cocktails", summary['total'])
+    col2.metric("Categories", summary['categories'])
+    col3.metric("Alcoholic Types", summary['alcoholic_types'])
+    col4.metric("Data Source", summary['latest_source'] or "N/A")
+
+    st.divider()
+
+    # Filters
+    category_filter = st.sidebar.multiselect(
+        "Category",
+        options=summary['category_options'],
+        default=[]
+    )
+
+    alcoholic_filter = st.sidebar.multiselect(
+        "Alcoholic Type",
+        options=summary['alcoholic_options'],
+        default=[]
+    )
+
+    # Filters become query parameters (and part of each cache key)
+    filters = (dashboard_data.filter_key(category_filter), dashboard_data.filter_key(alcoholic_filter))
+
+    # Tabs
+    tab1, tab2, tab3, tab4 = st.tabs(["📊 Overview", "🍸 Cocktails", "📈 Analytics", "🔍 Search"])
+
+    with tab1:
+        st.header("Overview")
+
+        # Charts
+        col1, col2 = st.columns(2)
+
+        with col1:
+            category_counts = source.value_counts('category', *filters, limit=10)
+            st.subheader("Top Categories")
+            st.bar_chart(category_counts)
+
+        with col2:
+            alcoholic_counts = source.value_counts('alcoholic', *filters)
+            st.subheader("Alcoholic Distribution")
+            st.bar_chart(alcoholic_counts)
+
+        # Ingredients analysis
+        st.subheader("Most Common Ingredients")
+        top_ingredients = source.ingredient_counts(*filters, limit=15)
+        if not top_ingredients.empty:
+            st.bar_chart(top_ingredients)
+
+    with tab2:
+        st.header("Cocktail List")
+
+        # Server-side paging: each page is its own small cached query
+        filtered_total = source.filtered_summary(*filters)['total']
+        page_col, size_col = st.columns([3, 1])
+        page_size = size_col.selectbox("Per page", PAGE_SIZES, index=1)
+        page_count = max(1, -(-filtered_total // page_size))
+        page = page_col.number_input(
+            f"Page (of {page_count})", min_value=1, max_value=page_count, value=1,
+            key=f"page_{filters}_{page_size}"
+        )
+
+        # Only the rows and columns rendered below
+        page_df = source.cocktail_page(*filters, page=page - 1, page_size=page_size)
+        page_rows = page_df.to_dict('records')
+        thumbnail_paths = thumbnails.prefetch(row.get('image_url') for row in page_rows)
+
+        # Display cocktails
+        for row in page_rows:
+            with st.container():
+                col1, col2 = st.columns([1, 3])
+
+                with col1:
+                    if pd.notna(row.get('image_url')):
+                        st.image(thumbnail_paths.get(row['image_url']) or row['image_url'], width=150)
+                    else:
+                        st.write("🍹")
+
+                with col2:
+                    st.subheader(row.get('name', 'Unknown'))
+
+                    cols = st.columns(4)
+                    if 'category' in row and pd.notna(row['category']):
+                        cols[0].write(f"**Category:** {row['category']}")
+                    if 'alcoholic' in row and pd.notna(row['alcoholic']):
+                        cols[1].write(f"**Type:** {row['alcoholic']}")
+                    if 'glass' in row and pd.notna(row['glass']):
+                        cols[2].write(f"**Glass:** {row['glass']}")
+                    if 'iba' in row and pd.notna(row['iba']):
+                        cols[3].write(f"**IBA:** {row['iba']}")
+
+                    ingredients = ingredients_text(row, limit=5)
+                    if ingredients:
+                        st.write(f"**Ingredients:** {ingredients}")
+
+                    if 'instructions' in row and pd.notna(row['instructions']):
+                        with st.expander("Instructions"):
+                            st.write(row['instructions'])
+
+                st.divider()
+
+    with tab3:
+        st.header("Analytics")
+
+        # Category breakdown
+        st.subheader("Cocktails by Category")
+        category_stats = source.category_stats(*filters)
+        st.dataframe(category_stats, use_container_width=True)
+
+        # Glass types
+        st.subheader("Glass Types")
+        glass_counts = source.value_counts('glass', *filters, limit=10)
+        st.bar_chart(glass_counts)
+
+        # IBA cocktails
+        iba_df = source.iba_cocktails(*filters)
+        if len(iba_df) > 0:
+            st.subheader(f"IBA Cocktails ({len(iba_df)})")
+            st.dataframe(iba_df, use_container_width=True)
+
+    with tab4:
+        st.header("Search Cocktails")
+
+        search_term = st.text_input("Search by name, ingredient, or category")
+
+        if search_term:
+            search_index = backend.search_index()
+            search_results = search_index.search(search_term, *filters)
+
+            st.write(f"Found {len(search_results)} results")
+
+            for row in search_results.to_dict('records'):
+                st.write(f"**{row.get('name', 'Unknown')}** - {row.get('category', 'N/A')}")
+                ingredients = ingredients_text(row)
+                if ingredients:
+                    st.write(f"Ingredients: {ingredients}")
+                st.divider()
+
+    # Footer
+    st.divider()
+    filtered_summary = source.filtered_summary(*filters)
+    st.markdown(f"**Data Source:** {settings['project_id']}.{settings['dataset_id']}.{settings['table_id']}")
+    st.caption(f"Last updated: {filtered_summary['last_processed_at'] or 'N/A'}")
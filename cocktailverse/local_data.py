@@ -0,0 +1,205 @@
+"""
+🍹 Local dashboard dataset
+Computes the dashboard charts in pandas from the memory-mapped snapshot.
+
+Used for the first paint after a restart, before the BigQuery connection is
+ready. Method names, return shapes and row semantics (one row per cocktail_id,
+its latest version) match dashboard_data.LiveSource so the apps render either
+source the same way.
+
+The frame is stored compactly: low-cardinality strings are categoricals and
+the ingredients list column is offset-encoded (one categorical array of all
+entries plus row offsets) instead of an object column of Python lists.
+Filters are boolean masks over that storage; the frame is never copied.
+"""
+
+from typing import TYPE_CHECKING, List, Sequence
+
+if TYPE_CHECKING:
+    import numpy as np
+    import pandas as pd
+
+# Heavily repeated string columns stored as categoricals
+CATEGORICAL_COLUMNS = ['category', 'alcoholic', 'glass', 'iba', 'source']
+
+class ListColumn:
+    """A list-of-strings column stored as flat categorical values plus row offsets"""
+
+    def __init__(self, values: 'pd.Categorical', offsets: 'np.ndarray'):
+        self.values = values
+        self.offsets = offsets
+
+    @classmethod
+    def from_series(cls, series: 'pd.Series') -> 'ListColumn':
+        import numpy as np
+        import pandas as pd
+
+        listlike = (list, tuple, np.ndarray)
+        lists = [v if isinstance(v, listlike) else () for v in series]
+        offsets = np.zeros(len(lists) + 1, dtype=np.int64)
+        np.cumsum([len(v) for v in lists], out=offsets[1:])
+        return cls(pd.Categorical([item for v in lists for item in v]), offsets)
+
+    @property
+    def lengths(self) -> 'np.ndarray':
+        import numpy as np
+
+        return np.diff(self.offsets)
+
+    def rows(self, positions: Sequence[int]) -> List[list]:
+        """Materialize Python lists for a few rows (e.g. one rendered page)"""
+        values = self.values
+        return [list(values[self.offsets[p]:self.offsets[p + 1]]) for p in positions]
+
+    def counts(self, row_mask: 'np.ndarray') -> 'pd.Series':
+        """Occurrences of each value across the rows selected by row_mask"""
+        import numpy as np
+        import pandas as pd
+
+        codes = self.values.codes if row_mask.all() else self.values.codes[np.repeat(row_mask, self.lengths)]
+        counts = np.bincount(codes[codes >= 0], minlength=len(self.values.categories))
+        return pd.Series(counts, index=self.values.categories, name='count')
+
+    @property
+    def nbytes(self) -> int:
+        return int(self.values.codes.nbytes + self.offsets.nbytes +
+                   self.values.categories.to_series().memory_usage(deep=True))
+
+def compact_frame(df: 'pd.DataFrame') -> 'pd.DataFrame':
+    """Categorical dtypes for the repeated string columns (no-op if already categorical)"""
+    import pandas as pd
+
+    columns = {c: df[c].astype('category') for c in CATEGORICAL_COLUMNS
+               if c in df.columns and not isinstance(df[c].dtype, pd.CategoricalDtype)}
+    return df.assign(**columns) if columns else df
+
+def _sorted_counts(codes: 'np.ndarray', categories: 'pd.Index', limit: int = None) -> 'pd.Series':
+    import numpy as np
+    import pandas as pd
+
+    counts = pd.Series(np.bincount(codes[codes >= 0], minlength=len(categories)), index=categories, name='count')
+    counts = counts[counts > 0].sort_values(ascending=False, kind='stable')
+    return counts.head(limit) if limit else counts
+
+class LocalDataset:
+    """Dashboard queries answered from an in-memory (snapshot) frame"""
+
+    def __init__(self, df: 'pd.DataFrame', version: str = None):
+        import numpy as np
+        import pandas as pd
+
+        df = compact_frame(df.reset_index(drop=True))
+        self.ingredients = ListColumn.from_series(df['ingredients'])
+        self.df = df.drop(columns=['ingredients'])
+        self.version = version
+        # Integer views reused by every query (no per-rerun string work)
+        self.name_codes, _ = pd.factorize(self.df['name'])
+        processed_ns = self.df['processed_at'].to_numpy(dtype='datetime64[ns]').view('int64')
+        self.processed_ns = processed_ns
+        # Newest first (missing timestamps last), computed once; pages are slices of this order
+        sortable_ns = np.where(processed_ns == np.iinfo(np.int64).min, np.iinfo(np.int64).min + 1, processed_ns)
+        self.order = np.lexsort((self.df['cocktail_id'].to_numpy(), -sortable_ns))
+        self._masks = {}
+
+    @property
+    def nbytes(self) -> int:
+        return int(self.df.memory_usage(deep=True).sum()) + self.ingredients.nbytes + int(
+            self.name_codes.nbytes + self.processed_ns.nbytes + self.order.nbytes)
+
+    def _codes(self, column: str) -> 'np.ndarray':
+        return self.df[column].cat.codes.to_numpy()
+
+    def _isin(self, column: str, values: Sequence[str]) -> 'np.ndarray':
+        """Boolean mask via a lookup table over the categorical codes"""
+        import numpy as np
+
+        categories = self.df[column].cat.categories
+        lookup = np.zeros(len(categories) + 1, dtype=bool)  # slot 0 is the missing-value code (-1)
+        lookup[categories.get_indexer(list(values)) + 1] = True
+        lookup[0] = False
+        return lookup[self._codes(column) + 1]
+
+    def _mask(self, categories: Sequence[str] = (), alcoholic: Sequence[str] = ()) -> 'np.ndarray':
+        """Row mask for the sidebar filters (cached per filter combination, never a frame copy)"""
+        import numpy as np
+
+        key = (tuple(categories), tuple(alcoholic))
+        mask = self._masks.get(key)
+        if mask is None:
+            mask = np.ones(len(self.df), dtype=bool)
+            if categories:
+                mask &= self._isin('category', categories)
+            if alcoholic:
+                mask &= self._isin('alcoholic', alcoholic)
+            if len(self._masks) >= 16:
+                self._masks.clear()
+            self._masks[key] = mask
+        return mask
+
+    def summary(self) -> dict:
+        df = self.df
+        latest = self.order[0] if len(df) else None
+        return {
+            'total': len(df),
+            'categories': df['category'].nunique(),
+            'alcoholic_types': df['alcoholic'].nunique(),
+            'latest_source': df['source'].iat[latest] if latest is not None else None,
+            'last_processed_at': df['processed_at'].iat[latest] if latest is not None else None,
+            'category_options': sorted(df['category'].dropna().unique()),
+            'alcoholic_options': sorted(df['alcoholic'].dropna().unique()),
+        }
+
+    def filtered_summary(self, categories=(), alcoholic=()) -> dict:
+        import pandas as pd
+
+        mask = self._mask(categories, alcoholic)
+        total = int(mask.sum())
+        last = pd.Timestamp(self.processed_ns[mask].max(), tz='UTC') if total else None
+        return {'total': total, 'last_processed_at': last}
+
+    def value_counts(self, column: str, categories=(), alcoholic=(), limit: int = None) -> 'pd.Series':
+        mask = self._mask(categories, alcoholic)
+        categories_index = self.df[column].cat.categories
+        return _sorted_counts(self._codes(column)[mask], categories_index, limit).rename_axis(column)
+
+    def ingredient_counts(self, categories=(), alcoholic=(), limit: int = 15) -> 'pd.Series':
+        counts = self.ingredients.counts(self._mask(categories, alcoholic))
+        counts = counts[counts > 0].sort_values(ascending=False, kind='stable')
+        return counts.head(limit).rename_axis('ingredient')
+
+    def category_stats(self, categories=(), alcoholic=()) -> 'pd.DataFrame':
+        import numpy as np
+        import pandas as pd
+
+        mask = self._mask(categories, alcoholic)
+        category_codes = self._codes('category')[mask].astype(np.int64)
+        keep = category_codes >= 0
+        category_codes = category_codes[keep]
+        n_categories = len(self.df['category'].cat.categories)
+        # Distinct (category, name) pairs give the per-category unique name count
+        pairs = np.unique(category_codes * (int(self.name_codes.max(initial=0)) + 1) +
+                          self.name_codes[mask][keep])
+        stats = pd.DataFrame({
+            'count': np.bincount(category_codes, minlength=n_categories),
+            'unique': np.bincount(pairs // (int(self.name_codes.max(initial=0)) + 1), minlength=n_categories),
+        }, index=self.df['category'].cat.categories.rename('category'))
+        return stats[stats['count'] > 0]
+
+    def iba_cocktails(self, categories=(), alcoholic=()) -> 'pd.DataFrame':
+        import numpy as np
+
+        mask = self._mask(categories, alcoholic) & (self._codes('iba') >= 0)
+        positions = np.flatnonzero(mask)
+        # De-duplicate (name, category, iba) on integer codes, keeping first occurrences
+        keys = np.stack([self.name_codes[positions], self._codes('category')[positions],
+                         self._codes('iba')[positions]], axis=1)
+        _, first = np.unique(keys, axis=0, return_index=True)
+        iba = self.df.iloc[positions[np.sort(first)]][['name', 'category', 'iba']]
+        return iba.astype({'category': 'object', 'iba': 'object'}).sort_values('name')
+
+    def cocktail_page(self, categories=(), alcoholic=(), page: int = 0, page_size: int = 50) -> 'pd.DataFrame':
+        mask = self._mask(categories, alcoholic)
+        positions = self.order[mask[self.order]][page * page_size:(page + 1) * page_size]
+        rows = self.df.iloc[positions].astype({c: 'object' for c in CATEGORICAL_COLUMNS if c in self.df.columns})
+        rows['ingredients'] = self.ingredients.rows(positions)
+        return rows
@@ -0,0 +1,309 @@
+"""
+🍹 SQL builders
+The API's cocktail listing and the dashboards' small aggregate queries,
+parameterized by the sidebar filters.
+
+Every builder returns (sql, query_parameters) so results can be cached per
+query and per filter combination. google-cloud-bigquery is only imported
+when a parameterized query is built.
+"""
+
+from typing import List, Sequence, Tuple
+
+# Full Cocktail record served by the API
+COCKTAIL_COLUMNS = [
+    'cocktail_id',
+    'name',
+    'category',
+    'alcoholic',
+    'glass',
+    'instructions',
+    'ingredients',
+    'image_url',
+    'tags',
+    'iba',
+    'video_url',
+    'source',
+    'fetched_at',
+    'processed_at',
+]
+
+# Columns rendered by the cocktail list (no fetched_at/video_url/tags)
+LIST_COLUMNS = [
+    'cocktail_id',
+    'name',
+    'category',
+    'alcoholic',
+    'glass',
+    'iba',
+    'ingredients',
+    'image_url',
+    'instructions',
+]
+
+# Lean per-cocktail projection kept locally: the Search tab index and the
+# snapshot charts use it (processed_at drives the incremental refresh watermark)
+CORPUS_COLUMNS = [
+    'cocktail_id',
+    'name',
+    'category',
+    'alcoholic',
+    'glass',
+    'iba',
+    'ingredients',
+    'image_url',
+    'source',
+    'processed_at',
+]
+
+def table_ref(project_id: str, dataset_id: str, table_id: str) -> str:
+    return f"`{project_id}.{dataset_id}.{table_id}`"
+
+def sampled_table(table: str, sample_percent: int = None) -> str:
+    """Table reference, optionally down-sampled with TABLESAMPLE (block sample)"""
+    if not sample_percent or sample_percent >= 100:
+        return table
+    return f"{table} TABLESAMPLE SYSTEM ({int(sample_percent)} PERCENT)"
+
+def current_rows(table: str, sample_percent: int = None) -> str:
+    """
+    The latest row per cocktail_id (the table is append-only: every load adds
+    a version), as an aliased subquery. Dashboard aggregates count cocktails
+    the same way the local snapshot does. When sampling, blocks are sampled
+    first and de-duplicated within the sample.
+    """
+    return f"""(
+        SELECT * FROM {sampled_table(table, sample_percent)}
+        WHERE TRUE
+        QUALIFY ROW_NUMBER() OVER (PARTITION BY cocktail_id ORDER BY processed_at DESC) = 1
+    ) AS cocktails"""
+
+def scaled_count(sample_percent: int = None) -> str:
+    """COUNT(*) scaled back up to a full-table estimate when sampling"""
+    if not sample_percent or sample_percent >= 100:
+        return "COUNT(*)"
+    return f"CAST(ROUND(COUNT(*) * 100 / {int(sample_percent)}) AS INT64)"
+
+def _bigquery():
+    from google.cloud import bigquery
+    return bigquery
+
+def latest_cocktails_query(table: str, limit: int = 100) -> Tuple[str, List]:
+    """The most recently processed cocktails, full records (API /cocktails and /export)"""
+    sql = f"""
+    SELECT {', '.join(COCKTAIL_COLUMNS)}
+    FROM {table}
+    ORDER BY processed_at DESC
+    LIMIT {int(limit)}
+    """
+    return sql, []
+
+def build_filter_clause(categories: Sequence[str] = (), alcoholic: Sequence[str] = ()) -> Tuple[str, List]:
+    """WHERE clause and parameters for the sidebar filters (empty filter = no restriction)"""
+    clauses = []
+    params = []
+    if categories:
+        clauses.append("category IN UNNEST(@categories)")
+        params.append(_bigquery().ArrayQueryParameter('categories', 'STRING', list(categories)))
+    if alcoholic:
+        clauses.append("alcoholic IN UNNEST(@alcoholic)")
+        params.append(_bigquery().ArrayQueryParameter('alcoholic', 'STRING', list(alcoholic)))
+    where = f"WHERE {' AND '.join(clauses)}" if clauses else ""
+    return where, params
+
+def summary_query(table: str) -> Tuple[str, List]:
+    """Headline metrics and filter options in a single row (unfiltered)"""
+    sql = f"""
+    SELECT
+        COUNT(*) AS total,
+        COUNT(DISTINCT category) AS categories,
+        COUNT(DISTINCT alcoholic) AS alcoholic_types,
+        MAX(processed_at) AS last_processed_at,
+        ARRAY_AGG(source IGNORE NULLS ORDER BY processed_at DESC LIMIT 1)[SAFE_OFFSET(0)] AS latest_source,
+        ARRAY_AGG(DISTINCT category IGNORE NULLS ORDER BY category) AS category_options,
+        ARRAY_AGG(DISTINCT alcoholic IGNORE NULLS ORDER BY alcoholic) AS alcoholic_options
+    FROM {current_rows(table)}
+    """
+    return sql, []
+
+def filtered_summary_query(table: str, categories=(), alcoholic=()) -> Tuple[str, List]:
+    """Row count and latest processed_at for the current filters"""
+    where, params = build_filter_clause(categories, alcoholic)
+    sql = f"""
+    SELECT COUNT(*) AS total, MAX(processed_at) AS last_processed_at
+    FROM {current_rows(table)}
+    {where}
+    """
+    return sql, params
+
+def value_counts_query(table: str, column: str, categories=(), alcoholic=(), limit: int = None,
+                       sample_percent: int = None) -> Tuple[str, List]:
+    """COUNT(*) per distinct value of a scalar column (estimated from a sample if sample_percent)"""
+    where, params = build_filter_clause(categories, alcoholic)
+    not_null = f"{'AND' if where else 'WHERE'} {column} IS NOT NULL"
+    limit_clause = f"LIMIT {int(limit)}" if limit else ""
+    sql = f"""
+    SELECT {column}, {scaled_count(sample_percent)} AS count
+    FROM {current_rows(table, sample_percent)}
+    {where} {not_null}
+    GROUP BY {column}
+    ORDER BY count DESC, {column}
+    {limit_clause}
+    """
+    return sql, params
+
+def ingredient_counts_query(table: str, categories=(), alcoholic=(), limit: int = 15,
+                            sample_percent: int = None) -> Tuple[str, List]:
+    """Most common ingredient entries across the filtered cocktails (estimated from a sample if sample_percent)"""
+    where, params = build_filter_clause(categories, alcoholic)
+    sql = f"""
+    SELECT ingredient, {scaled_count(sample_percent)} AS count
+    FROM {current_rows(table, sample_percent)}, UNNEST(ingredients) AS ingredient
+    {where}
+    GROUP BY ingredient
+    ORDER BY count DESC, ingredient
+    LIMIT {int(limit)}
+    """
+    return sql, params
+
+def category_stats_query(table: str, categories=(), alcoholic=()) -> Tuple[str, List]:
+    """Cocktail count and unique names per category"""
+    where, params = build_filter_clause(categories, alcoholic)
+    not_null = f"{'AND' if where else 'WHERE'} category IS NOT NULL"
+    sql = f"""
+    SELECT category, COUNT(cocktail_id) AS count, COUNT(DISTINCT name) AS `unique`
+    FROM {current_rows(table)}
+    {where} {not_null}
+    GROUP BY category
+    ORDER BY category
+    """
+    return sql, params
+
+def iba_cocktails_query(table: str, categories=(), alcoholic=()) -> Tuple[str, List]:
+    """Distinct IBA cocktails within the filters"""
+    where, params = build_filter_clause(categories, alcoholic)
+    not_null = f"{'AND' if where else 'WHERE'} iba IS NOT NULL"
+    sql = f"""
+    SELECT DISTINCT name, category, iba
+    FROM {current_rows(table)}
+    {where} {not_null}
+    ORDER BY name
+    """
+    return sql, params
+
+def cocktail_page_query(table: str, categories=(), alcoholic=(), page: int = 0, page_size: int = 50,
+                        columns: Sequence[str] = LIST_COLUMNS) -> Tuple[str, List]:
+    """One page of cocktail rows, newest first, with only the rendered columns"""
+    where, params = build_filter_clause(categories, alcoholic)
+    params = params + [
+        _bigquery().ScalarQueryParameter('page_limit', 'INT64', int(page_size)),
+        _bigquery().ScalarQueryParameter('page_offset', 'INT64', int(page) * int(page_size)),
+    ]
+    sql = f"""
+    SELECT {', '.join(columns)}
+    FROM {current_rows(table)}
+    {where}
+    ORDER BY processed_at DESC, cocktail_id
+    LIMIT @page_limit OFFSET @page_offset
+    """
+    return sql, params
+
+def table_version(client, table: str) -> dict:
+    """
+    The cheap "has anything changed?" probe: table metadata (last-modified
+    time, row count and streaming-buffer estimate), no query and no bytes billed.
+    Returns {'total', 'modified', 'version'}; version changes whenever rows land.
+    """
+    metadata = client.get_table(table.strip('`'))
+    rows = int(metadata.num_rows or 0)
+    modified = metadata.modified.isoformat() if metadata.modified else 'empty'
+    buffered, oldest = 0, ''
+    if metadata.streaming_buffer is not None:
+        # Streamed rows are queryable before num_rows/modified reflect them
+        buffered = int(metadata.streaming_buffer.estimated_rows or 0)
+        oldest_entry = metadata.streaming_buffer.oldest_entry_time
+        oldest = oldest_entry.isoformat() if oldest_entry else ''
+    return {'total': rows + buffered, 'modified': metadata.modified,
+            'version': f"{rows}:{modified}:{buffered}@{oldest}"}
+
+def corpus_query(table: str, since=None) -> Tuple[str, List]:
+    """
+    Lean projection for the local corpus (filters are applied locally),
+    oldest first. With `since`, only rows at or after that point are read
+    (callers pass their watermark minus a lookback window, since processed_at
+    is written by the loaders and a batch can commit after a newer one);
+    re-read rows are de-duplicated by cocktail_id when merged.
+    """
+    params = []
+    where = ""
+    if since is not None:
+        where = "WHERE processed_at >= @since"
+        params.append(_bigquery().ScalarQueryParameter('since', 'TIMESTAMP', since))
+    sql = f"""
+    SELECT {', '.join(CORPUS_COLUMNS)}
+    FROM {table}
+    {where}
+    ORDER BY processed_at, cocktail_id
+    """
+    return sql, params
+
+PAIRING_ORDERS = {'cocktails': 'cocktails DESC, pmi DESC', 'pmi': 'pmi DESC, cocktails DESC'}
+
+def ingredient_pairings_query(pairs_table: str, totals_table: str, ingredient: str = '',
+                              order: str = 'cocktails', min_count: int = 1, limit: int = 20) -> Tuple[str, List]:
+    """
+    Top ingredient pairs from the co-occurrence tables (gcf/cooccurrence.py):
+    cocktails containing both, and PMI = log2(P(a,b) / (P(a) P(b))) from the
+    diagonal (per-ingredient) and ('', '') (total) rows. Counts are the
+    compacted totals plus only the deltas newer than the last compaction;
+    `ingredient` (canonical name) restricts to pairs containing it.
+    """
+    bigquery = _bigquery()
+    params = [
+        bigquery.ScalarQueryParameter('ingredient', 'STRING', ingredient),
+        bigquery.ScalarQueryParameter('min_count', 'INT64', int(min_count)),
+        bigquery.ScalarQueryParameter('pair_limit', 'INT64', int(limit)),
+    ]
+    sql = f"""
+    WITH compacted AS (
+        SELECT ingredient_a, ingredient_b, total, compacted_through FROM {totals_table}
+    ),
+    recent AS (
+        SELECT ingredient_a, ingredient_b, delta AS total
+        FROM {pairs_table}
+        WHERE batch_at > IFNULL((SELECT MAX(compacted_through) FROM compacted), TIMESTAMP '1970-01-01')
+    ),
+    counts AS (
+        SELECT ingredient_a, ingredient_b, SUM(total) AS n
+        FROM (
+            SELECT ingredient_a, ingredient_b, total FROM compacted
+            UNION ALL
+            SELECT ingredient_a, ingredient_b, total FROM recent
+        )
+        GROUP BY ingredient_a, ingredient_b
+        HAVING n > 0
+    ),
+    singles AS (
+        SELECT ingredient_a AS ingredient, n FROM counts WHERE ingredient_a = ingredient_b AND ingredient_a != ''
+    ),
+    total AS (
+        SELECT n FROM counts WHERE ingredient_a = '' AND ingredient_b = ''
+    )
+    SELECT
+        p.ingredient_a,
+        p.ingredient_b,
+        p.n AS cocktails,
+        a.n AS cocktails_a,
+        b.n AS cocktails_b,
+        ROUND(LN(p.n * t.n / (a.n * b.n)) / LN(2), 4) AS pmi
+    FROM counts p
+    JOIN singles a ON a.ingredient = p.ingredient_a
+    JOIN singles b ON b.ingredient = p.ingredient_b
+    CROSS JOIN total t
+    WHERE p.ingredient_a < p.ingredient_b
+      AND p.n >= @min_count
+      AND (@ingredient = '' OR @ingredient IN (p.ingredient_a, p.ingredient_b))
+    ORDER BY {PAIRING_ORDERS[order]}, p.ingredient_a, p.ingredient_b
+    LIMIT @pair_limit
+    """
+    return sql, params
@@ -0,0 +1,43 @@
+"""
+🍹 Result conversion
+Arrow results to API records and BigQuery schemas to Arrow schemas.
+"""
+
+from typing import Any, Dict, List
+
+BQ_TO_ARROW_TYPES = {
+    'STRING': 'string',
+    'TIMESTAMP': 'timestamp',
+    'INTEGER': 'int64',
+    'FLOAT': 'float64',
+    'BOOLEAN': 'bool',
+}
+
+def bq_schema_to_arrow(fields):
+    """Arrow schema for a BigQuery result schema (used when a result is empty)"""
+    import pyarrow as pa
+
+    arrow_fields = []
+    for field in fields:
+        type_name = BQ_TO_ARROW_TYPES.get(field.field_type, 'string')
+        arrow_type = pa.timestamp('us', tz='UTC') if type_name == 'timestamp' else pa.type_for_alias(type_name)
+        if field.mode == 'REPEATED':
+            arrow_type = pa.list_(arrow_type)
+        arrow_fields.append(pa.field(field.name, arrow_type))
+    return pa.schema(arrow_fields)
+
+def arrow_to_cocktails(table) -> List[Dict[str, Any]]:
+    """
+    Arrow cocktails table -> list of dicts matching the API's Cocktail schema.
+    Arrow already yields plain Python values; only repeated fields and
+    timestamps need adjusting.
+    """
+    cocktails = table.to_pylist()
+    for cocktail in cocktails:
+        cocktail['ingredients'] = cocktail['ingredients'] or []
+        cocktail['tags'] = cocktail['tags'] or []
+        if cocktail['fetched_at']:
+            cocktail['fetched_at'] = cocktail['fetched_at'].isoformat()
+        if cocktail['processed_at']:
+            cocktail['processed_at'] = cocktail['processed_at'].isoformat()
+    return cocktails
@@ -0,0 +1,138 @@
+"""
+🍹 Dashboard search index
+Built once per data version and updated incrementally; queries are posting-list
+intersections instead of full-column scans.
+
+Matching keeps the Search tab's semantics: a cocktail matches when the
+(case-insensitive) search text is a substring of its name, its category or
+any of its ingredients. Names, categories and ingredients are split into
+character trigrams ("tokens"), so a query intersects the posting lists of its
+trigrams and only verifies the few surviving candidates.
+"""
+
+from collections import defaultdict
+from typing import TYPE_CHECKING, Dict, List, Sequence, Set
+
+if TYPE_CHECKING:
+    import pandas as pd
+
+NGRAM = 3
+# Rebuild from the live rows once superseded rows exceed this fraction of them
+COMPACT_FRACTION = 0.25
+
+def normalize(text) -> str:
+    return text.lower() if isinstance(text, str) else ''
+
+def ngrams(text: str) -> Set[str]:
+    return {text[i:i + NGRAM] for i in range(len(text) - NGRAM + 1)}
+
+class SearchIndex:
+    """
+    Trigram inverted index over name, category and ingredients.
+    Rows are kept in load order (oldest first); a re-loaded cocktail_id
+    tombstones its previous row so each cocktail appears once. Once the
+    tombstoned rows pass COMPACT_FRACTION of the live ones the index is rebuilt
+    without them, so the frame and postings stay proportional to the number of
+    cocktails however many versions are merged.
+    """
+
+    def __init__(self, df: 'pd.DataFrame' = None):
+        import pandas as pd
+
+        self.frame = pd.DataFrame()
+        self.names: List[str] = []
+        self.categories: List[str] = []
+        self.ingredients = pd.DataFrame({'row': pd.Series(dtype='int64'), 'ingredient': pd.Series(dtype='object')})
+        self.ingredients_by_row: Dict[int, List[str]] = defaultdict(list)
+        self.postings: Dict[str, Set[int]] = defaultdict(set)
+        self.id_to_row: Dict[str, int] = {}
+        self.deleted: Set[int] = set()
+        if df is not None:
+            self.update(df)
+
+    def __len__(self) -> int:
+        return len(self.id_to_row)
+
+    def update(self, df: 'pd.DataFrame') -> int:
+        """Index new or changed cocktails (ordered oldest first); returns rows added"""
+        import pandas as pd
+
+        if df.empty:
+            return 0
+        df = df.drop_duplicates('cocktail_id', keep='last').reset_index(drop=True)
+        offset = len(self.frame)
+        df.index = pd.RangeIndex(offset, offset + len(df))
+
+        for row, cocktail_id in zip(df.index, df['cocktail_id']):
+            previous = self.id_to_row.get(cocktail_id)
+            if previous is not None:
+                self.deleted.add(previous)
+            self.id_to_row[cocktail_id] = row
+
+        self.names.extend(normalize(v) for v in df['name'])
+        self.categories.extend(normalize(v) for v in df['category'])
+
+        # Exploded ingredient frame: one (row, ingredient) pair per list entry
+        exploded = df['ingredients'].explode().dropna()
+        new_ingredients = pd.DataFrame({
+            'row': exploded.index.to_numpy(dtype='int64'),
+            'ingredient': [normalize(v) for v in exploded],
+        })
+        for row, ingredient in zip(new_ingredients['row'], new_ingredients['ingredient']):
+            self.ingredients_by_row[row].append(ingredient)
+
+        for row in df.index:
+            for text in (self.names[row], self.categories[row], *self.ingredients_by_row.get(row, ())):
+                for gram in ngrams(text):
+                    self.postings[gram].add(row)
+
+        self.ingredients = pd.concat([self.ingredients, new_ingredients])
+        self.frame = df if self.frame.empty else pd.concat([self.frame, df])
+        if len(self.deleted) > len(self.id_to_row) * COMPACT_FRACTION:
+            self._compact()
+        return len(df)
+
+    def _compact(self) -> None:
+        """Re-index only the latest row per cocktail_id (keeps load order)"""
+        live = SearchIndex(self.frame.iloc[sorted(self.id_to_row.values())])
+        vars(self).update(vars(live))
+
+    def _matches(self, row: int, needle: str) -> bool:
+        return (
+            needle in self.names[row]
+            or needle in self.categories[row]
+            or any(needle in ingredient for ingredient in self.ingredients_by_row.get(row, ()))
+        )
+
+    def search_rows(self, term: str) -> List[int]:
+        """Row positions matching term, newest first"""
+        needle = normalize(term)
+        if not needle:
+            candidates = range(len(self.frame))
+        elif len(needle) >= NGRAM:
+            grams = sorted(ngrams(needle), key=lambda g: len(self.postings.get(g, ())))
+            candidates = set(self.postings.get(grams[0], ()))
+            for gram in grams[1:]:
+                if not candidates:
+                    break
+                candidates &= self.postings.get(gram, set())
+        else:
+            # Too short to have a trigram - verify every row (still no regex scan)
+            candidates = range(len(self.frame))
+
+        return sorted(
+            (row for row in candidates if row not in self.deleted and (not needle or self._matches(row, needle))),
+            reverse=True
+        )
+
+    def search(self, term: str, categories: Sequence[str] = (), alcoholic: Sequence[str] = ()) -> 'pd.DataFrame':
+        """Matching cocktails, restricted to the sidebar filters"""
+        import numpy as np
+
+        rows = np.asarray(self.search_rows(term), dtype=np.int64)
+        results = self.frame.iloc[rows]
+        if categories:
+            results = results[results['category'].isin(categories)]
+        if alcoholic:
+            results = results[results['alcoholic'].isin(alcoholic)]
+        return results
@@ -0,0 +1,89 @@
+"""
+🍹 Local dataset snapshot
+Persists the last good dashboard dataset as an Arrow IPC file and memory-maps it at startup.
+
+The file is uncompressed Arrow so opening it is a zero-copy mmap; writes go
+to a temp file in the same directory followed by os.replace, so readers
+always see either the previous or the new snapshot, never a partial one.
+"""
+
+import os
+import re
+import tempfile
+import time
+from datetime import datetime, timezone
+from pathlib import Path
+from typing import TYPE_CHECKING, Optional, Tuple
+
+if TYPE_CHECKING:
+    import pandas as pd
+    import pyarrow as pa
+
+SNAPSHOT_DIR = Path(os.getenv('DASHBOARD_SNAPSHOT_DIR', Path(__file__).resolve().parent.parent / 'data' / 'clean'))
+
+def snapshot_path(table: str, prefix: str = '') -> Path:
+    """data/clean/<prefix><project.dataset.table>.arrow"""
+    name = re.sub(r'[^A-Za-z0-9_.-]', '', table)
+    return SNAPSHOT_DIR / f"{prefix}{name}.arrow"
+
+def write_snapshot(df: 'pd.DataFrame', path: Path, version: str) -> None:
+    """Atomically replace the snapshot at path with df"""
+    import pyarrow as pa
+
+    write_arrow_snapshot(pa.Table.from_pandas(df, preserve_index=False), path, version)
+
+def write_arrow_snapshot(table: 'pa.Table', path: Path, version: str) -> None:
+    """Atomically replace the snapshot at path with an Arrow table"""
+    import pyarrow as pa
+
+    table = table.replace_schema_metadata({
+        **(table.schema.metadata or {}),
+        b'cocktailverse.version': str(version).encode('utf-8'),
+        b'cocktailverse.written_at': datetime.now(timezone.utc).isoformat().encode('utf-8'),
+    })
+    path.parent.mkdir(parents=True, exist_ok=True)
+    fd, tmp_path = tempfile.mkstemp(dir=path.parent, suffix='.part')
+    try:
+        with os.fdopen(fd, 'wb') as f:
+            with pa.ipc.new_file(f, table.schema) as writer:
+                writer.write_table(table)
+        os.replace(tmp_path, path)
+    except Exception:
+        if os.path.exists(tmp_path):
+            os.unlink(tmp_path)
+        raise
+
+def read_snapshot(path: Path) -> Optional[Tuple['pa.Table', dict]]:
+    """
+    Memory-map the snapshot; returns (arrow_table, info) or None if there is none.
+    info holds the data version, when it was written and its age in seconds.
+    """
+    if not path.exists():
+        return None
+    import pyarrow as pa
+
+    try:
+        source = pa.memory_map(str(path), 'r')
+        table = pa.ipc.open_file(source).read_all()
+    except (OSError, pa.ArrowInvalid) as e:
+        print(f"Ignoring unreadable snapshot {path}: {e}")
+        return None
+    metadata = table.schema.metadata or {}
+    written_at = metadata.get(b'cocktailverse.written_at', b'').decode('utf-8') or None
+    info = {
+        'path': str(path),
+        'version': metadata.get(b'cocktailverse.version', b'').decode('utf-8') or None,
+        'written_at': written_at,
+        'age_seconds': time.time() - path.stat().st_mtime,
+        'rows': table.num_rows,
+    }
+    return table, info
+
+def format_age(seconds: float) -> str:
+    if seconds < 120:
+        return f"{seconds:.0f}s"
+    if seconds < 7200:
+        return f"{seconds / 60:.0f}m"
+    if seconds < 172800:
+        return f"{seconds / 3600:.1f}h"
+    return f"{seconds / 86400:.1f}d"
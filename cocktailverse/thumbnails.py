@@ -0,0 +1,112 @@
+"""
+🍹 Thumbnail cache
+Downloads TheCocktailDB's small `/preview` image variant once and serves it from local disk.
+
+The cache directory is capped in size; the least recently used files are
+evicted first (file mtime is bumped on every hit).
+"""
+
+import hashlib
+import os
+import tempfile
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+from typing import Dict, Iterable, Optional
+
+import requests
+
+CACHE_DIR = Path(os.getenv('THUMBNAIL_CACHE_DIR', Path(tempfile.gettempdir()) / 'cocktailverse_thumbnails'))
+CACHE_MAX_BYTES = int(float(os.getenv('THUMBNAIL_CACHE_MAX_MB', '50')) * 1024 * 1024)
+FETCH_TIMEOUT = 5
+FETCH_WORKERS = 8
+FAILURE_RETRY_SECONDS = 600
+FAILURE_MAX_ENTRIES = 10000
+
+# url -> time of the last failed download (avoid re-paying timeouts on every rerun).
+# Kept in failure order: expired entries, then the oldest past the cap, are pruned.
+_failed_at: Dict[str, float] = {}
+_failed_lock = threading.Lock()
+
+def preview_url(image_url: str) -> str:
+    """TheCocktailDB serves a ~100px variant at <image>/preview"""
+    image_url = image_url.rstrip('/')
+    return image_url if image_url.endswith('/preview') else f"{image_url}/preview"
+
+def cache_path(image_url: str) -> Path:
+    digest = hashlib.sha1(image_url.encode('utf-8')).hexdigest()
+    return CACHE_DIR / f"{digest}.jpg"
+
+def _record_failure(image_url: str) -> None:
+    now = time.time()
+    with _failed_lock:
+        _failed_at.pop(image_url, None)
+        _failed_at[image_url] = now
+        while _failed_at:
+            oldest = next(iter(_failed_at))
+            if now - _failed_at[oldest] < FAILURE_RETRY_SECONDS and len(_failed_at) <= FAILURE_MAX_ENTRIES:
+                break
+            del _failed_at[oldest]
+
+def get_thumbnail(image_url: str) -> Optional[str]:
+    """
+    Local path of the cached preview for image_url, downloading it on a miss.
+    Returns None when the download fails so callers can fall back to the URL.
+    """
+    if not image_url:
+        return None
+    path = cache_path(image_url)
+    if path.exists():
+        try:
+            os.utime(path)  # mark as recently used
+        except OSError:
+            pass
+        return str(path)
+    if time.time() - _failed_at.get(image_url, 0) < FAILURE_RETRY_SECONDS:
+        return None
+
+    try:
+        response = requests.get(preview_url(image_url), timeout=FETCH_TIMEOUT)
+        if response.status_code != 200 or not response.content:
+            _record_failure(image_url)
+            return None
+        CACHE_DIR.mkdir(parents=True, exist_ok=True)
+        # Write to a temp file and rename so concurrent readers never see partial images
+        fd, tmp_path = tempfile.mkstemp(dir=CACHE_DIR, suffix='.part')
+        with os.fdopen(fd, 'wb') as f:
+            f.write(response.content)
+        os.replace(tmp_path, path)
+        return str(path)
+    except (requests.RequestException, OSError) as e:
+        print(f"Thumbnail fetch failed for {image_url}: {e}")
+        _record_failure(image_url)
+        return None
+
+def enforce_size_cap(max_bytes: int = CACHE_MAX_BYTES) -> int:
+    """Evict least recently used thumbnails until the cache fits; returns bytes freed"""
+    try:
+        entries = [(p.stat().st_mtime, p.stat().st_size, p) for p in CACHE_DIR.glob('*.jpg')]
+    except OSError:
+        return 0
+    total = sum(size for _, size, _ in entries)
+    freed = 0
+    for _, size, path in sorted(entries):
+        if total - freed <= max_bytes:
+            break
+        try:
+            path.unlink()
+            freed += size
+        except OSError:
+            continue
+    return freed
+
+def prefetch(image_urls: Iterable[str]) -> Dict[str, Optional[str]]:
+    """Resolve a page of thumbnails concurrently; maps image URL -> local path (or None)"""
+    urls = [url for url in dict.fromkeys(image_urls) if isinstance(url, str) and url]
+    misses = [url for url in urls if not cache_path(url).exists()]
+    with ThreadPoolExecutor(max_workers=FETCH_WORKERS) as pool:
+        paths = dict(zip(urls, pool.map(get_thumbnail, urls)))
+    if misses:
+        enforce_size_cap()
+    return paths
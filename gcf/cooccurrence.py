@@ -0,0 +1,268 @@
+#!/usr/bin/env python3
+# 💬 Ingredient Co-occurrence
+# Purpose: Keep a sparse ingredient-pair co-occurrence table next to the cocktails table,
+#          updated incrementally by every load batch (transform and fetch direct mode)
+#
+# Outputs:
+#   - Delta rows in PROJECT_ID.DATASET_ID.PAIRS_TABLE_ID (bq/ingredient_pairs_schema.json):
+#     SUM(delta) per (ingredient_a, ingredient_b) is the number of cocktails (latest version
+#     of each) containing both; the diagonal (a, a) counts cocktails containing a, and
+#     ('', '') counts cocktails with ingredient names - everything PMI needs
+#   - Compacted totals in PAIRS_TABLE_ID_totals (bq/ingredient_pair_totals_schema.json): one
+#     row per pair summing the deltas up to compacted_through; readers add only newer deltas
+#
+# Sample Output:
+#   Recorded 38 ingredient pair deltas
+#   Compacted ingredient pairs through 2025-10-19T02:00:00+00:00 (1874 pairs)
+#
+# Usage (one-off backfill of an empty pairs table from the current cocktails table,
+# or a compaction now instead of when it is next due after a load):
+#   python cooccurrence.py --backfill
+#   python cooccurrence.py --compact
+
+import os
+import time
+from collections import Counter
+from datetime import datetime, timezone
+from itertools import combinations
+from typing import Any, Dict, Iterable, List, Optional
+
+import gcp_clients
+import telemetry
+
+PROJECT_ID = os.environ.get('PROJECT_ID', '')
+DATASET_ID = os.environ.get('DATASET_ID', 'cocktailverse')
+TABLE_ID = os.environ.get('TABLE_ID', 'cocktails')
+# Empty disables co-occurrence maintenance
+PAIRS_TABLE_ID = os.environ.get('PAIRS_TABLE_ID', 'ingredient_pairs')
+TOTALS_TABLE_ID = f"{PAIRS_TABLE_ID}_totals"
+# Deltas are folded into the totals when the last compaction is older than this
+COMPACT_INTERVAL_SECONDS = int(os.environ.get('PAIRS_COMPACT_INTERVAL_SECONDS', str(6 * 3600)))
+# Only deltas older than this are compacted: batch_at is stamped just before the insert,
+# so a delta can't arrive after a compaction that already passed its batch_at
+COMPACT_LAG_SECONDS = 3600
+# (ingredient_a, ingredient_b) key of the cocktail-count row
+TOTAL = ('', '')
+
+def canonical_ingredient(name: Any) -> str:
+    """Lower-case ingredient name with whitespace collapsed ("Orange  Juice" -> "orange juice")"""
+    return ' '.join(str(name or '').split()).lower()
+
+def ingredient_set(names: Optional[Iterable[Any]]) -> List[str]:
+    """Distinct canonical names of one cocktail, sorted (so pairs come out as a < b)"""
+    return sorted({name for name in map(canonical_ingredient, names or []) if name})
+
+def add_cocktail(counts: Counter, ingredient_names: Optional[Iterable[Any]], sign: int = 1) -> None:
+    """
+    Add (sign=1) or remove (sign=-1) one cocktail's contribution. Cocktails
+    without ingredient names (rows loaded before the column existed) are left
+    out entirely, total included, so they don't dilute PMI; they count once a
+    re-fetch loads them with names.
+    """
+    names = ingredient_set(ingredient_names)
+    if not names:
+        return
+    counts[TOTAL] += sign
+    for name in names:
+        counts[(name, name)] += sign
+    for pair in combinations(names, 2):
+        counts[pair] += sign
+
+def batch_counts(records: Iterable[Any], previous: Dict[str, List[str]]) -> Counter:
+    """
+    Net change of the matrix for a load batch: each record replaces the
+    previous version of its cocktail (`previous`, by cocktail_id), so its old
+    ingredient names are subtracted and its new ones added. `previous` is updated
+    as records pass, so repeats within a batch chain correctly.
+    """
+    counts = Counter()
+    for record in records:
+        cocktail_id = record['cocktail_id']
+        if cocktail_id in previous:
+            add_cocktail(counts, previous[cocktail_id], -1)
+        add_cocktail(counts, record['ingredient_names'])
+        previous[cocktail_id] = record['ingredient_names']
+    return counts
+
+def latest_ingredient_names(bq_client, table: str,
+                            cocktail_ids: Optional[Iterable[str]] = None) -> Dict[str, List[str]]:
+    """cocktail_id -> ingredient_names of its most recent row; cocktail_ids restricts the lookup"""
+    from google.cloud import bigquery
+
+    params = []
+    where = ""
+    if cocktail_ids is not None:
+        params.append(bigquery.ArrayQueryParameter('ids', 'STRING', sorted(set(cocktail_ids))))
+        where = "WHERE cocktail_id IN UNNEST(@ids)"
+    sql = f"""
+    SELECT cocktail_id,
+           ARRAY_AGG(STRUCT(ingredient_names) ORDER BY processed_at DESC LIMIT 1)[OFFSET(0)].ingredient_names
+               AS ingredient_names
+    FROM `{table}`
+    {where}
+    GROUP BY cocktail_id
+    """
+    job = bq_client.query(sql, job_config=bigquery.QueryJobConfig(query_parameters=params))
+    return {row['cocktail_id']: list(row['ingredient_names'] or []) for row in job.result()}
+
+def delta_rows(counts: Counter) -> List[Dict[str, Any]]:
+    """Non-zero deltas as rows of the pairs table"""
+    batch_at = datetime.utcnow().isoformat()
+    return [{'ingredient_a': a, 'ingredient_b': b, 'delta': delta, 'batch_at': batch_at}
+            for (a, b), delta in sorted(counts.items()) if delta]
+
+def enabled() -> bool:
+    return bool(PROJECT_ID and PAIRS_TABLE_ID)
+
+def batch_deltas(records: List[Any]) -> Optional[List[Dict[str, Any]]]:
+    """
+    Delta rows for a batch that is about to be loaded (the previous versions
+    are looked up first, so call this before the insert). None when
+    co-occurrence is disabled or the lookup fails - the batch still loads.
+    """
+    if not enabled() or not records:
+        return None
+    table = f"{PROJECT_ID}.{DATASET_ID}.{TABLE_ID}"
+    try:
+        with telemetry.span('cooccurrence_lookup') as span:
+            previous = latest_ingredient_names(gcp_clients.get_bigquery_client(), table,
+                                          (record['cocktail_id'] for record in records))
+            span.add(records=len(previous))
+        return delta_rows(batch_counts(records, previous))
+    except Exception as e:
+        print(f"Warning: could not read previous ingredients from {table}, pairs not updated: {e}")
+        return None
+
+def record_deltas(rows: Optional[List[Dict[str, Any]]]) -> int:
+    """
+    Append the delta rows once the batch is loaded, then compact if due (best
+    effort); returns rows written.
+    """
+    if not rows:
+        return 0
+    table = f"{PROJECT_ID}.{DATASET_ID}.{PAIRS_TABLE_ID}"
+    try:
+        with telemetry.span('cooccurrence_update') as span:
+            errors = gcp_clients.get_bigquery_client().insert_rows_json(table, rows)
+            span.add(records=len(rows))
+        if errors:
+            print(f"Errors inserting ingredient pair deltas: {errors}")
+            return 0
+        print(f"Recorded {len(rows)} ingredient pair deltas")
+    except Exception as e:
+        print(f"Warning: could not update {table}: {e}")
+        return 0
+    compact_if_due()
+    return len(rows)
+
+def compacted_totals_sql(pairs_table: str, totals_table: str, since: str, through: str) -> str:
+    """
+    Previous totals + deltas in (since, through], as totals rows; since and
+    through are SQL timestamp expressions (since NULL before the first
+    compaction). The ('', '') row is kept even at zero so compacted_through
+    is never lost.
+    """
+    return f"""
+    SELECT ingredient_a, ingredient_b, SUM(total) AS total, {through} AS compacted_through
+    FROM (
+        SELECT ingredient_a, ingredient_b, total FROM `{totals_table}`
+        UNION ALL
+        SELECT ingredient_a, ingredient_b, delta AS total FROM `{pairs_table}`
+        WHERE batch_at <= {through} AND ({since} IS NULL OR batch_at > {since})
+    )
+    GROUP BY ingredient_a, ingredient_b
+    HAVING SUM(total) != 0 OR ingredient_a = ''
+    """
+
+def compaction_script(pairs_table: str, totals_table: str, through: int) -> str:
+    """
+    One transaction: read the compacted_through marker, then replace the
+    totals with compacted_totals_sql. A concurrent compaction mutating the
+    totals table conflicts and one of them is cancelled, so a rebuild from a
+    stale marker never lands. Returns (since, compacted).
+    """
+    select = compacted_totals_sql(pairs_table, totals_table, 'since', 'through')
+    return f"""
+    DECLARE through TIMESTAMP DEFAULT TIMESTAMP_SECONDS({through});
+    DECLARE since TIMESTAMP;
+    DECLARE compacted BOOL DEFAULT FALSE;
+    BEGIN TRANSACTION;
+    SET since = (SELECT MAX(compacted_through) FROM `{totals_table}`);
+    IF since IS NULL OR through > since THEN
+        INSERT INTO `{totals_table}` (ingredient_a, ingredient_b, total, compacted_through)
+        {select};
+        DELETE FROM `{totals_table}` WHERE compacted_through < through;
+        SET compacted = TRUE;
+    END IF;
+    COMMIT TRANSACTION;
+    SELECT UNIX_SECONDS(since) AS since, compacted;
+    """
+
+def compact() -> int:
+    """
+    Fold deltas older than COMPACT_LAG_SECONDS into the totals table (see
+    compaction_script), then drop the deltas the previous compaction already
+    covered - only once this one committed, and those are out of the
+    streaming buffer by now. Returns total rows (0 if nothing was due).
+    """
+    bq_client = gcp_clients.get_bigquery_client()
+    pairs_table = f"{PROJECT_ID}.{DATASET_ID}.{PAIRS_TABLE_ID}"
+    totals_table = f"{PROJECT_ID}.{DATASET_ID}.{TOTALS_TABLE_ID}"
+    through = int(time.time()) - COMPACT_LAG_SECONDS
+    with telemetry.span('cooccurrence_compact') as span:
+        # Raises if cancelled by a concurrent compaction: nothing below runs
+        result = next(iter(bq_client.query(compaction_script(pairs_table, totals_table, through)).result()))
+        if not result['compacted']:
+            return 0
+        rows = bq_client.get_table(totals_table).num_rows
+        span.add(records=rows)
+    print(f"Compacted ingredient pairs through {datetime.fromtimestamp(through, timezone.utc).isoformat()} "
+          f"({rows} pairs)")
+    if result['since'] is not None:
+        try:
+            bq_client.query(
+                f"DELETE FROM `{pairs_table}` WHERE batch_at <= TIMESTAMP_SECONDS({result['since']})").result()
+        except Exception as e:
+            print(f"Warning: compacted deltas not removed from {pairs_table}: {e}")
+    return rows
+
+def compact_if_due() -> int:
+    """compact() when the totals table was last rebuilt over COMPACT_INTERVAL_SECONDS ago"""
+    if not enabled():
+        return 0
+    totals_table = f"{PROJECT_ID}.{DATASET_ID}.{TOTALS_TABLE_ID}"
+    try:
+        modified = gcp_clients.get_bigquery_client().get_table(totals_table).modified
+        if modified and (datetime.now(timezone.utc) - modified).total_seconds() < COMPACT_INTERVAL_SECONDS:
+            return 0
+        return compact()
+    except Exception as e:
+        print(f"Warning: could not compact {totals_table}: {e}")
+        return 0
+
+def backfill() -> int:
+    """Seed empty pairs and totals tables from the latest version of every cocktail"""
+    bq_client = gcp_clients.get_bigquery_client()
+    pairs_table = f"{PROJECT_ID}.{DATASET_ID}.{PAIRS_TABLE_ID}"
+    for table in (pairs_table, f"{PROJECT_ID}.{DATASET_ID}.{TOTALS_TABLE_ID}"):
+        existing = next(iter(bq_client.query(f"SELECT COUNT(*) AS n FROM `{table}`").result()))['n']
+        if existing:
+            raise RuntimeError(f"{table} already has {existing} rows; backfill only seeds empty tables")
+    counts = Counter()
+    for names in latest_ingredient_names(bq_client, f"{PROJECT_ID}.{DATASET_ID}.{TABLE_ID}").values():
+        add_cocktail(counts, names)
+    rows = delta_rows(counts)
+    for start in range(0, len(rows), 10000):
+        errors = bq_client.insert_rows_json(pairs_table, rows[start:start + 10000])
+        if errors:
+            raise RuntimeError(f"Errors inserting ingredient pair deltas: {errors}")
+    return len(rows)
+
+if __name__ == "__main__":
+    import sys
+    if sys.argv[1:] == ['--backfill']:
+        print(f"Backfilled {backfill()} ingredient pair rows")
+    elif sys.argv[1:] == ['--compact']:
+        compact()
+    else:
+        print("Usage: python cooccurrence.py --backfill | --compact")
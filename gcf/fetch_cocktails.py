@@ -10,173 +10,429 @@
 
 import json
 import os
-import requests
+import queue
+import threading
+from concurrent.futures import ThreadPoolExecutor
 from datetime import datetime
-from typing import Dict, Any, List
-from google.cloud import storage
+from typing import Dict, Any, Iterable, Iterator, List, Set, Tuple
+from urllib.parse import quote
 import functions_framework
 from flask import Request
 
-# Initialize GCP clients
-storage_client = storage.Client()
+import cooccurrence
+import fingerprint
+import gcp_clients
+import profiling
+import rate_limit
+import records
+import telemetry
+import warehouse
 
 # Environment variables
 PROJECT_ID = os.environ.get('PROJECT_ID', '')
 BUCKET_NAME = os.environ.get('BUCKET_NAME', '')
 COCKTAIL_API_BASE = "https://www.thecocktaildb.com/api/json/v1/1"
+# filter.php modes (they only return ids, so they feed the shared detail-lookup stage)
+FILTER_PARAMS = {'ingredient': 'i', 'category': 'c', 'glass': 'g', 'alcoholic': 'a'}
+FETCH_TYPES = {'random', 'mocktails', 'non_alcoholic', 'popular', 'search', *FILTER_PARAMS}
+# Upper bound on specs per bulk request
+MAX_SPECS = 50
+# Fetched responses buffered ahead of the upload before fetch workers block (backpressure)
+PIPELINE_BUFFER = int(os.environ.get('PIPELINE_BUFFER', '32'))
+# Resumable upload chunk size (a multiple of 256 KiB)
+UPLOAD_CHUNK_SIZE = int(os.environ.get('UPLOAD_CHUNK_MB', '1')) * 1024 * 1024
+# Direct mode: where the raw payload is archived (the transform ignores this prefix) and how
+# long the response waits for the archive upload - CPU is throttled once the response is sent
+ARCHIVE_PREFIX = os.environ.get('ARCHIVE_PREFIX', 'archive/')
+ARCHIVE_WAIT_SECONDS = float(os.environ.get('ARCHIVE_WAIT_SECONDS', '30'))
+
+# Shared across warm invocations so the adaptive limit carries over
+cocktaildb = rate_limit.CocktailDBClient()
+# Direct mode archive uploads run here, alongside the BigQuery insert
+archiver = ThreadPoolExecutor(max_workers=2, thread_name_prefix='raw-archive')
+
+# GCP clients are created on first use; optionally warm them up in the background now
+gcp_clients.warm_up_in_background(storage=True, bucket_name=BUCKET_NAME)
+
+def get_json(path: str) -> Dict[str, Any]:
+    """
+    GET one TheCocktailDB endpoint (e.g. 'lookup.php?i=11007').
+    Network time (including rate limiting and retries) and JSON parsing are
+    timed as separate spans; returns None when the call was dropped.
+    """
+    endpoint = path.split('.php')[0]
+    with telemetry.span('cocktaildb_http', endpoint=endpoint) as span:
+        response = cocktaildb.get(f"{COCKTAIL_API_BASE}/{path}")
+        span.add(bytes=len(response.content) if response is not None else 0)
+    if response is None:
+        return None
+    with telemetry.span('cocktaildb_parse', endpoint=endpoint) as span:
+        data = response.json()
+        span.add(records=len(data.get('drinks') or []))
+    return data
+
+_DONE = object()
+
+def iter_json_many(paths: Iterable[str]) -> Iterator[Dict[str, Any]]:
+    """
+    get_json for many paths on worker threads (the limiter decides how many
+    are in flight), yielded in completion order as they arrive. Workers block
+    once PIPELINE_BUFFER responses are waiting, so a slow consumer (the
+    upload) throttles fetching instead of buffering the whole result.
+    """
+    results = queue.Queue(maxsize=PIPELINE_BUFFER)
+    pending = iter(paths)
+    pending_lock = threading.Lock()
+    stop = threading.Event()
+
+    def put(item) -> bool:
+        while not stop.is_set():
+            try:
+                results.put(item, timeout=0.1)
+                return True
+            except queue.Full:
+                continue
+        return False
+
+    def worker():
+        try:
+            while not stop.is_set():
+                with pending_lock:
+                    path = next(pending, None)
+                if path is None:
+                    break
+                if not put(get_json(path)):
+                    return
+        except Exception as e:
+            put(e)
+        put(_DONE)
+
+    workers = [threading.Thread(target=worker, daemon=True, name=f"cocktaildb-fetch-{i}")
+               for i in range(rate_limit.MAX_CONCURRENCY)]
+    for thread in workers:
+        thread.start()
+    try:
+        remaining = len(workers)
+        while remaining:
+            item = results.get()
+            if item is _DONE:
+                remaining -= 1
+            elif isinstance(item, Exception):
+                raise item
+            else:
+                yield item
+    finally:
+        # Consumer finished or failed - release any blocked workers
+        stop.set()
+
+def first_drink(data: Dict[str, Any]):
+    if data and data.get('drinks') and len(data['drinks']) > 0:
+        return data['drinks'][0]
+    return None
+
+def normalize_spec(spec: Dict[str, Any]) -> Dict[str, Any]:
+    """
+    One fetch spec with defaults applied (ValueError if invalid):
+    {'fetch_type', 'limit', 'search_term', 'value'}; filter modes
+    (ingredient/category/glass/alcoholic) take their filter in 'value'.
+    """
+    fetch_type = spec.get('fetch_type', 'random')
+    if fetch_type not in FETCH_TYPES:
+        raise ValueError(f"Unknown fetch_type '{fetch_type}', use one of {sorted(FETCH_TYPES)}")
+    limit = int(spec.get('limit', 10))
+    if limit < 0:
+        raise ValueError("limit must not be negative")
+    value = spec.get('value') or spec.get('search_term', '')
+    if fetch_type == 'mocktails' or fetch_type == 'non_alcoholic':
+        # Mocktails are the alcoholic filter with a fixed value
+        fetch_type, value = 'alcoholic', 'Non_Alcoholic'
+    if fetch_type in FILTER_PARAMS and not value:
+        raise ValueError(f"fetch_type '{fetch_type}' needs a 'value' to filter by")
+    return {'fetch_type': fetch_type, 'limit': limit, 'search_term': spec.get('search_term', ''), 'value': value}
+
+def filter_path(fetch_type: str, value: str) -> str:
+    """filter.php URL path; TheCocktailDB spells spaces as underscores (Cocktail_glass)"""
+    return f"filter.php?{FILTER_PARAMS[fetch_type]}={quote(value.strip().replace(' ', '_'))}"
+
+def list_spec(spec: Dict[str, Any]) -> Tuple[List[Dict[str, Any]], List[str], int]:
+    """
+    The listing step of one spec: (full drinks, drink ids still needing a detail
+    lookup, number of random.php calls to make).
+    """
+    fetch_type, limit = spec['fetch_type'], spec['limit']
+    if fetch_type == 'random':
+        return [], [], limit
+    if fetch_type in FILTER_PARAMS:
+        # The filter endpoint only returns ids (name + thumbnail)
+        data = get_json(filter_path(fetch_type, spec['value']))
+        drinks = (data or {}).get('drinks') or []
+        if not isinstance(drinks, list):  # "None Found"
+            drinks = []
+        return [], [drink['idDrink'] for drink in drinks[:limit]], 0
+    if fetch_type == 'popular':
+        data = get_json("popular.php")
+    else:
+        # Search by name
+        data = get_json(f"search.php?s={spec['search_term'] or 'margarita'}")
+    return ((data or {}).get('drinks') or [])[:limit], [], 0
+
+def lookup_details(drink_ids: Iterable[str], resolved: Set[str], stats: Dict[str, int],
+                   random_calls: int = 0) -> Iterator[Dict[str, Any]]:
+    """
+    The shared detail-lookup stage for every id-only source: ids are
+    de-duplicated, ids already resolved in this run are skipped, and the
+    remaining lookup.php calls (plus any random.php calls) run concurrently
+    through the rate limiter, streamed as they complete. `resolved` is updated
+    with every drink yielded.
+    """
+    drink_ids = list(drink_ids)
+    pending = list(dict.fromkeys(i for i in drink_ids if i not in resolved))
+    stats['duplicates_skipped'] = stats.get('duplicates_skipped', 0) + len(drink_ids) - len(pending)
+    stats['lookups'] = stats.get('lookups', 0) + len(pending)
+    paths = [f"lookup.php?i={drink_id}" for drink_id in pending] + ["random.php"] * random_calls
+    for data in iter_json_many(paths):
+        drink = first_drink(data)
+        if not drink:
+            continue
+        if drink['idDrink'] in resolved:
+            stats['duplicates_skipped'] += 1
+            continue
+        resolved.add(drink['idDrink'])
+        yield drink
+
+def iter_specs(specs: List[Dict[str, Any]], stats: Dict[str, int] = None) -> Iterator[Dict[str, Any]]:
+    """
+    Fetch cocktails for several specs as one stream, each drink once.
+    Listing calls run concurrently; full drinks from listings are yielded
+    first, then every id-only result goes through lookup_details together.
+    """
+    stats = stats if stats is not None else {}
+    stats.setdefault('duplicates_skipped', 0)
+    resolved = set()
+
+    with ThreadPoolExecutor(max_workers=max(1, min(len(specs), rate_limit.MAX_CONCURRENCY))) as pool:
+        listings = list(pool.map(list_spec, specs))
+
+    lookup_ids = []
+    random_calls = 0
+    for drinks, ids, calls in listings:
+        for drink in drinks:
+            if drink['idDrink'] in resolved:
+                stats['duplicates_skipped'] += 1
+                continue
+            resolved.add(drink['idDrink'])
+            yield drink
+        lookup_ids.extend(ids)
+        random_calls += calls
+
+    yield from lookup_details(lookup_ids, resolved, stats, random_calls)
+
+def iter_cocktails(fetch_type: str = 'random', limit: int = 10, search_term: str = '') -> Iterator[Dict[str, Any]]:
+    """
+    Fetch cocktails from TheCocktailDB API, yielding each drink as soon as it arrives
+    """
+    spec = normalize_spec({'fetch_type': fetch_type, 'limit': limit, 'search_term': search_term})
+    return iter_specs([spec])
 
 def fetch_cocktails(fetch_type: str = 'random', limit: int = 10, search_term: str = '') -> List[Dict[str, Any]]:
     """
     Fetch cocktails from TheCocktailDB API
     """
-    cocktails = []
-    
     try:
-        if fetch_type == 'random':
-            # Fetch random cocktails
-            for _ in range(limit):
-                response = requests.get(f"{COCKTAIL_API_BASE}/random.php", timeout=10)
-                if response.status_code == 200:
-                    data = response.json()
-                    if data.get('drinks') and len(data['drinks']) > 0:
-                        cocktails.append(data['drinks'][0])
-        elif fetch_type == 'mocktails' or fetch_type == 'non_alcoholic':
-            # Fetch non-alcoholic drinks (mocktails)
-            response = requests.get(f"{COCKTAIL_API_BASE}/filter.php?a=Non_Alcoholic", timeout=10)
-            if response.status_code == 200:
-                data = response.json()
-                drink_list = data.get('drinks', [])[:limit]
-                # Get full details for each drink
-                for drink in drink_list:
-                    detail_response = requests.get(
-                        f"{COCKTAIL_API_BASE}/lookup.php?i={drink['idDrink']}",
-                        timeout=10
-                    )
-                    if detail_response.status_code == 200:
-                        detail_data = detail_response.json()
-                        if detail_data.get('drinks') and len(detail_data['drinks']) > 0:
-                            cocktails.append(detail_data['drinks'][0])
-        elif fetch_type == 'popular':
-            # Fetch popular cocktails
-            response = requests.get(f"{COCKTAIL_API_BASE}/popular.php", timeout=10)
-            if response.status_code == 200:
-                data = response.json()
-                cocktails = data.get('drinks', [])[:limit]
-        elif fetch_type == 'search':
-            # Search by name
-            search_term = search_term or 'margarita'
-            response = requests.get(f"{COCKTAIL_API_BASE}/search.php?s={search_term}", timeout=10)
-            if response.status_code == 200:
-                data = response.json()
-                cocktails = data.get('drinks', [])[:limit]
+        return list(iter_cocktails(fetch_type, limit, search_term))
     except Exception as e:
         print(f"Error fetching cocktails: {str(e)}")
         raise
-    
-    return cocktails
 
 def transform_cocktail_to_format(cocktail: Dict[str, Any]) -> Dict[str, Any]:
     """
     Transform TheCocktailDB API response to cocktail format
     """
-    # Extract ingredients and measures
-    ingredients = []
-    measures = []
-    for i in range(1, 16):
-        ingredient = cocktail.get(f'strIngredient{i}')
-        measure = cocktail.get(f'strMeasure{i}')
-        if ingredient:
-            ingredients.append(ingredient.strip())
-            if measure:
-                measures.append(measure.strip())
-    
-    # Create ingredients list with measures
-    ingredients_list = []
-    for i, ing in enumerate(ingredients):
-        if i < len(measures):
-            ingredients_list.append(f"{measures[i]} {ing}")
-        else:
-            ingredients_list.append(ing)
+    return records.CocktailRecord.from_api(cocktail).to_dict()
+
+def stream_upload(cocktails: Iterable[records.CocktailRecord], blob_name: str = None, raw_format: str = 'json') -> int:
+    """
+    Write cocktails (as a JSON array, or a msgpack stream) to gs://BUCKET_NAME/blob_name
+    through a resumable upload, one UPLOAD_CHUNK_SIZE chunk at a time, so memory stays
+    flat and fetching overlaps the upload. The upload is only started once
+    the first cocktail arrives (nothing is written for an empty result) and is
+    cancelled on failure so no partial file triggers the transform.
+    Returns the number of cocktails written (counted only if blob_name is None).
+    """
+    count = 0
+    writer = None
+    with telemetry.span('gcs_upload_stream') as span:
+        try:
+            if blob_name is None:
+                for _ in cocktails:
+                    count += 1
+            else:
+                def counted():
+                    nonlocal count
+                    for cocktail in cocktails:
+                        count += 1
+                        yield cocktail
+                for chunk in records.iter_encoded(counted(), raw_format):
+                    if writer is None:
+                        bucket = gcp_clients.get_storage_client().bucket(BUCKET_NAME)
+                        blob = bucket.blob(blob_name, chunk_size=UPLOAD_CHUNK_SIZE)
+                        writer = blob.open('wb', content_type=records.CONTENT_TYPES[raw_format])
+                    writer.write(chunk)
+                    span.add(bytes=len(chunk))
+            if writer is not None:
+                writer.close()
+        except BaseException:
+            if writer is not None and hasattr(writer, 'terminate'):
+                writer.terminate()
+            raise
+        span.add(records=count)
+    return count
+
+def load_direct(cocktails: Iterable[records.CocktailRecord], raw_format: str = 'json') -> Tuple[int, str]:
+    """
+    Direct mode: insert already-transformed records straight into BigQuery
+    (no GCS hop, no transform invocation) while the same batch is archived to
+    gs://BUCKET_NAME/ARCHIVE_PREFIX... in the background for replay. The
+    archive is best effort: the rows are in the warehouse either way.
+    Returns (records loaded, archive path or None).
+    """
+    batch = list(cocktails)
+    if not batch:
+        return 0, None
     
-    # Extract tags
-    tags = []
-    if cocktail.get('strTags'):
-        tags = [tag.strip() for tag in cocktail.get('strTags', '').split(',') if tag.strip()]
+    archive = None
+    archive_name = None
+    if BUCKET_NAME:
+        timestamp = datetime.utcnow().strftime('%Y%m%d_%H%M%S')
+        archive_name = f"{ARCHIVE_PREFIX}cocktails_{timestamp}_direct.{records.FILE_EXTENSIONS[raw_format]}"
+        archive = archiver.submit(stream_upload, batch, archive_name, raw_format)
     
-    transformed = {
-        'cocktail_id': cocktail.get('idDrink', 'UNKNOWN'),
-        'name': cocktail.get('strDrink', 'Unknown Cocktail'),
-        'category': cocktail.get('strCategory'),
-        'alcoholic': cocktail.get('strAlcoholic'),
-        'glass': cocktail.get('strGlass'),
-        'instructions': cocktail.get('strInstructions', ''),
-        'ingredients': ingredients_list,
-        'image_url': cocktail.get('strDrinkThumb'),
-        'tags': tags,
-        'iba': cocktail.get('strIBA'),
-        'video_url': cocktail.get('strVideo'),
-        'source': 'TheCocktailDB',
-        'fetched_at': datetime.utcnow().isoformat()
-    }
+    pair_rows = cooccurrence.batch_deltas(batch)
+    # Stamped at insert time, like transform (not when the fetch started)
+    processed_at = datetime.utcnow().isoformat()
+    rows = [dict(record.to_dict(), processed_at=processed_at) for record in batch]
+    if not warehouse.load_to_bigquery(rows):
+        raise RuntimeError("BigQuery rejected some rows (see log)")
+    cooccurrence.record_deltas(pair_rows)
     
-    return transformed
+    if archive is None:
+        return len(batch), None
+    try:
+        archive.result(timeout=ARCHIVE_WAIT_SECONDS or None)
+    except Exception as e:
+        print(f"Warning: raw archive gs://{BUCKET_NAME}/{archive_name} failed or is still running: {e}")
+        return len(batch), None
+    return len(batch), f"gs://{BUCKET_NAME}/{archive_name}"
 
 @functions_framework.http
+@profiling.profiled('fetch_cocktails', requested=lambda request: request.args.get('profile') in ('1', 'true'))
 def main(request: Request):
     """
     Cloud Function entry point (HTTP trigger)
     Can be called via HTTP request or Cloud Scheduler
     """
     try:
-        # Parse request data
-        if request.method == 'GET':
-            fetch_type = request.args.get('fetch_type', 'random')
-            limit = int(request.args.get('limit', 10))
-            search_term = request.args.get('search_term', '')
-        else:
-            request_json = request.get_json(silent=True) or {}
-            fetch_type = request_json.get('fetch_type', 'random')
-            limit = request_json.get('limit', 10)
-            search_term = request_json.get('search_term', '')
+        # Warm-up ping (e.g. Cloud Scheduler / min-instance keep-alive): resolve
+        # credentials and open connections without fetching anything
+        if request.args.get('warmup') in ('1', 'true'):
+            timings = gcp_clients.warm_up(storage=True, bucket_name=BUCKET_NAME)
+            return {'statusCode': 200, 'body': json.dumps({'message': 'warm', 'timings': timings})}, 200
         
-        print(f"Fetching cocktails: type={fetch_type}, limit={limit}")
+        # Parse request data: one spec (query args / JSON fields) or a bulk
+        # POST body {"specs": [{"fetch_type": ..., "limit": ..., "search_term": ...}, ...]}
+        # mode=direct loads straight into BigQuery instead of going through GCS + transform
+        try:
+            if request.method == 'GET':
+                specs = [request.args]
+                mode = request.args.get('mode', 'upload')
+            else:
+                request_json = request.get_json(silent=True) or {}
+                if not isinstance(request_json, dict):
+                    raise ValueError("Request body must be a JSON object")
+                specs = request_json.get('specs') or [request_json]
+                mode = request_json.get('mode', 'upload')
+            if mode not in ('upload', 'direct'):
+                raise ValueError(f"Unknown mode '{mode}', use 'upload' or 'direct'")
+            if not isinstance(specs, list) or len(specs) > MAX_SPECS:
+                raise ValueError(f"specs must be a list of at most {MAX_SPECS} fetch specs")
+            specs = [normalize_spec(spec) for spec in specs]
+        except (TypeError, ValueError, AttributeError) as e:
+            return {
+                'statusCode': 400,
+                'body': json.dumps({'error': str(e), 'timestamp': datetime.utcnow().isoformat()})
+            }, 400
         
-        # Fetch cocktails from API
-        cocktails = fetch_cocktails(fetch_type=fetch_type, limit=limit, search_term=search_term)
+        for spec in specs:
+            filter_note = f", {spec['fetch_type']}={spec['value']}" if spec['fetch_type'] in FILTER_PARAMS else ""
+            print(f"Fetching cocktails: type={spec['fetch_type']}, limit={spec['limit']}{filter_note}")
         
-        if not cocktails:
+        # Fetch, transform and upload as a pipeline: drinks are formatted as they
+        # arrive, drinks whose content hash matches the latest stored row are
+        # dropped, and the rest stream into a resumable upload (this triggers the transform function).
+        # Direct mode formats and cleans each drink in one pass and loads it itself.
+        direct = mode == 'direct'
+        blob_name = None
+        archive_path = None
+        raw_format = records.raw_format()
+        if BUCKET_NAME and not direct:
+            timestamp = datetime.utcnow().strftime('%Y%m%d_%H%M%S')
+            blob_name = f"cocktails_{timestamp}.{records.FILE_EXTENSIONS[raw_format]}"
+        elif not BUCKET_NAME:
+            print("Warning: BUCKET_NAME not set, skipping GCS upload")
+        
+        fetch_stats = {'unchanged_skipped': 0}
+        try:
+            formatted = (records.CocktailRecord.from_api(c, clean=direct)
+                         for c in iter_specs(specs, fetch_stats))
+            changed = fingerprint.skip_unchanged_batched(formatted, fetch_stats)
+            if direct:
+                count, archive_path = load_direct(changed, raw_format)
+            else:
+                count = stream_upload(changed, blob_name, raw_format)
+        finally:
+            api_calls = cocktaildb.take_stats()
+            print(json.dumps({'event': 'cocktaildb_calls', **api_calls}))
+        
+        unchanged = fetch_stats['unchanged_skipped']
+        if not count and unchanged:
+            print(f"All {unchanged} fetched cocktails unchanged, nothing uploaded")
+            return {
+                'statusCode': 200,
+                'body': json.dumps({
+                    'message': f'No changes: all {unchanged} fetched cocktails match the stored versions',
+                    'count': 0,
+                    'unchanged_skipped': unchanged,
+                    'api_calls': api_calls,
+                    'timestamp': datetime.utcnow().isoformat()
+                })
+            }, 200
+        
+        if not count:
             return {
                 'statusCode': 404,
                 'body': json.dumps({
                     'message': 'No cocktails found',
+                    'api_calls': api_calls,
                     'timestamp': datetime.utcnow().isoformat()
                 })
             }, 404
         
-        # Transform to cocktail format
-        transformed_cocktails = [transform_cocktail_to_format(c) for c in cocktails]
-        
-        # Upload to GCS (this will trigger the transform function)
-        blob_name = None
-        if BUCKET_NAME:
-            bucket = storage_client.bucket(BUCKET_NAME)
-            timestamp = datetime.utcnow().strftime('%Y%m%d_%H%M%S')
-            blob_name = f"cocktails_{timestamp}.json"
-            blob = bucket.blob(blob_name)
-            blob.upload_from_string(
-                json.dumps(transformed_cocktails, indent=2),
-                content_type='application/json'
-            )
-            print(f"Uploaded {len(transformed_cocktails)} cocktails to gs://{BUCKET_NAME}/{blob_name}")
-        else:
-            print("Warning: BUCKET_NAME not set, skipping GCS upload")
+        if blob_name:
+            print(f"Uploaded {count} cocktails to gs://{BUCKET_NAME}/{blob_name}")
         
         return {
             'statusCode': 200,
             'body': json.dumps({
-                'message': f'Successfully fetched and uploaded {len(transformed_cocktails)} cocktails',
-                'count': len(transformed_cocktails),
+                'message': f"Successfully fetched and {'loaded' if direct else 'uploaded'} {count} cocktails",
+                'count': count,
+                'mode': mode,
                 'gcs_path': f"gs://{BUCKET_NAME}/{blob_name}" if BUCKET_NAME and blob_name else None,
+                'archive_path': archive_path,
+                'specs': len(specs),
+                'duplicates_skipped': fetch_stats.get('duplicates_skipped', 0),
+                'unchanged_skipped': unchanged,
+                'detail_lookups': fetch_stats.get('lookups', 0),
+                'api_calls': api_calls,
                 'timestamp': datetime.utcnow().isoformat()
             })
         }, 200
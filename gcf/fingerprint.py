@@ -0,0 +1,131 @@
+#!/usr/bin/env python3
+# 💬 Content Fingerprints
+# Purpose: Stable hash over a cocktail's substantive fields so unchanged re-fetches can be skipped
+#
+# Outputs:
+#   - content_hash column value (32 hex chars), identical for the fetch and transform record shapes
+#   - Latest stored hash per cocktail_id from BigQuery
+#
+# Sample Output:
+#   content_hash('11007' Margarita) -> "3f0c9d1e8a7b6c5d4e3f2a1b0c9d8e7f"
+
+import hashlib
+import json
+import os
+from itertools import islice
+from typing import Any, Dict, Iterable, Iterator, Optional
+
+import gcp_clients
+import telemetry
+
+# Everything except fetched_at/processed_at (and the hash itself)
+SUBSTANTIVE_FIELDS = [
+    'cocktail_id', 'name', 'category', 'alcoholic', 'glass', 'instructions',
+    'ingredients', 'image_url', 'tags', 'iba', 'video_url', 'source',
+]
+LIST_FIELDS = {'ingredients', 'tags'}
+# Drop records whose hash matches the latest stored version (fetch + transform)
+SKIP_UNCHANGED = os.environ.get('SKIP_UNCHANGED', '1') not in ('0', 'false', 'False')
+PROJECT_ID = os.environ.get('PROJECT_ID', '')
+DATASET_ID = os.environ.get('DATASET_ID', 'cocktailverse')
+TABLE_ID = os.environ.get('TABLE_ID', 'cocktails')
+# Fetched records per stored-hash lookup when skipping while streaming
+LOOKUP_BATCH = int(os.environ.get('FINGERPRINT_LOOKUP_BATCH', '500'))
+
+# Same cleaning as transform.validate_field / normalize_ingredients, so both stages hash alike
+def normalize_scalar(value: Any) -> str:
+    if value is None:
+        return ''
+    return value.strip() if type(value) is str else str(value).strip()
+
+def normalize_list(value: Any) -> list:
+    if isinstance(value, str):
+        value = value.split(',')
+    return [str(item).strip() for item in value or [] if item]
+
+_NORMALIZERS = [normalize_list if field in LIST_FIELDS else normalize_scalar for field in SUBSTANTIVE_FIELDS]
+_encode = json.JSONEncoder(ensure_ascii=False, separators=(',', ':')).encode
+
+def hash_values(values: Iterable[Any]) -> str:
+    """content_hash for the substantive field values, in SUBSTANTIVE_FIELDS order"""
+    canonical = _encode([normalize(value) for normalize, value in zip(_NORMALIZERS, values)])
+    return hashlib.blake2b(canonical.encode('utf-8'), digest_size=16).hexdigest()
+
+def content_hash(record: Dict[str, Any]) -> str:
+    """blake2b over the normalized substantive fields (timestamps excluded)"""
+    return hash_values(record.get(field) for field in SUBSTANTIVE_FIELDS)
+
+def latest_hashes(bq_client, table: str, cocktail_ids: Optional[Iterable[str]] = None) -> Dict[str, str]:
+    """
+    cocktail_id -> content_hash of its most recent row (reads two columns only).
+    cocktail_ids restricts the lookup; None loads every cocktail.
+    """
+    from google.cloud import bigquery
+
+    params = []
+    where = "WHERE content_hash IS NOT NULL"
+    if cocktail_ids is not None:
+        params.append(bigquery.ArrayQueryParameter('ids', 'STRING', sorted(set(cocktail_ids))))
+        where += " AND cocktail_id IN UNNEST(@ids)"
+    sql = f"""
+    SELECT cocktail_id, ARRAY_AGG(content_hash ORDER BY processed_at DESC LIMIT 1)[OFFSET(0)] AS content_hash
+    FROM `{table}`
+    {where}
+    GROUP BY cocktail_id
+    """
+    job = bq_client.query(sql, job_config=bigquery.QueryJobConfig(query_parameters=params))
+    return {row['cocktail_id']: row['content_hash'] for row in job.result()}
+
+def load_latest(cocktail_ids: Optional[Iterable[str]] = None) -> Dict[str, str]:
+    """
+    latest_hashes for the configured table; {} (nothing skipped) when skipping
+    is disabled, the table isn't configured or the lookup fails - e.g. before
+    the content_hash column exists.
+    """
+    if not SKIP_UNCHANGED or not PROJECT_ID:
+        return {}
+    if cocktail_ids is not None:
+        cocktail_ids = list(cocktail_ids)
+        if not cocktail_ids:
+            return {}
+    table = f"{PROJECT_ID}.{DATASET_ID}.{TABLE_ID}"
+    try:
+        with telemetry.span('fingerprint_lookup') as span:
+            latest = latest_hashes(gcp_clients.get_bigquery_client(), table, cocktail_ids)
+            span.add(records=len(latest))
+        return latest
+    except Exception as e:
+        print(f"Warning: could not load content hashes from {table}, nothing will be skipped: {e}")
+        return {}
+
+def skip_unchanged(records: Iterable[Dict[str, Any]], latest: Dict[str, str],
+                   stats: Dict[str, int]) -> Iterator[Dict[str, Any]]:
+    """
+    Yield only records whose content_hash differs from the latest stored one;
+    `latest` is updated as records pass, so repeats within a run are dropped too.
+    """
+    stats.setdefault('unchanged_skipped', 0)
+    for record in records:
+        if latest.get(record['cocktail_id']) == record['content_hash']:
+            stats['unchanged_skipped'] += 1
+            continue
+        latest[record['cocktail_id']] = record['content_hash']
+        yield record
+
+def skip_unchanged_batched(records: Iterable[Dict[str, Any]], stats: Dict[str, int],
+                           batch_size: int = LOOKUP_BATCH) -> Iterator[Dict[str, Any]]:
+    """
+    skip_unchanged over a stream: the stored hashes are looked up for the
+    fetched ids only, batch_size records at a time (never a full-table scan),
+    and ids already seen in this run are not looked up again.
+    """
+    latest = {}
+    records = iter(records)
+    while True:
+        batch = list(islice(records, batch_size))
+        if not batch:
+            return
+        unseen = {record['cocktail_id'] for record in batch} - latest.keys()
+        if unseen:
+            latest.update(load_latest(unseen))
+        yield from skip_unchanged(batch, latest, stats)
@@ -0,0 +1,140 @@
+#!/usr/bin/env python3
+# 💬 Handler Profiling
+# Purpose: Opt-in, sampled cProfile + tracemalloc around Cloud Function handler invocations
+#
+# Outputs:
+#   - One JSON log line with the top-N functions (cumulative time) and allocation sites
+#   - Full .prof (pstats) and .tracemalloc snapshot files in PROFILE_OUTPUT (local dir or gs://bucket/prefix)
+#
+# Sample Output:
+#   {"event": "profile", "handler": "transform", "wall_ms": 812.4, "peak_kb": 5321.7, "top_functions": [...], ...}
+
+import cProfile
+import functools
+import io
+import json
+import os
+import pstats
+import random
+import tempfile
+import time
+import tracemalloc
+from contextlib import contextmanager
+from datetime import datetime
+from typing import Callable, Optional
+
+import gcp_clients
+
+# Fraction of invocations profiled (e.g. 0.01 keeps it on at a low rate in production)
+PROFILE_SAMPLE_RATE = float(os.environ.get('PROFILE_SAMPLE_RATE', '0'))
+# Honour per-request opt-in (?profile=1 / object metadata profile=true)
+PROFILE_ALLOW_REQUESTS = os.environ.get('PROFILE_ALLOW_REQUESTS', '1') not in ('0', 'false', 'False')
+PROFILE_TOP_N = int(os.environ.get('PROFILE_TOP_N', '20'))
+PROFILE_OUTPUT = os.environ.get('PROFILE_OUTPUT', os.path.join(tempfile.gettempdir(), 'cocktailverse_profiles'))
+TRACEMALLOC_FRAMES = int(os.environ.get('PROFILE_TRACEMALLOC_FRAMES', '10'))
+
+def should_profile(requested: bool = False) -> bool:
+    if requested and PROFILE_ALLOW_REQUESTS:
+        return True
+    return PROFILE_SAMPLE_RATE > 0 and random.random() < PROFILE_SAMPLE_RATE
+
+def top_functions(profiler: cProfile.Profile, limit: int) -> list:
+    stats = pstats.Stats(profiler, stream=io.StringIO()).sort_stats('cumulative')
+    rows = []
+    for func in stats.fcn_list[:limit]:
+        primitive_calls, total_calls, tottime, cumtime, _ = stats.stats[func]
+        filename, line, name = func
+        rows.append({
+            'function': f"{os.path.basename(filename)}:{line}({name})",
+            'calls': total_calls,
+            'tottime_ms': round(tottime * 1000, 2),
+            'cumtime_ms': round(cumtime * 1000, 2),
+        })
+    return rows
+
+def top_allocations(snapshot: tracemalloc.Snapshot, limit: int) -> list:
+    return [
+        {
+            'site': f"{os.path.basename(stat.traceback[0].filename)}:{stat.traceback[0].lineno}",
+            'size_kb': round(stat.size / 1024, 1),
+            'count': stat.count,
+        }
+        for stat in snapshot.statistics('lineno')[:limit]
+    ]
+
+def save_artifacts(name: str, profiler: cProfile.Profile, snapshot: tracemalloc.Snapshot) -> list:
+    """Write the full profile and allocation snapshot; returns their locations"""
+    stem = f"{name}_{datetime.utcnow().strftime('%Y%m%d_%H%M%S')}_{os.getpid()}"
+    local_dir = PROFILE_OUTPUT
+    if PROFILE_OUTPUT.startswith('gs://'):
+        local_dir = tempfile.mkdtemp(prefix='cocktailverse_profile_')
+    os.makedirs(local_dir, exist_ok=True)
+
+    paths = [os.path.join(local_dir, f"{stem}.prof"), os.path.join(local_dir, f"{stem}.tracemalloc")]
+    profiler.dump_stats(paths[0])
+    snapshot.dump(paths[1])
+    if not PROFILE_OUTPUT.startswith('gs://'):
+        return paths
+
+    bucket_name, _, prefix = PROFILE_OUTPUT[len('gs://'):].partition('/')
+    bucket = gcp_clients.get_storage_client().bucket(bucket_name)
+    locations = []
+    for path in paths:
+        blob_name = f"{prefix.rstrip('/')}/{os.path.basename(path)}".lstrip('/')
+        bucket.blob(blob_name).upload_from_filename(path)
+        locations.append(f"gs://{bucket_name}/{blob_name}")
+        os.unlink(path)
+    return locations
+
+@contextmanager
+def profile(name: str):
+    """Profile the enclosed block (CPU + allocations) and log/dump the results"""
+    started_tracing = not tracemalloc.is_tracing()
+    if started_tracing:
+        tracemalloc.start(TRACEMALLOC_FRAMES)
+    tracemalloc.reset_peak()
+    profiler = cProfile.Profile()
+    start = time.perf_counter()
+    profiler.enable()
+    try:
+        yield
+    finally:
+        profiler.disable()
+        wall_seconds = time.perf_counter() - start
+        snapshot = tracemalloc.take_snapshot()
+        current, peak = tracemalloc.get_traced_memory()
+        if started_tracing:
+            tracemalloc.stop()
+        try:
+            artifacts = save_artifacts(name, profiler, snapshot)
+        except Exception as e:
+            print(f"Warning: could not save profile for {name}: {e}")
+            artifacts = []
+        print(json.dumps({
+            'event': 'profile',
+            'handler': name,
+            'wall_ms': round(wall_seconds * 1000, 2),
+            'peak_kb': round(peak / 1024, 1),
+            'top_functions': top_functions(profiler, PROFILE_TOP_N),
+            'top_allocations': top_allocations(snapshot, PROFILE_TOP_N),
+            'artifacts': artifacts,
+        }))
+
+def profiled(name: str, requested: Optional[Callable[..., bool]] = None):
+    """
+    Decorator for a handler. requested(*args) returns True when the invocation
+    itself asks to be profiled; otherwise PROFILE_SAMPLE_RATE decides.
+    """
+    def decorator(handler):
+        @functools.wraps(handler)
+        def wrapper(*args, **kwargs):
+            try:
+                forced = bool(requested and requested(*args, **kwargs))
+            except Exception:
+                forced = False
+            if not should_profile(forced):
+                return handler(*args, **kwargs)
+            with profile(name):
+                return handler(*args, **kwargs)
+        return wrapper
+    return decorator
@@ -0,0 +1,231 @@
+#!/usr/bin/env python3
+# 💬 TheCocktailDB Rate Limiting
+# Purpose: Keep concurrent fetches fast without getting throttled or banned by the free API
+#
+# Outputs:
+#   - Token bucket (requests/second) + AIMD concurrency limit shared by all fetch threads
+#   - Retries with backoff on 429/5xx/timeouts, optional hedged requests for tail calls
+#   - Per-invocation call counters (requests, retried, throttled, dropped, hedged)
+#
+# Sample Output:
+#   {"event": "cocktaildb_calls", "requests": 52, "ok": 50, "retried": 2, "throttled": 2, "dropped": 0, "concurrency_limit": 6.5}
+
+import os
+import random
+import threading
+import time
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+from typing import Dict, Optional
+
+import requests
+
+RATE_PER_SECOND = float(os.environ.get('COCKTAILDB_RATE', '5'))
+BURST = int(os.environ.get('COCKTAILDB_BURST', '5'))
+MAX_CONCURRENCY = int(os.environ.get('COCKTAILDB_MAX_CONCURRENCY', '8'))
+MAX_RETRIES = int(os.environ.get('COCKTAILDB_MAX_RETRIES', '3'))
+# Hedge a call still running after this latency percentile of recent calls (0 = no hedging)
+HEDGE_PERCENTILE = float(os.environ.get('COCKTAILDB_HEDGE_PERCENTILE', '0'))
+# Hedges may add at most this fraction of extra calls
+HEDGE_BUDGET = 0.1
+REQUEST_TIMEOUT = 10
+RETRY_STATUSES = {429, 500, 502, 503, 504}
+
+class TokenBucket:
+    """Blocking token bucket: at most `rate` calls per second, bursts up to `burst`"""
+
+    def __init__(self, rate: float, burst: int):
+        self.rate = rate
+        self.capacity = max(1, burst)
+        self.tokens = float(self.capacity)
+        self.updated = time.monotonic()
+        self._lock = threading.Lock()
+
+    def acquire(self) -> None:
+        while True:
+            with self._lock:
+                now = time.monotonic()
+                self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.rate)
+                self.updated = now
+                if self.tokens >= 1:
+                    self.tokens -= 1
+                    return
+                wait_seconds = (1 - self.tokens) / self.rate
+            time.sleep(wait_seconds)
+
+    def try_acquire(self) -> bool:
+        """Take a token only if one is available now (never waits)"""
+        with self._lock:
+            now = time.monotonic()
+            self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.rate)
+            self.updated = now
+            if self.tokens >= 1:
+                self.tokens -= 1
+                return True
+            return False
+
+class AIMDLimiter:
+    """
+    Adaptive concurrency: +1 in-flight slot per window of successes (additive
+    increase), halved on a throttle/5xx/timeout (multiplicative decrease).
+    """
+
+    def __init__(self, initial: int = 2, minimum: int = 1, maximum: int = MAX_CONCURRENCY):
+        self.limit = float(min(max(initial, minimum), maximum))
+        self.minimum = minimum
+        self.maximum = maximum
+        self.in_flight = 0
+        self._last_decrease = 0.0
+        self._cond = threading.Condition()
+
+    def acquire(self) -> None:
+        with self._cond:
+            while self.in_flight >= int(self.limit):
+                self._cond.wait()
+            self.in_flight += 1
+
+    def try_acquire(self) -> bool:
+        """Take an in-flight slot only if one is free under the current limit (never waits)"""
+        with self._cond:
+            if self.in_flight >= int(self.limit):
+                return False
+            self.in_flight += 1
+            return True
+
+    def release(self) -> None:
+        with self._cond:
+            self.in_flight -= 1
+            self._cond.notify()
+
+    def on_success(self) -> None:
+        with self._cond:
+            self.limit = min(self.maximum, self.limit + 1 / self.limit)
+            self._cond.notify()
+
+    def on_congestion(self) -> None:
+        with self._cond:
+            # One decrease per burst of failures, not one per failed in-flight call
+            now = time.monotonic()
+            if now - self._last_decrease > 1.0:
+                self.limit = max(self.minimum, self.limit / 2)
+                self._last_decrease = now
+
+class CocktailDBClient:
+    """requests.get behind the token bucket and AIMD limiter, with retries and optional hedging"""
+
+    def __init__(self):
+        self.session = requests.Session()
+        self.bucket = TokenBucket(RATE_PER_SECOND, BURST)
+        self.limiter = AIMDLimiter()
+        self.latencies = []
+        # Primaries wait for a token/slot on their own pool; hedges already hold a limiter
+        # slot when submitted (at most MAX_CONCURRENCY of them), so their pool never queues
+        self._primary_pool = ThreadPoolExecutor(max_workers=MAX_CONCURRENCY) if HEDGE_PERCENTILE else None
+        self._hedge_pool = ThreadPoolExecutor(max_workers=MAX_CONCURRENCY) if HEDGE_PERCENTILE else None
+        self._stats_lock = threading.Lock()
+        self.stats = self._empty_stats()
+
+    @staticmethod
+    def _empty_stats() -> Dict[str, int]:
+        return {'requests': 0, 'ok': 0, 'retried': 0, 'throttled': 0, 'timeouts': 0,
+                'dropped': 0, 'hedged': 0, 'hedge_wins': 0}
+
+    def _count(self, key: str, value: int = 1) -> None:
+        with self._stats_lock:
+            self.stats[key] += value
+
+    def take_stats(self) -> dict:
+        """Counters since the last call (one Cloud Function invocation), plus the current limit"""
+        with self._stats_lock:
+            stats, self.stats = self.stats, self._empty_stats()
+        stats['concurrency_limit'] = round(self.limiter.limit, 2)
+        return stats
+
+    def _hedge_delay(self) -> Optional[float]:
+        with self._stats_lock:
+            recent = sorted(self.latencies[-200:])
+        if not HEDGE_PERCENTILE or len(recent) < 20:
+            return None
+        return recent[min(len(recent) - 1, int(len(recent) * HEDGE_PERCENTILE / 100))]
+
+    def _attempt(self, url: str, started: threading.Event = None) -> requests.Response:
+        """One rate-limited call; raises requests.Timeout / ConnectionError"""
+        self.bucket.acquire()
+        self.limiter.acquire()
+        if started is not None:
+            started.set()
+        return self._send(url)
+
+    def _send(self, url: str) -> requests.Response:
+        """The call itself, holding a token and a limiter slot (released here)"""
+        start = time.perf_counter()
+        try:
+            self._count('requests')
+            response = self.session.get(url, timeout=REQUEST_TIMEOUT)
+        finally:
+            self.limiter.release()
+        with self._stats_lock:
+            self.latencies.append(time.perf_counter() - start)
+            del self.latencies[:-1000]
+        return response
+
+    def _attempt_hedged(self, url: str) -> requests.Response:
+        delay = self._hedge_delay()
+        if delay is None:
+            return self._attempt(url)
+        started = threading.Event()
+        primary = self._primary_pool.submit(self._attempt, url, started)
+        # The hedge timer starts when the call is on the wire, not while it waits for a token
+        while not started.wait(0.05) and not primary.done():
+            pass
+        done, _ = wait([primary], timeout=delay)
+        with self._stats_lock:
+            over_budget = self.stats['hedged'] >= HEDGE_BUDGET * self.stats['requests']
+        if done or over_budget:
+            return primary.result()
+        # A hedge only goes out if the limiter has a free slot and the bucket a token
+        # right now: under throttling (limit halved, bucket drained) nothing is duplicated
+        if not self.limiter.try_acquire():
+            return primary.result()
+        if not self.bucket.try_acquire():
+            self.limiter.release()
+            return primary.result()
+        self._count('hedged')
+        hedge = self._hedge_pool.submit(self._send, url)
+        done, _ = wait([primary, hedge], return_when=FIRST_COMPLETED)
+        winner = done.pop()
+        if winner is hedge:
+            self._count('hedge_wins')
+        return winner.result()
+
+    def get(self, url: str) -> Optional[requests.Response]:
+        """
+        GET with retries on 429/5xx/timeouts (exponential backoff with jitter,
+        Retry-After honoured). Returns the 200 response, or None if the call
+        was dropped (non-retryable status or retries exhausted).
+        """
+        for attempt in range(MAX_RETRIES + 1):
+            if attempt:
+                self._count('retried')
+            try:
+                response = self._attempt_hedged(url)
+            except (requests.Timeout, requests.ConnectionError) as e:
+                self._count('timeouts')
+                self.limiter.on_congestion()
+                print(f"TheCocktailDB call failed ({e.__class__.__name__}): {url}")
+                retry_after = None
+            else:
+                if response.status_code == 200:
+                    self._count('ok')
+                    self.limiter.on_success()
+                    return response
+                if response.status_code not in RETRY_STATUSES:
+                    break
+                self._count('throttled')
+                self.limiter.on_congestion()
+                retry_after = response.headers.get('Retry-After')
+            if attempt < MAX_RETRIES:
+                backoff = float(retry_after) if retry_after and retry_after.isdigit() else 0.5 * 2 ** attempt
+                time.sleep(backoff * random.uniform(0.8, 1.2))
+        self._count('dropped')
+        print(f"Dropped TheCocktailDB call after {attempt + 1} attempt(s): {url}")
+        return None
@@ -0,0 +1,189 @@
+#!/usr/bin/env python3
+# 💬 Cocktail Records
+# Purpose: Compact record type shared by fetch and transform, plus the raw (GCS) intermediate encodings
+#
+# Outputs:
+#   - CocktailRecord: __slots__ record with interned enum-like fields (category, glass, ...)
+#   - Raw object encoding: JSON array (default) or a msgpack stream (RAW_FORMAT=msgpack)
+#
+# Sample Output:
+#   CocktailRecord(cocktail_id='11007', name='Margarita', category='Ordinary Drink', ...)
+
+import importlib.util
+import json
+import operator
+import os
+import sys
+from datetime import datetime
+from typing import Any, Dict, Iterator, List
+
+import fingerprint
+
+# Column order of the BigQuery table (bq/schema.json)
+FIELDS = fingerprint.SUBSTANTIVE_FIELDS + ['fetched_at', 'processed_at', 'content_hash', 'ingredient_names']
+
+# Raw object encoding written by fetch: 'json' or 'msgpack' (needs the msgpack package)
+RAW_FORMAT = os.environ.get('RAW_FORMAT', 'json')
+MSGPACK_AVAILABLE = importlib.util.find_spec('msgpack') is not None
+MSGPACK_HEADER = 'cocktailverse.records'
+FILE_EXTENSIONS = {'json': 'json', 'msgpack': 'msgpack'}
+CONTENT_TYPES = {'json': 'application/json', 'msgpack': 'application/x-msgpack'}
+
+_substantive_values = operator.attrgetter(*fingerprint.SUBSTANTIVE_FIELDS)
+
+def _unchanged(value):
+    return value
+
+def _intern(value):
+    """Low-cardinality values repeat in every record; interned, all records share one string"""
+    return sys.intern(value) if type(value) is str else value
+
+class CocktailRecord:
+    """
+    One cocktail: an attribute per column and no per-instance dict.
+    category/alcoholic/glass/iba/source, tags and ingredient_names are interned.
+    ingredient_names are the bare strIngredientN names (no measures), kept for
+    the co-occurrence table; they aren't part of the content hash.
+    """
+    __slots__ = tuple(FIELDS)
+
+    def __init__(self, cocktail_id: str, name: str, category: str = None, alcoholic: str = None,
+                 glass: str = None, instructions: str = '', ingredients: List[str] = None,
+                 image_url: str = None, tags: List[str] = None, iba: str = None, video_url: str = None,
+                 source: str = 'TheCocktailDB', fetched_at: str = None, processed_at: str = None,
+                 content_hash: str = None, ingredient_names: List[str] = None):
+        self.cocktail_id = cocktail_id
+        self.name = name
+        self.category = _intern(category)
+        self.alcoholic = _intern(alcoholic)
+        self.glass = _intern(glass)
+        self.instructions = instructions
+        self.ingredients = ingredients or []
+        self.image_url = image_url
+        self.tags = [_intern(tag) for tag in tags] if tags else []
+        self.iba = _intern(iba)
+        self.video_url = video_url
+        self.source = _intern(source)
+        self.fetched_at = fetched_at
+        self.processed_at = processed_at
+        self.ingredient_names = [_intern(name) for name in ingredient_names] if ingredient_names else []
+        # Always recomputed from the fields, never trusted from upstream
+        self.content_hash = fingerprint.hash_values(_substantive_values(self))
+
+    @classmethod
+    def from_api(cls, drink: Dict[str, Any], fetched_at: str = None, processed_at: str = None,
+                 clean: bool = None) -> 'CocktailRecord':
+        """
+        Build from a TheCocktailDB drink (strDrink, strIngredient1..15, ...).
+        With clean (default: when processed_at is given) the transform-side
+        cleaning (missing text -> '', stripped, required ids) is applied in the
+        same pass, giving the row transform would load; otherwise the fetch
+        (raw object) shape.
+        """
+        if clean is None:
+            clean = processed_at is not None
+        if not clean:
+            clean = _unchanged
+        else:
+            clean = fingerprint.normalize_scalar
+            if drink.get('idDrink', '') is None or drink.get('strDrink', '') is None:
+                raise ValueError("Required field is missing")
+        names = []
+        measures = []
+        for i in range(1, 16):
+            ingredient = drink.get(f'strIngredient{i}')
+            if ingredient:
+                names.append(ingredient.strip())
+                measure = drink.get(f'strMeasure{i}')
+                if measure:
+                    measures.append(measure.strip())
+        # Measures pair with ingredients by position (same as the original dict transform)
+        ingredients = [f"{measures[i]} {name}" if i < len(measures) else name for i, name in enumerate(names)]
+        tags = drink.get('strTags')
+        return cls(
+            cocktail_id=clean(drink.get('idDrink', 'UNKNOWN')),
+            name=clean(drink.get('strDrink', 'Unknown Cocktail')),
+            category=clean(drink.get('strCategory')),
+            alcoholic=clean(drink.get('strAlcoholic')),
+            glass=clean(drink.get('strGlass')),
+            instructions=clean(drink.get('strInstructions', '')),
+            ingredients=ingredients,
+            image_url=clean(drink.get('strDrinkThumb')),
+            tags=[tag.strip() for tag in tags.split(',') if tag.strip()] if tags else [],
+            iba=clean(drink.get('strIBA')),
+            video_url=clean(drink.get('strVideo')),
+            source='TheCocktailDB',
+            fetched_at=fetched_at or datetime.utcnow().isoformat(),
+            processed_at=processed_at,
+            ingredient_names=names,
+        )
+
+    # Mapping-style access, so code written for the dict shape keeps working
+    def __getitem__(self, field: str):
+        return getattr(self, field)
+
+    def get(self, field: str, default=None):
+        return getattr(self, field, default)
+
+    def to_dict(self) -> Dict[str, Any]:
+        """Dict in column order; processed_at is left out until the record is transformed"""
+        row = {field: getattr(self, field) for field in FIELDS}
+        if row['processed_at'] is None:
+            del row['processed_at']
+        return row
+
+    def to_row(self) -> list:
+        """Values in FIELDS order (the msgpack encoding)"""
+        return [getattr(self, field) for field in FIELDS]
+
+    def __repr__(self) -> str:
+        return f"CocktailRecord(cocktail_id={self.cocktail_id!r}, name={self.name!r}, category={self.category!r}, ...)"
+
+def raw_format(requested: str = None) -> str:
+    """Encoding to write; falls back to JSON if msgpack is requested but not installed"""
+    fmt = requested or RAW_FORMAT
+    if fmt not in FILE_EXTENSIONS:
+        raise ValueError(f"Unknown RAW_FORMAT '{fmt}', use one of {sorted(FILE_EXTENSIONS)}")
+    if fmt == 'msgpack' and not MSGPACK_AVAILABLE:
+        print("Warning: RAW_FORMAT=msgpack but msgpack is not installed, writing JSON")
+        return 'json'
+    return fmt
+
+def iter_encoded(records, fmt: str = 'json') -> Iterator[bytes]:
+    """
+    Encoded chunks for a stream of records. JSON: one array, framed as the
+    records arrive. msgpack: a header map naming the fields, then one array
+    per record (values only, so keys aren't repeated in every record).
+    Nothing is yielded for an empty stream.
+    """
+    packer = None
+    if fmt == 'msgpack':
+        import msgpack
+        packer = msgpack.Packer()
+    first = True
+    for record in records:
+        if packer is not None:
+            chunk = packer.pack(record.to_row())
+            if first:
+                chunk = packer.pack({'format': MSGPACK_HEADER, 'fields': FIELDS}) + chunk
+        else:
+            chunk = (b'[\n' if first else b',\n') + json.dumps(record.to_dict(), indent=2).encode('utf-8')
+        first = False
+        yield chunk
+    if not first and packer is None:
+        yield b'\n]'
+
+def decode_raw(data: bytes, name: str = '') -> List[Dict[str, Any]]:
+    """Parse a raw object (by file extension) into cocktail dicts"""
+    if not name.endswith('.' + FILE_EXTENSIONS['msgpack']):
+        raw = json.loads(data)
+        return [raw] if isinstance(raw, dict) else raw
+
+    import msgpack
+    unpacker = msgpack.Unpacker(raw=False)
+    unpacker.feed(data)
+    header = next(unpacker, None)
+    if not isinstance(header, dict) or header.get('format') != MSGPACK_HEADER:
+        raise ValueError(f"{name} is not a {MSGPACK_HEADER} msgpack stream")
+    fields = header['fields']
+    return [dict(zip(fields, row)) for row in unpacker]
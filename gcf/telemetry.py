@@ -0,0 +1,122 @@
+#!/usr/bin/env python3
+# 💬 Pipeline Telemetry
+# Purpose: Lightweight per-stage timing spans (stdlib only) shared by the Cloud Functions and the API
+#
+# Outputs:
+#   - With TELEMETRY_LOG=1, one structured JSON log line per span (picked up by Cloud Logging
+#     as jsonPayload); off by default so local runs and the API don't log every request
+#   - In-process histograms/counters rendered in Prometheus text format (API /metrics)
+#
+# Sample Output:
+#   {"event": "span", "stage": "cocktaildb_http", "endpoint": "lookup", "duration_ms": 84.2, "bytes": 2311, "status": "ok"}
+
+import json
+import os
+import threading
+import time
+from contextlib import contextmanager
+from typing import Dict, Tuple
+
+LOG_SPANS = os.environ.get('TELEMETRY_LOG', '0') in ('1', 'true', 'True')
+DURATION_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0)
+
+_lock = threading.Lock()
+# (stage, sorted label items) -> [bucket counts..., +Inf count, sum]
+_durations: Dict[Tuple, list] = {}
+# (metric, stage, sorted label items) -> total
+_counters: Dict[Tuple, float] = {}
+
+class Span:
+    """Mutable span record; stages add bytes/records while they run"""
+
+    def __init__(self, stage: str, labels: Dict[str, str]):
+        self.stage = stage
+        self.labels = labels
+        self.bytes = 0
+        self.records = 0
+
+    def add(self, bytes: int = 0, records: int = 0) -> None:
+        self.bytes += int(bytes)
+        self.records += int(records)
+
+def _observe(stage: str, labels: Dict[str, str], seconds: float, span: Span, status: str) -> None:
+    key = (stage, tuple(sorted(labels.items())))
+    with _lock:
+        histogram = _durations.setdefault(key, [0] * (len(DURATION_BUCKETS) + 1) + [0.0])
+        for i, bound in enumerate(DURATION_BUCKETS):
+            if seconds <= bound:
+                histogram[i] += 1
+        histogram[len(DURATION_BUCKETS)] += 1
+        histogram[-1] += seconds
+        for metric, value in (('bytes', span.bytes), ('records', span.records), ('errors', status == 'error')):
+            if value:
+                counter_key = (metric,) + key
+                _counters[counter_key] = _counters.get(counter_key, 0) + value
+
+@contextmanager
+def span(stage: str, **labels):
+    """
+    Time a pipeline stage. Usage:
+        with telemetry.span('gcs_upload') as s:
+            blob.upload_from_string(payload)
+            s.add(bytes=len(payload), records=len(rows))
+    """
+    labels = {k: str(v) for k, v in labels.items()}
+    record = Span(stage, labels)
+    status = 'ok'
+    start = time.perf_counter()
+    try:
+        yield record
+    except BaseException:
+        status = 'error'
+        raise
+    finally:
+        seconds = time.perf_counter() - start
+        _observe(stage, labels, seconds, record, status)
+        if LOG_SPANS:
+            print(json.dumps({
+                'event': 'span',
+                'stage': stage,
+                **labels,
+                'duration_ms': round(seconds * 1000, 2),
+                'bytes': record.bytes,
+                'records': record.records,
+                'status': status,
+            }))
+
+def _label_text(items) -> str:
+    def escape(value) -> str:
+        return str(value).replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n')
+    return ','.join(f'{k}="{escape(v)}"' for k, v in items)
+
+def render_prometheus(prefix: str = 'cocktailverse') -> str:
+    """All recorded spans in Prometheus text exposition format (version 0.0.4)"""
+    lines = [
+        f"# HELP {prefix}_stage_duration_seconds Pipeline stage latency",
+        f"# TYPE {prefix}_stage_duration_seconds histogram",
+    ]
+    with _lock:
+        durations = {k: list(v) for k, v in _durations.items()}
+        counters = dict(_counters)
+    for (stage, items), histogram in sorted(durations.items()):
+        labels = _label_text((('stage', stage),) + items)
+        for bound, count in zip(DURATION_BUCKETS, histogram):
+            lines.append(f'{prefix}_stage_duration_seconds_bucket{{{labels},le="{bound}"}} {count}')
+        lines.append(f'{prefix}_stage_duration_seconds_bucket{{{labels},le="+Inf"}} {histogram[len(DURATION_BUCKETS)]}')
+        lines.append(f'{prefix}_stage_duration_seconds_sum{{{labels}}} {histogram[-1]:.6f}')
+        lines.append(f'{prefix}_stage_duration_seconds_count{{{labels}}} {histogram[len(DURATION_BUCKETS)]}')
+    for metric, help_text in (('bytes', 'Bytes moved by pipeline stage'),
+                              ('records', 'Records handled by pipeline stage'),
+                              ('errors', 'Failed pipeline stage runs')):
+        lines.append(f"# HELP {prefix}_stage_{metric}_total {help_text}")
+        lines.append(f"# TYPE {prefix}_stage_{metric}_total counter")
+        for (name, stage, items), value in sorted(counters.items()):
+            if name == metric:
+                lines.append(f'{prefix}_stage_{metric}_total{{{_label_text((("stage", stage),) + items)}}} {value:g}')
+    return '\n'.join(lines) + '\n'
+
+def reset() -> None:
+    """Clear all recorded metrics (benchmarks / local runs)"""
+    with _lock:
+        _durations.clear()
+        _counters.clear()
@@ -12,49 +12,61 @@ import json
 import os
 from datetime import datetime
 from typing import Dict, Any, List
-from google.cloud import storage
-from google.cloud import bigquery
-
-# Initialize GCP clients
-storage_client = storage.Client()
-bq_client = bigquery.Client()
+import cooccurrence
+import fingerprint
+import gcp_clients
+import profiling
+import records
+import telemetry
+from warehouse import load_to_bigquery
 
 # Environment variables
 PROJECT_ID = os.environ.get('PROJECT_ID', '')
 DATASET_ID = os.environ.get('DATASET_ID', 'cocktailverse')
 TABLE_ID = os.environ.get('TABLE_ID', 'cocktails')
 BUCKET_NAME = os.environ.get('BUCKET_NAME', '')
+# Raw payloads archived by the fetch function's direct mode (already loaded); copy one
+# outside this prefix to replay it through the transform
+ARCHIVE_PREFIX = os.environ.get('ARCHIVE_PREFIX', 'archive/')
 
-def transform_cocktail_data(raw_data: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+# GCP clients are created on first use; optionally warm them up in the background now
+gcp_clients.warm_up_in_background(storage=True, bigquery=True)
+
+def transform_cocktail_records(raw_data: List[Dict[str, Any]]) -> List[records.CocktailRecord]:
     """
     Transform and validate cocktail data
-    Normalizes fields, validates required data, adds timestamps
+    Normalizes fields, validates required data, adds timestamps and the content hash
     """
     # Handle both single object and array
     if isinstance(raw_data, dict):
         raw_data = [raw_data]
     
+    processed_at = datetime.utcnow().isoformat()
     transformed = []
     for cocktail in raw_data:
-        transformed_cocktail = {
-            'cocktail_id': validate_field(cocktail.get('cocktail_id'), required=True),
-            'name': validate_field(cocktail.get('name'), required=True),
-            'category': validate_field(cocktail.get('category')),
-            'alcoholic': validate_field(cocktail.get('alcoholic')),
-            'glass': validate_field(cocktail.get('glass')),
-            'instructions': validate_field(cocktail.get('instructions')),
-            'ingredients': normalize_ingredients(cocktail.get('ingredients', [])),
-            'image_url': validate_field(cocktail.get('image_url')),
-            'tags': normalize_tags(cocktail.get('tags', [])),
-            'iba': validate_field(cocktail.get('iba')),
-            'video_url': validate_field(cocktail.get('video_url')),
-            'source': validate_field(cocktail.get('source'), required=True),
-            'fetched_at': normalize_timestamp(cocktail.get('fetched_at')),
-            'processed_at': datetime.utcnow().isoformat()
-        }
-        transformed.append(transformed_cocktail)
+        transformed.append(records.CocktailRecord(
+            cocktail_id=validate_field(cocktail.get('cocktail_id'), required=True),
+            name=validate_field(cocktail.get('name'), required=True),
+            category=validate_field(cocktail.get('category')),
+            alcoholic=validate_field(cocktail.get('alcoholic')),
+            glass=validate_field(cocktail.get('glass')),
+            instructions=validate_field(cocktail.get('instructions')),
+            ingredients=normalize_ingredients(cocktail.get('ingredients', [])),
+            image_url=validate_field(cocktail.get('image_url')),
+            tags=normalize_tags(cocktail.get('tags', [])),
+            iba=validate_field(cocktail.get('iba')),
+            video_url=validate_field(cocktail.get('video_url')),
+            source=validate_field(cocktail.get('source'), required=True),
+            fetched_at=normalize_timestamp(cocktail.get('fetched_at')),
+            processed_at=processed_at,
+            ingredient_names=normalize_ingredients(cocktail.get('ingredient_names', []))
+        ))
     return transformed
 
+def transform_cocktail_data(raw_data: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+    """transform_cocktail_records as plain dicts (BigQuery row shape)"""
+    return [record.to_dict() for record in transform_cocktail_records(raw_data)]
+
 def validate_field(field_value: Any, required: bool = False) -> str:
     """Validate and clean field values"""
     if field_value is None:
@@ -95,23 +107,11 @@ def normalize_timestamp(timestamp_str: str) -> str:
     except (ValueError, AttributeError):
         return timestamp_str
 
-def load_to_bigquery(data: List[Dict[str, Any]]) -> bool:
-    """Load transformed data into BigQuery"""
-    try:
-        dataset_ref = bq_client.dataset(DATASET_ID)
-        table_ref = dataset_ref.table(TABLE_ID)
-        
-        # Insert rows
-        errors = bq_client.insert_rows_json(table_ref, data)
-        if errors:
-            print(f"Errors inserting rows: {errors}")
-            return False
-        print(f"Successfully loaded {len(data)} records to BigQuery")
-        return True
-    except Exception as e:
-        print(f"Error loading to BigQuery: {e}")
-        raise
+def profile_requested(cloud_event) -> bool:
+    """Raw objects uploaded with custom metadata profile=true are profiled"""
+    return (cloud_event.data.get('metadata') or {}).get('profile') == 'true'
 
+@profiling.profiled('transform', requested=profile_requested)
 def main(cloud_event):
     """
     Cloud Function entry point (Gen2)
@@ -127,26 +127,51 @@ def main(cloud_event):
             print("No file name in event data")
             return {'statusCode': 400, 'body': 'No file name provided'}
         
+        if ARCHIVE_PREFIX and file_name.startswith(ARCHIVE_PREFIX):
+            print(f"Skipping archived raw payload gs://{bucket_name}/{file_name} (loaded directly)")
+            return {'statusCode': 200, 'body': json.dumps({'message': 'Archived payload, not processed'})}
+        
         print(f"Processing file: gs://{bucket_name}/{file_name}")
         
         # Download raw data from GCS
-        bucket = storage_client.bucket(bucket_name)
+        bucket = gcp_clients.get_storage_client().bucket(bucket_name)
         blob = bucket.blob(file_name)
-        raw_data = json.loads(blob.download_as_text())
+        with telemetry.span('gcs_download') as span:
+            raw_bytes = blob.download_as_bytes()
+            span.add(bytes=len(raw_bytes))
+        with telemetry.span('raw_parse') as span:
+            # JSON, or a msgpack stream for *.msgpack objects (RAW_FORMAT=msgpack in fetch)
+            raw_data = records.decode_raw(raw_bytes, file_name)
+            span.add(records=len(raw_data))
         
         # Transform data (handles both array and single object internally)
-        transformed_data = transform_cocktail_data(raw_data)
+        with telemetry.span('transform_cocktail_data') as span:
+            transformed_data = transform_cocktail_records(raw_data)
+            span.add(records=len(transformed_data))
+        
+        # Drop records identical to their latest stored version (files written
+        # before fetch-side skipping, re-uploads, or concurrent fetches)
+        skip_stats = {}
+        latest = fingerprint.load_latest(record['cocktail_id'] for record in transformed_data)
+        changed_data = list(fingerprint.skip_unchanged(transformed_data, latest, skip_stats))
         
-        # Load to BigQuery
-        load_to_bigquery(transformed_data)
+        # Load to BigQuery, then the batch's ingredient-pair deltas (previous
+        # versions are read before the insert)
+        pair_rows = cooccurrence.batch_deltas(changed_data)
+        if changed_data:
+            if load_to_bigquery([record.to_dict() for record in changed_data]):
+                cooccurrence.record_deltas(pair_rows)
         
-        print(f"Successfully processed {len(transformed_data)} records")
+        print(f"Successfully processed {len(transformed_data)} records "
+              f"({skip_stats['unchanged_skipped']} unchanged, not loaded)")
         
         return {
             'statusCode': 200,
             'body': json.dumps({
                 'message': 'Data transformed successfully',
                 'processed_records': len(transformed_data),
+                'loaded_records': len(changed_data),
+                'unchanged_skipped': skip_stats['unchanged_skipped'],
                 'timestamp': datetime.utcnow().isoformat()
             })
         }
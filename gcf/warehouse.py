@@ -0,0 +1,39 @@
+#!/usr/bin/env python3
+# 💬 Warehouse Loader
+# Purpose: Streaming inserts into the cocktails BigQuery table, shared by the transform
+#          function and the fetch function's direct mode
+#
+# Outputs:
+#   - Rows inserted into PROJECT_ID.DATASET_ID.TABLE_ID
+#
+# Sample Output:
+#   Successfully loaded 3 records to BigQuery
+
+import os
+from typing import Any, Dict, List
+
+import gcp_clients
+import telemetry
+
+DATASET_ID = os.environ.get('DATASET_ID', 'cocktailverse')
+TABLE_ID = os.environ.get('TABLE_ID', 'cocktails')
+
+def load_to_bigquery(data: List[Dict[str, Any]]) -> bool:
+    """Load transformed data into BigQuery"""
+    try:
+        bq_client = gcp_clients.get_bigquery_client()
+        dataset_ref = bq_client.dataset(DATASET_ID)
+        table_ref = dataset_ref.table(TABLE_ID)
+
+        # Insert rows
+        with telemetry.span('load_to_bigquery') as span:
+            errors = bq_client.insert_rows_json(table_ref, data)
+            span.add(records=len(data))
+        if errors:
+            print(f"Errors inserting rows: {errors}")
+            return False
+        print(f"Successfully loaded {len(data)} records to BigQuery")
+        return True
+    except Exception as e:
+        print(f"Error loading to BigQuery: {e}")
+        raise
@@ -19,6 +19,9 @@ PROJECT_ID=${PROJECT_ID:-""}
 REGION=${REGION:-"us-central1"}
 FUNCTION_NAME="cocktailverse-fetch-cocktails"  # Fixed name for fetch function
 BUCKET_NAME=${BUCKET_NAME:-"cocktailverse-raw-${PROJECT_ID}"}
+DATASET_ID=${DATASET_ID:-"cocktailverse"}
+TABLE_ID=${TABLE_ID:-"cocktails"}
+PAIRS_TABLE_ID=${PAIRS_TABLE_ID:-"ingredient_pairs"}
 
 if [ -z "$PROJECT_ID" ]; then
     echo "❌ Error: PROJECT_ID not set"
@@ -52,7 +55,7 @@ gcloud functions deploy $FUNCTION_NAME \
     --entry-point=main \
     --trigger-http \
     --no-allow-unauthenticated \
-    --set-env-vars="PROJECT_ID=$PROJECT_ID,BUCKET_NAME=$BUCKET_NAME" \
+    --set-env-vars="PROJECT_ID=$PROJECT_ID,DATASET_ID=$DATASET_ID,TABLE_ID=$TABLE_ID,PAIRS_TABLE_ID=$PAIRS_TABLE_ID,BUCKET_NAME=$BUCKET_NAME,WARM_UP_ON_IMPORT=1,TELEMETRY_LOG=1" \
     --memory=256MB \
     --timeout=540s \
     --min-instances=0 \
@@ -20,6 +20,7 @@ REGION=${REGION:-"us-central1"}
 FUNCTION_NAME=${FUNCTION_NAME:-"cocktailverse-transform"}
 DATASET_ID=${DATASET_ID:-"cocktailverse"}
 TABLE_ID=${TABLE_ID:-"cocktails"}
+PAIRS_TABLE_ID=${PAIRS_TABLE_ID:-"ingredient_pairs"}
 BUCKET_NAME=${BUCKET_NAME:-"cocktailverse-raw-${PROJECT_ID}"}
 
 if [ -z "$PROJECT_ID" ]; then
@@ -49,12 +50,32 @@ gcloud services enable storage.googleapis.com
 echo "Setting up BigQuery dataset..."
 bq show $PROJECT_ID:$DATASET_ID 2>/dev/null || bq mk --dataset --location=US $PROJECT_ID:$DATASET_ID
 
-# Create BigQuery table from schema
+# Create BigQuery table from schema (or add new nullable columns, e.g. content_hash, to an existing one)
 echo "Creating BigQuery table..."
-bq show $PROJECT_ID:$DATASET_ID.$TABLE_ID 2>/dev/null || \
+if bq show $PROJECT_ID:$DATASET_ID.$TABLE_ID >/dev/null 2>&1; then
+    bq update $PROJECT_ID:$DATASET_ID.$TABLE_ID bq/schema.json
+else
     bq mk --table \
         --schema=bq/schema.json \
         $PROJECT_ID:$DATASET_ID.$TABLE_ID
+fi
+
+# Ingredient co-occurrence deltas, appended by every load batch. If the cocktails table
+# already has rows, seed it once with `cd gcf && python cooccurrence.py --backfill`; rows
+# loaded before the ingredient_names column aren't counted until they are re-fetched
+# (one fetch with SKIP_UNCHANGED=0 reloads them all)
+echo "Creating ingredient pairs table..."
+bq show $PROJECT_ID:$DATASET_ID.$PAIRS_TABLE_ID >/dev/null 2>&1 || bq mk --table \
+    --schema=bq/ingredient_pairs_schema.json \
+    --clustering_fields=ingredient_a,ingredient_b \
+    $PROJECT_ID:$DATASET_ID.$PAIRS_TABLE_ID
+
+# Compacted pair totals, rebuilt from the deltas every PAIRS_COMPACT_INTERVAL_SECONDS
+# by the next load (or now with `cd gcf && python cooccurrence.py --compact`)
+bq show $PROJECT_ID:$DATASET_ID.${PAIRS_TABLE_ID}_totals >/dev/null 2>&1 || bq mk --table \
+    --schema=bq/ingredient_pair_totals_schema.json \
+    --clustering_fields=ingredient_a,ingredient_b \
+    $PROJECT_ID:$DATASET_ID.${PAIRS_TABLE_ID}_totals
 
 # Deploy Cloud Function
 echo "Deploying Cloud Function..."
@@ -65,7 +86,7 @@ gcloud functions deploy $FUNCTION_NAME \
     --source=gcf \
     --entry-point=cloud_function_handler \
     --trigger-bucket=$BUCKET_NAME \
-    --set-env-vars="PROJECT_ID=$PROJECT_ID,DATASET_ID=$DATASET_ID,TABLE_ID=$TABLE_ID,BUCKET_NAME=$BUCKET_NAME" \
+    --set-env-vars="PROJECT_ID=$PROJECT_ID,DATASET_ID=$DATASET_ID,TABLE_ID=$TABLE_ID,PAIRS_TABLE_ID=$PAIRS_TABLE_ID,BUCKET_NAME=$BUCKET_NAME,WARM_UP_ON_IMPORT=1,TELEMETRY_LOG=1" \
     --memory=256MB \
     --timeout=540s \
     --min-instances=0 \
@@ -3,24 +3,139 @@
 🔐 Universal Secret Getter
 Works in both sandboxed and non-sandboxed environments
 
+Secret files are parsed once and kept in a cache; a file is re-read only
+when its mtime (or size) changes, so resolving many keys at startup costs
+one stat per file instead of one parse per key.
+
 Usage:
-    from scripts.get_secret import get_secret
+    from scripts.get_secret import get_secret, get_secrets
     api_key = get_secret('GOOGLE_MAPS_API_KEY')
+    settings = get_secrets(['PROJECT_ID', 'DATASET_ID', 'TABLE_ID'])
 """
 
 import os
+import stat
+import threading
 from pathlib import Path
-from typing import Optional
+from typing import Dict, Iterable, List, Optional, Tuple
+
+def _secret_paths() -> List[Path]:
+    """Secret files get_secret searches, in order of preference"""
+    return [
+        Path.home() / '.config' / 'secrets' / 'global.env',
+        Path.home() / '.secrets' / 'global.env',
+        Path.cwd() / '.env',
+        Path.cwd() / '.env.local',
+        Path.cwd().parent / '.env',
+        Path.cwd().parent / '.env.local',
+    ]
+
+def _bulk_paths() -> List[Path]:
+    """Secret files load_all_secrets considers (the first readable one wins)"""
+    return _secret_paths()[:4]
+
+def _parse_env_file(secret_file: Path) -> List[Tuple[str, str]]:
+    """(key, value) pairs of a .env-style file, in file order"""
+    pairs = []
+    with open(secret_file, 'r') as f:
+        for line in f:
+            line = line.strip()
+            # Skip comments and empty lines
+            if not line or line.startswith('#'):
+                continue
+            # Parse key=value
+            if '=' in line:
+                file_key, file_value = line.split('=', 1)
+                pairs.append((file_key.strip(), file_value.strip().strip('"').strip("'")))
+    return pairs
+
+class SecretResolver:
+    """
+    Cache of parsed secret files plus a merged index over a search list.
+
+    Each file is stamped with (mtime, size); it is re-parsed only when the
+    stamp changes. The merged index (earlier files win, and within a file
+    the first occurrence wins) is rebuilt only when a stamp in the search
+    list changes.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._files = {}    # path -> (stamp, first-wins dict, last-wins dict) or (stamp, None, None) if unreadable
+        self._merged = {}   # tuple of paths -> (stamps, merged index)
+
+    def _stamp(self, path: Path):
+        try:
+            st = os.stat(path)
+        except OSError:
+            return None
+        if not stat.S_ISREG(st.st_mode):
+            return None
+        return (st.st_mtime_ns, st.st_size)
+
+    def _file(self, path: Path, stamp):
+        """Parsed entry for path at this stamp (re-read only if the stamp changed)"""
+        cached = self._files.get(path)
+        if cached is not None and cached[0] == stamp:
+            return cached
+        try:
+            pairs = _parse_env_file(path)
+            first = {}
+            for key, value in pairs:
+                first.setdefault(key, value)
+            entry = (stamp, first, dict(pairs))
+        except (IOError, PermissionError):
+            # Can't read file (sandboxed?); remembered until the file changes
+            entry = (stamp, None, None)
+        self._files[path] = entry
+        return entry
+
+    def index(self, paths: Iterable[Path]) -> Dict[str, str]:
+        """Merged, precedence-ordered key -> value index over paths"""
+        paths = tuple(paths)
+        stamps = tuple(self._stamp(path) for path in paths)
+        with self._lock:
+            cached = self._merged.get(paths)
+            if cached is not None and cached[0] == stamps:
+                return cached[1]
+            merged = {}
+            for path, stamp in zip(paths, stamps):
+                if stamp is None:
+                    continue
+                _, first, _ = self._file(path, stamp)
+                for key, value in (first or {}).items():
+                    merged.setdefault(key, value)
+            self._merged[paths] = (stamps, merged)
+            return merged
+
+    def first_readable(self, paths: Iterable[Path]) -> Dict[str, str]:
+        """All key/value pairs of the first existing, readable file (later duplicates win)"""
+        with self._lock:
+            for path in paths:
+                stamp = self._stamp(path)
+                if stamp is None:
+                    continue
+                _, _, last = self._file(path, stamp)
+                if last is not None:
+                    return dict(last)
+        return {}
+
+    def clear(self) -> None:
+        with self._lock:
+            self._files.clear()
+            self._merged.clear()
+
+_resolver = SecretResolver()
 
 def get_secret(key: str, default: Optional[str] = None) -> Optional[str]:
     """
     Get secret from environment variable or secret files.
     Tries multiple locations to work in both sandboxed and non-sandboxed environments.
-    
+
     Args:
         key: Environment variable name
         default: Default value if not found
-        
+
     Returns:
         Secret value or default
     """
@@ -28,73 +143,28 @@ def get_secret(key: str, default: Optional[str] = None) -> Optional[str]:
     value = os.getenv(key)
     if value:
         return value
-    
-    # Try loading from secret files (in order of preference)
-    secret_paths = [
-        Path.home() / '.config' / 'secrets' / 'global.env',
-        Path.home() / '.secrets' / 'global.env',
-        Path.cwd() / '.env',
-        Path.cwd() / '.env.local',
-        Path.cwd().parent / '.env',
-        Path.cwd().parent / '.env.local',
-    ]
-    
-    for secret_file in secret_paths:
-        if secret_file.exists() and secret_file.is_file():
-            try:
-                # Parse .env file format (key=value)
-                with open(secret_file, 'r') as f:
-                    for line in f:
-                        line = line.strip()
-                        # Skip comments and empty lines
-                        if not line or line.startswith('#'):
-                            continue
-                        # Parse key=value
-                        if '=' in line:
-                            file_key, file_value = line.split('=', 1)
-                            file_key = file_key.strip()
-                            file_value = file_value.strip().strip('"').strip("'")
-                            if file_key == key:
-                                return file_value
-            except (IOError, PermissionError):
-                # Can't read file (sandboxed?), continue to next
-                continue
-    
-    # Not found anywhere
-    return default
+
+    # Then the merged index of the secret files (in order of preference)
+    return _resolver.index(_secret_paths()).get(key, default)
+
+def get_secrets(keys: Iterable[str], default: Optional[str] = None) -> Dict[str, Optional[str]]:
+    """
+    Bulk get_secret: resolve several keys with one pass over the secret files.
+    Returns dict of key -> value (or default).
+    """
+    index = _resolver.index(_secret_paths())
+    return {key: os.getenv(key) or index.get(key, default) for key in keys}
 
 def load_all_secrets() -> dict:
     """
     Load all secrets from the first available secret file.
     Returns dict of key-value pairs.
     """
-    secrets = {}
-    
-    secret_paths = [
-        Path.home() / '.config' / 'secrets' / 'global.env',
-        Path.home() / '.secrets' / 'global.env',
-        Path.cwd() / '.env',
-        Path.cwd() / '.env.local',
-    ]
-    
-    for secret_file in secret_paths:
-        if secret_file.exists() and secret_file.is_file():
-            try:
-                with open(secret_file, 'r') as f:
-                    for line in f:
-                        line = line.strip()
-                        if not line or line.startswith('#'):
-                            continue
-                        if '=' in line:
-                            key, value = line.split('=', 1)
-                            key = key.strip()
-                            value = value.strip().strip('"').strip("'")
-                            secrets[key] = value
-                return secrets
-            except (IOError, PermissionError):
-                continue
-    
-    return secrets
+    return _resolver.first_readable(_bulk_paths())
+
+def clear_secret_cache() -> None:
+    """Forget parsed files (they are re-read on next use)"""
+    _resolver.clear()
 
 # Example usage
 if __name__ == '__main__':
@@ -115,4 +185,3 @@ if __name__ == '__main__':
                 print(f"{key}=***")
             else:
                 print(f"{key}={value}")
-
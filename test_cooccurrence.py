@@ -0,0 +1,218 @@
+#!/usr/bin/env python3
+"""
+🍸 Ingredient co-occurrence tests
+Pair keying, legacy rows and backfill for gcf/cooccurrence.py (no GCP access needed)
+"""
+
+import os
+import sys
+from collections import Counter
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), 'gcf'))
+
+import cooccurrence
+import records
+
+class FakeBigQuery:
+    """Answers the backfill queries from in-memory cocktail rows and captures inserted deltas"""
+
+    def __init__(self, cocktails):
+        self.cocktails = cocktails
+        self.inserted = {}
+
+    def query(self, sql, job_config=None):
+        if 'COUNT(*)' in sql:
+            return FakeJob([{'n': 0}])
+        latest = {}
+        for row in sorted(self.cocktails, key=lambda row: row['processed_at']):
+            latest[row['cocktail_id']] = row
+        return FakeJob([{'cocktail_id': cocktail_id, 'ingredient_names': row.get('ingredient_names')}
+                        for cocktail_id, row in latest.items()])
+
+    def insert_rows_json(self, table, rows):
+        self.inserted.setdefault(table, []).extend(rows)
+        return []
+
+class FakeJob:
+    def __init__(self, rows):
+        self.rows = rows
+
+    def result(self):
+        return iter(self.rows)
+
+def pair_counts(rows):
+    counts = Counter()
+    for row in rows:
+        counts[(row['ingredient_a'], row['ingredient_b'])] += row['delta']
+    return counts
+
+def test_pairs_keyed_on_raw_ingredient_names():
+    drink = {'idDrink': '1', 'strDrink': 'Mimosa',
+             'strIngredient1': 'Champagne', 'strMeasure1': 'Chilled ',
+             'strIngredient2': 'Orange  Juice', 'strMeasure2': 'to taste'}
+    record = records.CocktailRecord.from_api(drink, clean=True)
+    assert record.ingredients == ['Chilled Champagne', 'to taste Orange  Juice']
+    assert cooccurrence.ingredient_set(record.ingredient_names) == ['champagne', 'orange juice']
+
+def test_backfill_leaves_legacy_rows_out_of_the_total(monkeypatch):
+    legacy = {'cocktail_id': '1', 'processed_at': '2025-01-01T00:00:00',
+              'ingredients': ['2 oz Gin', '1 oz Lime Juice'], 'ingredient_names': None}
+    named = {'cocktail_id': '2', 'processed_at': '2025-01-02T00:00:00',
+             'ingredients': ['2 oz Gin', 'Top Tonic'], 'ingredient_names': ['Gin', 'Tonic']}
+    client = FakeBigQuery([legacy, named])
+    monkeypatch.setattr(cooccurrence.gcp_clients, 'get_bigquery_client', lambda: client)
+    monkeypatch.setattr(cooccurrence, 'PROJECT_ID', 'p')
+
+    cooccurrence.backfill()
+
+    counts = pair_counts(client.inserted['p.cocktailverse.ingredient_pairs'])
+    assert counts == {('', ''): 1, ('gin', 'gin'): 1, ('tonic', 'tonic'): 1, ('gin', 'tonic'): 1}
+
+def test_refetched_legacy_row_joins_the_total():
+    previous = {'1': []}
+    record = records.CocktailRecord.from_api(
+        {'idDrink': '1', 'strDrink': 'Gimlet', 'strIngredient1': 'Gin', 'strIngredient2': 'Lime Juice'}, clean=True)
+    counts = cooccurrence.batch_counts([record], previous)
+    assert +counts == {('', ''): 1, ('gin', 'gin'): 1, ('lime juice', 'lime juice'): 1, ('gin', 'lime juice'): 1}
+
+class CompactionClient:
+    """Returns the given compaction script result (or raises it) and records every statement"""
+
+    def __init__(self, outcome):
+        self.outcome = outcome
+        self.statements = []
+
+    def query(self, sql, job_config=None):
+        self.statements.append(sql)
+        if 'BEGIN TRANSACTION' in sql and isinstance(self.outcome, Exception):
+            raise self.outcome
+        return FakeJob([self.outcome] if 'BEGIN TRANSACTION' in sql else [])
+
+    def get_table(self, table):
+        return type('Table', (), {'num_rows': 3, 'modified': None})
+
+def test_compaction_cancelled_by_a_concurrent_run_deletes_nothing(monkeypatch):
+    client = CompactionClient(RuntimeError("Transaction is aborted due to concurrent update"))
+    monkeypatch.setattr(cooccurrence.gcp_clients, 'get_bigquery_client', lambda: client)
+    monkeypatch.setattr(cooccurrence, 'PROJECT_ID', 'p')
+
+    assert cooccurrence.compact_if_due() == 0
+    assert len(client.statements) == 1
+    assert not any(statement.lstrip().startswith('DELETE') for statement in client.statements)
+
+def test_compaction_drops_only_deltas_the_previous_run_covered(monkeypatch):
+    client = CompactionClient({'since': 1700000000, 'compacted': True})
+    monkeypatch.setattr(cooccurrence.gcp_clients, 'get_bigquery_client', lambda: client)
+    monkeypatch.setattr(cooccurrence, 'PROJECT_ID', 'p')
+
+    assert cooccurrence.compact() == 3
+    assert client.statements[-1] == (
+        "DELETE FROM `p.cocktailverse.ingredient_pairs` WHERE batch_at <= TIMESTAMP_SECONDS(1700000000)")
+
+def test_compaction_not_due_changes_nothing(monkeypatch):
+    client = CompactionClient({'since': 1700000000, 'compacted': False})
+    monkeypatch.setattr(cooccurrence.gcp_clients, 'get_bigquery_client', lambda: client)
+    monkeypatch.setattr(cooccurrence, 'PROJECT_ID', 'p')
+
+    assert cooccurrence.compact() == 0
+    assert len(client.statements) == 1
+
+# --- Delta + totals tables against a full recount (DuckDB stand-in for BigQuery) ---
+
+SAMPLE_DATA = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'data', 'raw', 'sample_data.json')
+NAMES = ['Gin', 'Vodka', 'Lime Juice', 'Orange  juice', 'Sugar', 'Mint', 'Soda Water', 'Tonic']
+
+def local_pair_tables():
+    from cocktailverse import analytics
+
+    warehouse = analytics.LocalWarehouse([SAMPLE_DATA])
+    warehouse.connection.execute(
+        "CREATE TABLE ingredient_pairs (ingredient_a VARCHAR, ingredient_b VARCHAR, delta BIGINT, batch_at TIMESTAMPTZ)")
+    warehouse.connection.execute(
+        "CREATE TABLE ingredient_pairs_totals "
+        "(ingredient_a VARCHAR, ingredient_b VARCHAR, total BIGINT, compacted_through TIMESTAMPTZ)")
+    return warehouse
+
+def load_batch(warehouse, batch, previous, batch_at):
+    for (a, b), delta in cooccurrence.batch_counts(batch, previous).items():
+        if delta:
+            warehouse.connection.execute("INSERT INTO ingredient_pairs VALUES (?, ?, ?, to_timestamp(?))",
+                                         [a, b, delta, batch_at])
+
+def compact_locally(warehouse, through):
+    """compaction_script's transaction, step by step"""
+    since = warehouse.connection.execute(
+        "SELECT epoch(MAX(compacted_through))::BIGINT FROM ingredient_pairs_totals").fetchone()[0]
+    select = cooccurrence.compacted_totals_sql(
+        'ingredient_pairs', 'ingredient_pairs_totals',
+        'NULL' if since is None else f"TIMESTAMP_SECONDS({since})", f"TIMESTAMP_SECONDS({through})")
+    connection = warehouse.connection
+    connection.execute("BEGIN TRANSACTION")
+    connection.execute(f"INSERT INTO ingredient_pairs_totals {warehouse.render(select)}")
+    connection.execute(f"DELETE FROM ingredient_pairs_totals WHERE compacted_through < to_timestamp({through})")
+    connection.execute("COMMIT")
+    if since is not None:
+        connection.execute(f"DELETE FROM ingredient_pairs WHERE batch_at <= to_timestamp({since})")
+
+def pairings(warehouse, **kwargs):
+    from cocktailverse import queries
+
+    sql, params = queries.ingredient_pairings_query('`ingredient_pairs`', '`ingredient_pairs_totals`',
+                                                    limit=1000, **kwargs)
+    columns, rows = warehouse.run('pairings', warehouse.render(sql), {p.name: p.value for p in params})
+    return [dict(zip(columns, row)) for row in rows]
+
+def recount(latest):
+    counts = Counter()
+    for names in latest.values():
+        cooccurrence.add_cocktail(counts, names)
+    return counts
+
+def test_deltas_and_compacted_totals_match_a_full_recount():
+    import math
+    import random
+
+    rng = random.Random(7)
+    warehouse = local_pair_tables()
+    previous, latest = {}, {}
+    for step in range(1, 25):
+        batch = []
+        for _ in range(8):
+            drink = {'idDrink': str(rng.randint(1, 20)), 'strDrink': 'Drink'}
+            for i, name in enumerate(rng.sample(NAMES, rng.randint(0, 4)), 1):
+                drink[f'strIngredient{i}'] = name
+                drink[f'strMeasure{i}'] = rng.choice(['1 oz', 'to taste', None])
+            batch.append(records.CocktailRecord.from_api(drink, clean=True))
+        load_batch(warehouse, batch, previous, 1700000000 + step * 3600)
+        latest.update({record.cocktail_id: record.ingredient_names for record in batch})
+        if step % 7 == 0:
+            compact_locally(warehouse, 1700000000 + (step - 2) * 3600)
+
+        expected = recount(latest)
+        rows = pairings(warehouse)
+        assert {(row['ingredient_a'], row['ingredient_b']): row['cocktails'] for row in rows} == {
+            pair: n for pair, n in expected.items() if n > 0 and pair[0] and pair[0] < pair[1]}
+        for row in rows:
+            a, b = row['ingredient_a'], row['ingredient_b']
+            pmi = math.log2(expected[(a, b)] * expected[('', '')] / (expected[(a, a)] * expected[(b, b)]))
+            assert row['pmi'] == round(pmi, 4)
+
+def test_compaction_folds_only_deltas_up_to_the_cutoff():
+    warehouse = local_pair_tables()
+    previous = {}
+    gimlet = {'idDrink': '1', 'strDrink': 'Gimlet', 'strIngredient1': 'Gin', 'strIngredient2': 'Lime Juice'}
+    tonic = {'idDrink': '2', 'strDrink': 'G&T', 'strIngredient1': 'Gin', 'strIngredient2': 'Tonic'}
+    load_batch(warehouse, [records.CocktailRecord.from_api(gimlet, clean=True)], previous, 1000)
+    load_batch(warehouse, [records.CocktailRecord.from_api(tonic, clean=True)], previous, 2000)
+
+    compact_locally(warehouse, 1500)
+    totals = dict(((a, b), n) for a, b, n in warehouse.connection.execute(
+        "SELECT ingredient_a, ingredient_b, total FROM ingredient_pairs_totals").fetchall())
+    assert totals == {('', ''): 1, ('gin', 'gin'): 1, ('lime juice', 'lime juice'): 1, ('gin', 'lime juice'): 1}
+    # A delta exactly at the cutoff is folded; the later batch stays a delta and is still read
+    compact_locally(warehouse, 2000)
+    assert warehouse.connection.execute("SELECT COUNT(*) FROM ingredient_pairs WHERE batch_at <= to_timestamp(1500)"
+                                        ).fetchone()[0] == 0
+    rows = pairings(warehouse, ingredient='gin')
+    assert [(row['ingredient_a'], row['ingredient_b'], row['cocktails']) for row in rows] == [
+        ('gin', 'lime juice', 1), ('gin', 'tonic', 1)]